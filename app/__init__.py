@@ -1,43 +1,112 @@
-from flask import Flask, render_template
+from flask import Flask, Response, render_template, request
 from flask_sqlalchemy import SQLAlchemy
-from flask_jwt_extended import JWTManager
+from flask_migrate import Migrate
+from flask_jwt_extended import JWTManager, verify_jwt_in_request
 from flask_cors import CORS
 from dotenv import load_dotenv
+import hmac
 import os
 
 load_dotenv()
 
 db = SQLAlchemy()
+migrate = Migrate()
 jwt = JWTManager()
 
-def create_app(config_name='development'):
+def create_app(config_name=None):
+    """Crear la app
+    
+    En producción (FLASK_ENV=production) el arranque no imprime
+    diagnósticos ni ejecuta db.create_all(): el esquema lo gestiona
+    `flask db upgrade`. CREAR_TABLAS=1/0 fuerza uno u otro comportamiento.
+    """
+    config_name = config_name or os.getenv('FLASK_ENV', 'development')
+    es_produccion = config_name == 'production'
+    
     # ===== RUTAS ABSOLUTAS - CRÍTICO PARA DOCKER =====
     BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     TEMPLATE_DIR = os.path.join(BASE_DIR, 'templates')
     STATIC_DIR = os.path.join(BASE_DIR, 'static')
     
-    print(f"\n🗂️  BASE_DIR: {BASE_DIR}")
-    print(f"📄 TEMPLATE_DIR: {TEMPLATE_DIR}")
-    print(f"✅ Templates exist: {os.path.exists(TEMPLATE_DIR)}")
-    print(f"📁 Templates files: {os.listdir(TEMPLATE_DIR) if os.path.exists(TEMPLATE_DIR) else 'NO EXISTE'}\n")
+    if not es_produccion:
+        print(f"\n🗂️  BASE_DIR: {BASE_DIR}")
+        print(f"📄 TEMPLATE_DIR: {TEMPLATE_DIR}")
+        print(f"✅ Templates exist: {os.path.exists(TEMPLATE_DIR)}")
+        print(f"📁 Templates files: {os.listdir(TEMPLATE_DIR) if os.path.exists(TEMPLATE_DIR) else 'NO EXISTE'}\n")
     
     app = Flask(__name__, 
                 template_folder=TEMPLATE_DIR,
                 static_folder=STATIC_DIR,
                 static_url_path='/static')
+    
+    # JSON con orjson si está instalado
+    from app.serializacion import ProveedorJSON
+    app.json = ProveedorJSON(app)
 
     
+    from app import cache, compresion, estaticos, metricas, perfilador, pool
+    
     # ===== CONFIG =====
     app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'postgresql://dalu_user:dalu_pass@db:5432/dalu_db')
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = pool.opciones_motor(app.config['SQLALCHEMY_DATABASE_URI'])
     app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'jwt-dev-secret-key')
     app.config['JWT_ACCESS_TOKEN_EXPIRES'] = 86400
+    app.config['PASSWORD_HASH_METODO'] = os.getenv(
+        'PASSWORD_HASH_METODO', 'scrypt:32768:8:1' if es_produccion else 'pbkdf2:sha256:50000')
+    app.config['PASSWORD_HASH_HILOS'] = int(os.getenv('PASSWORD_HASH_HILOS', 2))
+    app.config['PASSWORD_HASH_COLA'] = int(os.getenv('PASSWORD_HASH_COLA', 32))
+    app.config['PASSWORD_HASH_ESPERA'] = int(os.getenv('PASSWORD_HASH_ESPERA', 10))
+    app.config['REVOCACION_SYNC_SEGUNDOS'] = int(os.getenv('REVOCACION_SYNC_SEGUNDOS', 5))
+    app.config['REDIS_URL'] = os.getenv('REDIS_URL', 'redis://redis:6379/0')
+    app.config['IDENTIDAD_CACHE_TTL'] = int(os.getenv('IDENTIDAD_CACHE_TTL', 60))
+    app.config['IDENTIDAD_CACHE_MAX'] = int(os.getenv('IDENTIDAD_CACHE_MAX', 10000))
+    app.config['INVENTARIO_SKU_CACHE_TTL'] = int(os.getenv('INVENTARIO_SKU_CACHE_TTL', 30))
+    app.config['INVENTARIO_SKU_CACHE_MAX'] = int(os.getenv('INVENTARIO_SKU_CACHE_MAX', 5000))
+    app.config['RESPUESTAS_CACHE_BACKEND'] = os.getenv('RESPUESTAS_CACHE_BACKEND', 'redis' if es_produccion else 'local')
+    app.config['RESPUESTAS_CACHE_TTL'] = int(os.getenv('RESPUESTAS_CACHE_TTL', 300))
+    app.config['RESPUESTAS_CACHE_MAX'] = int(os.getenv('RESPUESTAS_CACHE_MAX', 2000))
+    app.config['COMPRESION'] = os.getenv('COMPRESION', '1') == '1'
+    app.config['COMPRESION_MINIMO'] = int(os.getenv('COMPRESION_MINIMO', 1024))
+    app.config['COMPRESION_NIVEL_GZIP'] = int(os.getenv('COMPRESION_NIVEL_GZIP', 6))
+    app.config['COMPRESION_NIVEL_BROTLI'] = int(os.getenv('COMPRESION_NIVEL_BROTLI', 4))
+    app.config['METRICAS_TOKEN'] = os.getenv('METRICAS_TOKEN', '')
+    app.config['PERFILADOR'] = os.getenv('PERFILADOR', '0') == '1'
+    app.config['PERFILADOR_LENTA_MS'] = int(os.getenv('PERFILADOR_LENTA_MS', 100))
+    app.config['PERFILADOR_REPETIDAS'] = int(os.getenv('PERFILADOR_REPETIDAS', 5))
+    app.config['PERFILADOR_EXPLAIN'] = os.getenv('PERFILADOR_EXPLAIN', '1') == '1'
+    app.config['ESTATICOS_DIR'] = os.getenv('ESTATICOS_DIR', os.path.join(BASE_DIR, 'staticfiles'))
+    app.config['ESTATICOS_CONSTRUIDOS'] = os.getenv('ESTATICOS_CONSTRUIDOS', '1' if es_produccion else '0') == '1'
+    app.config['ESTATICOS_MAX_AGE'] = int(os.getenv('ESTATICOS_MAX_AGE', 60))
+    app.config['BALANCE_EVENTOS_BACKEND'] = os.getenv('BALANCE_EVENTOS_BACKEND', 'redis' if es_produccion else 'local')
+    app.config['BALANCE_STREAM_HEARTBEAT'] = int(os.getenv('BALANCE_STREAM_HEARTBEAT', 15))
+    app.config['BALANCE_STREAM_MAX_SEGUNDOS'] = int(os.getenv('BALANCE_STREAM_MAX_SEGUNDOS', 300))
+    app.config['BALANCE_STREAMS_POR_WORKER'] = int(os.getenv('BALANCE_STREAMS_POR_WORKER', 2))
+    app.config['BALANCE_SNAPSHOT_TTL'] = int(os.getenv('BALANCE_SNAPSHOT_TTL', 300))
+    app.config['BALANCE_STREAM_URL'] = os.getenv('BALANCE_STREAM_URL', '')
     
     # ===== INICIALIZAR EXTENSIONES =====
     db.init_app(app)
+    migrate.init_app(app, db)
     jwt.init_app(app)
     CORS(app)
     
+    from app.auth import contrasenas, identidad, revocacion
+    from app.balance import eventos
+    from app.inventario import busqueda
+    pool.init_app(app)
+    contrasenas.init_app(app)
+    identidad.init_app(app)
+    revocacion.init_app(app)
+    busqueda.init_app(app)
+    eventos.init_app(app)
+    cache.init_app(app)
+    perfilador.init_app(app)
+    # Antes que la compresión: su after_request corre después y mide el tamaño enviado
+    metricas.init_app(app)
+    compresion.init_app(app)
+    estaticos.init_app(app)
+    
     # ===== RUTAS FRONTEND - SERVE HTML PAGES =====
     @app.route('/', methods=['GET'])
     def index():
@@ -85,6 +154,34 @@ def create_app(config_name='development'):
         """Verificar que la API está activa"""
         return {"status": "ok"}, 200
     
+    def token_metricas_valido():
+        token = app.config['METRICAS_TOKEN']
+        return bool(token) and hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}')
+    
+    @app.route('/api/health/pool', methods=['GET'])
+    def health_pool():
+        """Estado del pool de conexiones de este worker (JWT o Bearer METRICAS_TOKEN)"""
+        if not token_metricas_valido():
+            verify_jwt_in_request()
+        return pool.estado(db.engine, app.config['SQLALCHEMY_ENGINE_OPTIONS']), 200
+    
+    @app.route('/api/health/cache', methods=['GET'])
+    def health_cache():
+        """Aciertos y fallos de la caché de respuestas en este worker (JWT o Bearer METRICAS_TOKEN)"""
+        if not token_metricas_valido():
+            verify_jwt_in_request()
+        return cache.estado(), 200
+    
+    @app.route('/api/metrics', methods=['GET'])
+    def metrics():
+        """Métricas en formato Prometheus (suma de todos los workers)"""
+        if not metricas.disponible():
+            return {'error': 'prometheus_client no está instalado'}, 503
+        if app.config['METRICAS_TOKEN'] and not token_metricas_valido():
+            return {'error': 'No autorizado'}, 401
+        cuerpo, tipo = metricas.exportar()
+        return Response(cuerpo, content_type=tipo)
+    
     # ===== REGISTRAR BLUEPRINTS =====
     from app.auth.routes import auth_bp
     from app.inventario.routes import inventario_bp
@@ -92,7 +189,6 @@ def create_app(config_name='development'):
     from app.gastos.routes import gastos_bp
     from app.deudas.routes import deudas_bp
     from app.balance.routes import balance_bp
-    from app.balance.routes import balance_bp
     
     # Registrar con prefijos URL
     app.register_blueprint(auth_bp)  # Ya tiene url_prefix='/api/auth' en su definición
@@ -103,8 +199,13 @@ def create_app(config_name='development'):
     app.register_blueprint(balance_bp, url_prefix='/api/balance')
     
     
-    # ===== CREAR TABLAS =====
-    with app.app_context():
-        db.create_all()
+    # ===== COMANDOS CLI =====
+    from app.diagnostico import indices_cli
+    app.cli.add_command(indices_cli)
+    
+    # ===== CREAR TABLAS (solo desarrollo) =====
+    if os.getenv('CREAR_TABLAS', '0' if es_produccion else '1') == '1':
+        with app.app_context():
+            db.create_all()
     
     return app
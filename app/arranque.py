@@ -0,0 +1,53 @@
+"""Arranque de workers: conexiones tras fork y precalentamiento
+
+Lo usa gunicorn.conf.py. Con --preload la app se crea una sola vez en
+el master y los workers la heredan por fork; el pool de SQLAlchemy no
+debe compartir conexiones entre procesos, así que cada worker descarta
+las heredadas sin cerrarlas (siguen siendo del master).
+"""
+from app import db
+import os
+import time
+
+
+def reiniciar_conexiones_tras_fork(app):
+    """Descartar en el worker las conexiones heredadas del master"""
+    with app.app_context():
+        db.engine.dispose(close=False)
+
+
+def abrir_conexiones(app, cantidad):
+    """Abrir `cantidad` conexiones del pool a la vez y devolverlas"""
+    if cantidad <= 0:
+        return 0
+    with app.app_context():
+        conexiones = []
+        try:
+            for _ in range(cantidad):
+                conexiones.append(db.engine.connect())
+        finally:
+            for conexion in conexiones:
+                conexion.close()
+    return len(conexiones)
+
+
+def precompilar_plantillas(app):
+    """Compilar las plantillas Jinja para que la primera visita no lo haga"""
+    nombres = app.jinja_env.list_templates()
+    for nombre in nombres:
+        app.jinja_env.get_template(nombre)
+    return len(nombres)
+
+
+def precalentar(app):
+    """Precalentar un worker según POOL_PRECALENTAR y PRECOMPILAR_PLANTILLAS"""
+    inicio = time.perf_counter()
+    conexiones = abrir_conexiones(app, int(os.getenv('POOL_PRECALENTAR', 0)))
+    plantillas = 0
+    if os.getenv('PRECOMPILAR_PLANTILLAS', '0') == '1':
+        plantillas = precompilar_plantillas(app)
+    return {
+        'conexiones': conexiones,
+        'plantillas': plantillas,
+        'segundos': round(time.perf_counter() - inicio, 3),
+    }
@@ -0,0 +1,151 @@
+"""Hash de contraseñas con costo configurable y ejecución acotada
+
+- PASSWORD_HASH_METODO fija el método y costo de Werkzeug por entorno
+  (p. ej. 'scrypt:32768:8:1' en producción, un pbkdf2 más barato en
+  desarrollo). Al iniciar sesión con un hash más débil que el configurado
+  (mismo algoritmo con menor costo, o pbkdf2 si se configuró scrypt) se
+  vuelve a hashear la contraseña y se guarda (rehash transparente). Nunca
+  se rehashea hacia abajo: un hash más fuerte que la configuración (p. ej.
+  una copia de producción en desarrollo) se deja como está.
+- Los hashes corren en un pool de PASSWORD_HASH_HILOS hilos por proceso
+  con a lo sumo PASSWORD_HASH_COLA esperando. scrypt y pbkdf2 liberan el
+  GIL, así que mientras tanto los demás hilos del worker siguen
+  atendiendo; si la cola está llena el login falla rápido con Saturado
+  (503) en vez de acumular CPU y bloquear el resto de las peticiones.
+- Un usuario inexistente se verifica contra un hash ficticio del mismo
+  método, precalculado en init_app: tarda lo mismo que una contraseña
+  incorrecta y no revela qué usuarios existen.
+"""
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+import os
+import secrets
+import threading
+
+METODO_POR_DEFECTO = 'scrypt:32768:8:1'
+
+# Orden de fuerza de los digest de pbkdf2
+DIGESTS_PBKDF2 = ('sha1', 'sha224', 'sha256', 'sha384', 'sha512')
+
+_lock = threading.Lock()
+_ejecutor = None
+_ficticios = {}
+
+
+class Saturado(Exception):
+    """Demasiados hashes en curso en este proceso; reintentar en unos segundos"""
+
+
+class EjecutorAcotado:
+    """ThreadPoolExecutor con un máximo de tareas en curso + en cola"""
+
+    def __init__(self, hilos, cola):
+        self.pid = os.getpid()
+        self._pool = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix='hash-contrasena')
+        self._cupos = threading.BoundedSemaphore(hilos + cola)
+
+    def ejecutar(self, funcion, *args, espera=None):
+        if not self._cupos.acquire(blocking=False):
+            raise Saturado()
+        try:
+            futuro = self._pool.submit(funcion, *args)
+        except Exception:
+            self._cupos.release()
+            raise
+        futuro.add_done_callback(lambda _: self._cupos.release())
+        try:
+            return futuro.result(timeout=espera)
+        except TimeoutError:
+            raise Saturado()
+
+
+def _config(clave, defecto):
+    return current_app.config.get(clave, defecto)
+
+
+def metodo():
+    return _config('PASSWORD_HASH_METODO', METODO_POR_DEFECTO)
+
+
+def _obtener_ejecutor():
+    """Ejecutor del proceso actual (se crea de nuevo tras un fork de gunicorn)"""
+    global _ejecutor
+    if _ejecutor is None or _ejecutor.pid != os.getpid():
+        with _lock:
+            if _ejecutor is None or _ejecutor.pid != os.getpid():
+                _ejecutor = EjecutorAcotado(_config('PASSWORD_HASH_HILOS', 2), _config('PASSWORD_HASH_COLA', 32))
+    return _ejecutor
+
+
+def _ejecutar(funcion, *args):
+    return _obtener_ejecutor().ejecutar(funcion, *args, espera=_config('PASSWORD_HASH_ESPERA', 10))
+
+
+def _ficticio(metodo_hash):
+    """Hash de una contraseña aleatoria con `metodo_hash`, calculado una vez por método
+
+    Normalmente ya está precalculado por init_app; si no, se calcula en
+    el ejecutor acotado como cualquier otro hash.
+    """
+    if metodo_hash not in _ficticios:
+        _ficticios[metodo_hash] = _ejecutar(generate_password_hash, secrets.token_hex(16), metodo_hash)
+    return _ficticios[metodo_hash]
+
+
+def generar(password):
+    """Hash de `password` con el método configurado"""
+    return _ejecutar(generate_password_hash, password, metodo())
+
+
+def verificar(hash_guardado, password):
+    """Verificar `password`; con hash_guardado None compara contra el hash ficticio"""
+    if hash_guardado is None:
+        _ejecutar(check_password_hash, _ficticio(metodo()), password)
+        return False
+    return _ejecutar(check_password_hash, hash_guardado, password)
+
+
+def _parametros(metodo_hash):
+    """('scrypt', n, r, p), ('pbkdf2', digest, iteraciones) o None si es otro formato
+
+    Recibe el prefijo normalizado de un hash de Werkzeug ("scrypt:32768:8:1").
+    """
+    partes = metodo_hash.split(':')
+    try:
+        if partes[0] == 'scrypt' and len(partes) == 4:
+            return ('scrypt', int(partes[1]), int(partes[2]), int(partes[3]))
+        if partes[0] == 'pbkdf2' and len(partes) == 3 and partes[1] in DIGESTS_PBKDF2:
+            return ('pbkdf2', DIGESTS_PBKDF2.index(partes[1]), int(partes[2]))
+    except ValueError:
+        pass
+    return None
+
+
+def _mas_debil(guardado, configurado):
+    """True si los parámetros `guardado` son más débiles que `configurado`"""
+    if configurado is None:
+        return False
+    if guardado is None:
+        return True  # formato antiguo de Werkzeug (sha1$..., plain$...)
+    if guardado[0] != configurado[0]:
+        return guardado[0] == 'pbkdf2' and configurado[0] == 'scrypt'
+    # Mismo algoritmo: ningún parámetro menor y al menos uno mayor
+    return guardado != configurado and all(g <= c for g, c in zip(guardado[1:], configurado[1:]))
+
+
+def necesita_rehash(hash_guardado):
+    """True si el hash guardado es más débil que el método configurado (nunca hacia abajo)"""
+    # El prefijo del hash ("scrypt:32768:8:1$...") es el método ya normalizado
+    guardado = hash_guardado.split('$', 1)[0]
+    configurado = _ficticio(metodo()).split('$', 1)[0]
+    if guardado == configurado:
+        return False
+    return _mas_debil(_parametros(guardado), _parametros(configurado))
+
+
+def init_app(app):
+    """Precalcular el hash ficticio del método configurado al arrancar"""
+    metodo_hash = app.config.get('PASSWORD_HASH_METODO', METODO_POR_DEFECTO)
+    if metodo_hash not in _ficticios:
+        _ficticios[metodo_hash] = generate_password_hash(secrets.token_hex(16), metodo_hash)
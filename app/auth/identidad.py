@@ -0,0 +1,139 @@
+"""Identidad del usuario autenticado sin consultar la BD en cada request
+
+Los tokens llevan empresa_id, rol y activo como claims. El estado
+vigente de cada usuario (empresa, rol, activo) se guarda en una caché
+TTL + LRU por proceso, que se invalida al confirmar cambios en Usuario.
+Flask-JWT-Extended la usa desde su user_lookup_loader, así las rutas
+leen `current_user` y solo hay una consulta por usuario cada TTL.
+"""
+from collections import OrderedDict, namedtuple
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app import db, jwt
+import threading
+import time
+
+IdentidadUsuario = namedtuple('IdentidadUsuario', ['id', 'empresa_id', 'rol', 'activo'])
+
+CLAVE_SESION = 'usuarios_modificados'
+
+
+class CacheTTL:
+    """Caché LRU acotada con expiración por entrada, segura entre hilos"""
+
+    def __init__(self, maximo=10000, ttl=60):
+        self.maximo = maximo
+        self.ttl = ttl
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, clave):
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None:
+                return None
+            valor, expira = entrada
+            if expira < time.monotonic():
+                del self._datos[clave]
+                return None
+            self._datos.move_to_end(clave)
+            return valor
+
+    def set(self, clave, valor):
+        with self._lock:
+            self._datos[clave] = (valor, time.monotonic() + self.ttl)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.maximo:
+                self._datos.popitem(last=False)
+
+    def invalidar(self, clave):
+        with self._lock:
+            self._datos.pop(clave, None)
+
+    def limpiar(self):
+        with self._lock:
+            self._datos.clear()
+
+
+_cache = CacheTTL()
+
+
+def claims_para(usuario):
+    """Claims adicionales del token de un usuario"""
+    return {
+        'empresa_id': usuario.empresa_id,
+        'rol': usuario.rol,
+        'activo': bool(usuario.activo),
+    }
+
+
+def invalidar(usuario_id):
+    """Olvidar el estado cacheado de un usuario (p. ej. al desactivarlo)"""
+    _cache.invalidar(usuario_id)
+
+
+def _cargar(usuario_id):
+    from app.models import Usuario
+
+    fila = db.session.query(Usuario.empresa_id, Usuario.rol, Usuario.activo) \
+        .filter(Usuario.id == usuario_id).first()
+    if fila is None:
+        return None
+    return IdentidadUsuario(usuario_id, fila.empresa_id, fila.rol, bool(fila.activo))
+
+
+def resolver(usuario_id, claims=None):
+    """Estado vigente de un usuario, desde la caché o la BD"""
+    identidad = _cache.get(usuario_id)
+    if identidad is None:
+        identidad = _cargar(usuario_id)
+        if identidad is None:
+            return None
+        _cache.set(usuario_id, identidad)
+
+    # Un token emitido para otra empresa no es válido aunque el id exista
+    if claims and 'empresa_id' in claims and claims['empresa_id'] != identidad.empresa_id:
+        return None
+    return identidad
+
+
+@jwt.user_lookup_loader
+def _usuario_del_token(_jwt_header, jwt_data):
+    identidad = resolver(jwt_data['sub'], jwt_data)
+    if identidad is None or not identidad.activo:
+        return None
+    return identidad
+
+
+@jwt.user_lookup_error_loader
+def _usuario_no_valido(_jwt_header, jwt_data):
+    return {'error': 'Usuario no encontrado o inactivo'}, 401
+
+
+def _marcar_usuario(mapper, connection, usuario):
+    session = Session.object_session(usuario)
+    if session is not None:
+        session.info.setdefault(CLAVE_SESION, set()).add(usuario.id)
+
+
+def _despues_de_commit(session):
+    for usuario_id in session.info.pop(CLAVE_SESION, ()):
+        _cache.invalidar(usuario_id)
+
+
+def _despues_de_rollback(session, previous_transaction):
+    session.info.pop(CLAVE_SESION, None)
+
+
+def init_app(app):
+    """Configurar la caché y escuchar cambios en Usuario"""
+    from app.models import Usuario
+
+    _cache.ttl = app.config.get('IDENTIDAD_CACHE_TTL', 60)
+    _cache.maximo = app.config.get('IDENTIDAD_CACHE_MAX', 10000)
+
+    if not event.contains(Usuario, 'after_update', _marcar_usuario):
+        event.listen(Usuario, 'after_update', _marcar_usuario)
+        event.listen(Usuario, 'after_delete', _marcar_usuario)
+        event.listen(Session, 'after_commit', _despues_de_commit)
+        event.listen(Session, 'after_soft_rollback', _despues_de_rollback)
@@ -0,0 +1,185 @@
+"""Revocación de tokens sin consultar la BD en cada request
+
+Cada worker guarda en memoria los jti revocados ({jti: exp}) y las
+revocaciones por usuario ({usuario_id: (desde, expira)}: todo token del
+usuario con iat <= desde). El token_in_blocklist_loader de
+Flask-JWT-Extended solo mira esos dicts, así que revisar un token cuesta
+un par de búsquedas en un dict (decenas de nanosegundos).
+
+La tabla token_revocado es la fuente común entre workers: cada
+REVOCACION_SYNC_SEGUNDOS un solo hilo del worker trae las filas nuevas
+(created_at >= última sincronización - MARGEN_SYNC) en una conexión
+aparte; el resto de los hilos no espera y usa lo que ya hay. Una
+revocación hecha en otro worker tarda a lo sumo ese intervalo en
+aplicarse; la del propio worker se aplica al confirmar. Las entradas se
+descartan al pasar su expiración, así que la memoria queda acotada por
+los tokens revocados que aún no vencen.
+"""
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete, event, inspect, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app import db, jwt
+import threading
+import time
+
+CLAVE_SESION = 'usuarios_revocados'
+
+# Cubre filas confirmadas después de la sincronización que las habría visto
+# y diferencias de reloj entre servidores
+MARGEN_SYNC = timedelta(seconds=60)
+
+
+def _epoch(fecha):
+    return fecha.replace(tzinfo=timezone.utc).timestamp()
+
+
+class Revocados:
+    """Tokens revocados vigentes en memoria, sincronizados desde la BD"""
+
+    def __init__(self, intervalo=5, vida=86400):
+        self.intervalo = intervalo
+        self.vida = vida  # duración máxima de un token, en segundos
+        self.jtis = {}
+        self.usuarios = {}
+        self.proxima = 0.0
+        self.sincronizado = None
+        self._lock = threading.Lock()
+
+    def revocado(self, payload):
+        if time.monotonic() >= self.proxima:
+            self.sincronizar()
+        if payload.get('jti') in self.jtis:
+            return True
+        if self.usuarios:
+            revocacion = self.usuarios.get(int(payload['sub']))
+            return revocacion is not None and payload.get('iat', 0) <= revocacion[0]
+        return False
+
+    def agregar_jti(self, jti, expira):
+        with self._lock:
+            self.jtis[jti] = expira
+
+    def agregar_usuario(self, usuario_id, desde, expira):
+        with self._lock:
+            self._agregar_usuario(usuario_id, desde, expira)
+
+    def _agregar_usuario(self, usuario_id, desde, expira):
+        anterior = self.usuarios.get(usuario_id)
+        if anterior is None or anterior[0] < desde:
+            self.usuarios[usuario_id] = (desde, expira)
+
+    def sincronizar(self):
+        """Traer las revocaciones nuevas de la BD y descartar las vencidas"""
+        if not self._lock.acquire(blocking=False):
+            return  # otro hilo ya está sincronizando
+        try:
+            if time.monotonic() < self.proxima:
+                return
+            from app.models import TokenRevocado
+
+            ahora = datetime.utcnow()
+            consulta = select(
+                TokenRevocado.jti, TokenRevocado.usuario_id, TokenRevocado.expira, TokenRevocado.created_at
+            ).where(TokenRevocado.expira > ahora)
+            if self.sincronizado is not None:
+                consulta = consulta.where(TokenRevocado.created_at >= self.sincronizado - MARGEN_SYNC)
+            with db.engine.connect() as conexion:
+                filas = conexion.execute(consulta).all()
+
+            # Dicts nuevos y reemplazo de la referencia: los lectores nunca ven uno a medio cambiar
+            limite = _epoch(ahora)
+            jtis = {jti: expira for jti, expira in self.jtis.items() if expira > limite}
+            usuarios = {uid: valor for uid, valor in self.usuarios.items() if valor[1] > limite}
+            self.jtis, self.usuarios = jtis, usuarios
+            for jti, usuario_id, expira, creado in filas:
+                if jti is not None:
+                    jtis[jti] = _epoch(expira)
+                elif usuario_id is not None:
+                    self._agregar_usuario(usuario_id, _epoch(creado), _epoch(expira))
+            self.sincronizado = ahora
+        except Exception as e:
+            # Se sigue con lo que hay en memoria y se reintenta en el próximo intervalo
+            print(f"⚠️  No se pudieron sincronizar los tokens revocados: {str(e) or type(e).__name__}")
+        finally:
+            self.proxima = time.monotonic() + self.intervalo
+            self._lock.release()
+
+
+_revocados = Revocados()
+
+
+def revocar_token(payload):
+    """Revocar el token de `payload` (claims decodificados) en todos los workers"""
+    from app.models import TokenRevocado
+
+    if payload.get('exp'):
+        expira = datetime.utcfromtimestamp(payload['exp'])
+    else:
+        expira = datetime.utcnow() + timedelta(seconds=_revocados.vida)
+    try:
+        db.session.add(TokenRevocado(jti=payload['jti'], usuario_id=int(payload['sub']), expira=expira))
+        db.session.commit()
+    except IntegrityError:
+        # Dos logouts simultáneos con el mismo token: ya quedó revocado
+        db.session.rollback()
+    _revocados.agregar_jti(payload['jti'], _epoch(expira))
+
+
+def limpiar_vencidos():
+    """Borrar las revocaciones cuyos tokens ya vencieron; devuelve cuántas"""
+    from app.models import TokenRevocado
+
+    resultado = db.session.execute(delete(TokenRevocado).where(TokenRevocado.expira <= datetime.utcnow()))
+    db.session.commit()
+    return resultado.rowcount
+
+
+@jwt.token_in_blocklist_loader
+def _token_revocado(_jwt_header, jwt_payload):
+    return _revocados.revocado(jwt_payload)
+
+
+@jwt.revoked_token_loader
+def _token_revocado_respuesta(_jwt_header, jwt_payload):
+    return {'error': 'Token revocado'}, 401
+
+
+def _al_actualizar_usuario(mapper, connection, usuario):
+    """Al desactivar un usuario, revocar todos los tokens que ya tiene"""
+    from app.models import TokenRevocado
+
+    if usuario.activo or not inspect(usuario).attrs.activo.history.has_changes():
+        return
+    ahora = datetime.utcnow()
+    expira = ahora + timedelta(seconds=_revocados.vida)
+    # Dentro del flush: se inserta por la conexión y se aplica en memoria al confirmar
+    connection.execute(insert(TokenRevocado).values(
+        jti=None, usuario_id=usuario.id, expira=expira, created_at=ahora
+    ))
+    session = Session.object_session(usuario)
+    if session is not None:
+        session.info.setdefault(CLAVE_SESION, []).append((usuario.id, _epoch(ahora), _epoch(expira)))
+
+
+def _despues_de_commit(session):
+    for usuario_id, desde, expira in session.info.pop(CLAVE_SESION, ()):
+        _revocados.agregar_usuario(usuario_id, desde, expira)
+
+
+def _despues_de_rollback(session, previous_transaction):
+    session.info.pop(CLAVE_SESION, None)
+
+
+def init_app(app):
+    """Configurar el intervalo de sincronización y escuchar desactivaciones"""
+    from app.models import Usuario
+
+    _revocados.intervalo = app.config.get('REVOCACION_SYNC_SEGUNDOS', 5)
+    vida = app.config.get('JWT_ACCESS_TOKEN_EXPIRES', 86400)
+    _revocados.vida = int(vida.total_seconds() if isinstance(vida, timedelta) else vida or 86400)
+
+    if not event.contains(Usuario, 'after_update', _al_actualizar_usuario):
+        event.listen(Usuario, 'after_update', _al_actualizar_usuario)
+        event.listen(Session, 'after_commit', _despues_de_commit)
+        event.listen(Session, 'after_soft_rollback', _despues_de_rollback)
@@ -1,9 +1,11 @@
 from flask import Blueprint, request, jsonify, redirect, url_for
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
-from werkzeug.security import check_password_hash, generate_password_hash
-from app.models import Usuario, Empresa
+from flask_jwt_extended import create_access_token, jwt_required, get_jwt, get_jwt_identity
+from app.models import Usuario, Empresa, BalanceEmpresa
 from app import db
+from app.auth import contrasenas, revocacion
+from app.auth.identidad import claims_para
 from datetime import timedelta
+import click
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/api/auth')
 
@@ -20,14 +22,29 @@ def login():
         
         usuario = Usuario.query.filter_by(username=username).first()
         
-        if not usuario or not check_password_hash(usuario.password_hash, password):
+        # Sin usuario se verifica contra un hash ficticio: tarda lo mismo que una contraseña incorrecta
+        valida = contrasenas.verificar(usuario.password_hash if usuario else None, password)
+        if not usuario or not valida:
             return jsonify({"success": False, "message": "Credenciales inválidas"}), 401
         
         if not usuario.activo:
             return jsonify({"success": False, "message": "Usuario inactivo"}), 401
         
+        # Rehash transparente si el hash guardado es más débil que el configurado
+        if contrasenas.necesita_rehash(usuario.password_hash):
+            try:
+                usuario.password_hash = contrasenas.generar(password)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                print(f"⚠️  Rehash de contraseña pendiente para usuario {usuario.id}: {str(e) or type(e).__name__}")
+        
         # Generar JWT token
-        access_token = create_access_token(identity=usuario.id, expires_delta=timedelta(hours=24))
+        access_token = create_access_token(
+            identity=usuario.id,
+            additional_claims=claims_para(usuario),
+            expires_delta=timedelta(hours=24)
+        )
         
         return jsonify({
             "success": True,
@@ -42,14 +59,24 @@ def login():
             "empresa_id": usuario.empresa_id
         }), 200
         
+    except contrasenas.Saturado:
+        return jsonify({"success": False, "message": "Demasiados inicios de sesión, reintenta en unos segundos"}), 503, {'Retry-After': '2'}
     except Exception as e:
         return jsonify({"success": False, "message": f"Error: {str(e)}"}), 500
 
 
 @auth_bp.route('/logout', methods=['POST'])
+@jwt_required(optional=True)
 def logout():
-    """Logout endpoint - Solo limpia el token en el cliente"""
-    return jsonify({"success": True, "message": "Logout exitoso"}), 200
+    """Logout endpoint - Revoca el token enviado (si viene) en todos los workers"""
+    try:
+        payload = get_jwt()
+        if payload:
+            revocacion.revocar_token(payload)
+        return jsonify({"success": True, "message": "Logout exitoso"}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"success": False, "message": f"Error: {str(e)}"}), 500
 
 
 @auth_bp.route('/registro', methods=['POST'])
@@ -87,10 +114,15 @@ def registro():
         usuario.set_password(password)
         
         db.session.add(usuario)
+        db.session.add(BalanceEmpresa(empresa_id=empresa.id))
         db.session.commit()
         
         # Generar token automático
-        access_token = create_access_token(identity=usuario.id, expires_delta=timedelta(hours=24))
+        access_token = create_access_token(
+            identity=usuario.id,
+            additional_claims=claims_para(usuario),
+            expires_delta=timedelta(hours=24)
+        )
         
         return jsonify({
             "success": True,
@@ -100,6 +132,9 @@ def registro():
             "empresa_id": usuario.empresa_id
         }), 201
         
+    except contrasenas.Saturado:
+        db.session.rollback()
+        return jsonify({"success": False, "message": "Servidor ocupado, reintenta en unos segundos"}), 503, {'Retry-After': '2'}
     except Exception as e:
         db.session.rollback()
         return jsonify({"success": False, "message": f"Error: {str(e)}"}), 500
@@ -123,4 +158,11 @@ def verify():
         }), 200
         
     except Exception as e:
-        return jsonify({"success": False, "message": f"Error: {str(e)}"}), 500
\ No newline at end of file
+        return jsonify({"success": False, "message": f"Error: {str(e)}"}), 500
+
+
+@auth_bp.cli.command('limpiar-revocados')
+def limpiar_revocados_cli():
+    """Borrar los tokens revocados que ya vencieron"""
+    borrados = revocacion.limpiar_vencidos()
+    click.echo(f"✅ {borrados} revocaciones vencidas borradas")
@@ -0,0 +1,264 @@
+"""Canal de eventos del balance (pub/sub) para el stream SSE
+
+Cada vez que se confirma una transacción que cambió balance_empresa se
+publica un snapshot del balance de esa empresa. Los dashboards abiertos
+lo reciben por /api/balance/stream sin consultar la BD.
+
+Backends:
+- local: colas en memoria dentro del proceso (por defecto en desarrollo;
+  con varios workers un cambio solo llega a los streams de su worker)
+- redis: publica en Redis y cada worker reenvía a sus suscriptores
+  locales con un único hilo oyente, así todos los workers de gunicorn
+  reciben los cambios (por defecto en producción).
+
+Cada bus recuerda el último snapshot de cada empresa, así una
+reconexión con Last-Event-ID al día no consulta la BD.
+
+En producción los streams se sirven desde un proceso aparte con
+workers gevent (gunicorn_sse.conf.py), donde cada stream es una
+greenlet y el cupo por worker va por cientos. En los workers gthread
+de la API cada stream ocupa un hilo: CuposStream limita cuántos puede
+haber a la vez para que el resto siga atendiendo la API.
+"""
+from collections import defaultdict
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+import json
+import queue
+import threading
+import time
+
+CANAL_PREFIJO = 'dalu:balance:'
+CLAVE_SESION = 'balance_cambiado'
+
+# Máximo de eventos sin leer por suscriptor antes de descartar los viejos
+MAX_PENDIENTES = 16
+
+
+class BusLocal:
+    """Fan-out en memoria: una cola por conexión suscrita"""
+
+    def __init__(self, ttl_snapshot=300):
+        self._lock = threading.Lock()
+        self._suscriptores = defaultdict(set)
+        self.ttl_snapshot = ttl_snapshot
+        self._ultimos = {}
+
+    def suscribir(self, empresa_id):
+        cola = queue.Queue(maxsize=MAX_PENDIENTES)
+        with self._lock:
+            self._suscriptores[empresa_id].add(cola)
+        return cola
+
+    def cancelar(self, empresa_id, cola):
+        with self._lock:
+            suscriptores = self._suscriptores.get(empresa_id)
+            if suscriptores:
+                suscriptores.discard(cola)
+                if not suscriptores:
+                    del self._suscriptores[empresa_id]
+
+    def ultimo(self, empresa_id):
+        """Último snapshot conocido de la empresa o None si no hay uno vigente"""
+        with self._lock:
+            entrada = self._ultimos.get(empresa_id)
+            if entrada is None:
+                return None
+            evento, expira = entrada
+            if expira < time.monotonic():
+                del self._ultimos[empresa_id]
+                return None
+            return evento
+
+    def recordar(self, empresa_id, evento):
+        """Guardar el snapshot si es más nuevo que el recordado"""
+        with self._lock:
+            self._recordar(empresa_id, evento)
+
+    def _recordar(self, empresa_id, evento):
+        # Un snapshot leído de la BD puede llegar después de un evento más nuevo
+        entrada = self._ultimos.get(empresa_id)
+        if entrada is not None and entrada[0]['id'] > evento['id']:
+            return
+        self._ultimos[empresa_id] = (evento, time.monotonic() + self.ttl_snapshot)
+
+    def entregar(self, empresa_id, evento):
+        """Entregar un evento a los suscriptores de este proceso"""
+        with self._lock:
+            self._recordar(empresa_id, evento)
+            colas = list(self._suscriptores.get(empresa_id, ()))
+        for cola in colas:
+            # Cada evento es un snapshot completo: si el cliente va atrasado
+            # basta con conservar el más reciente
+            while True:
+                try:
+                    cola.put_nowait(evento)
+                    break
+                except queue.Full:
+                    try:
+                        cola.get_nowait()
+                    except queue.Empty:
+                        pass
+
+    def publicar(self, empresa_id, evento):
+        self.entregar(empresa_id, evento)
+
+
+class BusRedis(BusLocal):
+    """Publica en Redis; un hilo por worker reenvía a las colas locales"""
+
+    def __init__(self, url, ttl_snapshot=300):
+        import redis
+
+        super().__init__(ttl_snapshot)
+        self._redis = redis.Redis.from_url(url)
+        self._oyente = None
+        self._oyente_lock = threading.Lock()
+        # Sin oyente activo los snapshots recordados pueden estar atrasados
+        self._escuchando = threading.Event()
+
+    def suscribir(self, empresa_id):
+        self._iniciar_oyente()
+        return super().suscribir(empresa_id)
+
+    def ultimo(self, empresa_id):
+        if not self._escuchando.is_set():
+            return None
+        return super().ultimo(empresa_id)
+
+    def recordar(self, empresa_id, evento):
+        if self._escuchando.is_set():
+            super().recordar(empresa_id, evento)
+
+    def publicar(self, empresa_id, evento):
+        try:
+            self._redis.publish(f'{CANAL_PREFIJO}{empresa_id}', json.dumps(evento))
+        except Exception as e:
+            # Sin Redis al menos se entera este worker
+            print(f"⚠️  No se pudo publicar en Redis: {str(e)}")
+            self.entregar(empresa_id, evento)
+
+    def _iniciar_oyente(self):
+        # Se arranca al primer suscriptor para que sobreviva al fork de gunicorn
+        with self._oyente_lock:
+            if self._oyente is not None and self._oyente.is_alive():
+                return
+            self._oyente = threading.Thread(target=self._escuchar, name='balance-eventos', daemon=True)
+            self._oyente.start()
+
+    def _escuchar(self):
+        pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        try:
+            pubsub.psubscribe(f'{CANAL_PREFIJO}*')
+            # Lo recordado antes de suscribirse pudo perderse eventos
+            with self._lock:
+                self._ultimos.clear()
+            self._escuchando.set()
+            for mensaje in pubsub.listen():
+                try:
+                    canal = mensaje['channel'].decode()
+                    empresa_id = int(canal[len(CANAL_PREFIJO):])
+                    self.entregar(empresa_id, json.loads(mensaje['data']))
+                except Exception as e:
+                    print(f"⚠️  Evento de balance inválido: {str(e)}")
+        finally:
+            # El próximo suscriptor vuelve a arrancar el oyente
+            self._escuchando.clear()
+            pubsub.close()
+
+
+class CuposStream:
+    """Cantidad máxima de streams abiertos a la vez en este proceso"""
+
+    def __init__(self, maximo=2):
+        self.maximo = maximo
+        self.abiertos = 0
+        self._lock = threading.Lock()
+
+    def tomar(self):
+        with self._lock:
+            if self.abiertos >= self.maximo:
+                return False
+            self.abiertos += 1
+            return True
+
+    def liberar(self):
+        with self._lock:
+            self.abiertos = max(self.abiertos - 1, 0)
+
+
+_bus = BusLocal()
+_cupos = CuposStream()
+
+
+def get_bus():
+    return _bus
+
+
+def get_cupos():
+    return _cupos
+
+
+def marcar_cambio(session, empresa_id):
+    """Anotar en la sesión que el balance de la empresa cambió"""
+    session.info.setdefault(CLAVE_SESION, set()).add(empresa_id)
+
+
+def leer_snapshot(session, empresa_id):
+    """Leer el balance actual como evento {id, balance} o None"""
+    from app.models import BalanceEmpresa
+
+    balance = session.execute(
+        select(BalanceEmpresa).where(BalanceEmpresa.empresa_id == empresa_id)
+        .execution_options(populate_existing=True)
+    ).scalar_one_or_none()
+    if balance is None:
+        return None
+    return {'id': balance.version, 'balance': balance.to_dict()}
+
+
+def _antes_de_commit(session):
+    empresa_ids = session.info.get(CLAVE_SESION)
+    if not empresa_ids:
+        return
+    # Se lee dentro de la transacción para publicar exactamente lo confirmado
+    session.flush()
+    session.info['balance_snapshots'] = {
+        empresa_id: leer_snapshot(session, empresa_id) for empresa_id in empresa_ids
+    }
+
+
+def _despues_de_commit(session):
+    session.info.pop(CLAVE_SESION, None)
+    snapshots = session.info.pop('balance_snapshots', None) or {}
+    for empresa_id, snapshot in snapshots.items():
+        if snapshot is not None:
+            _bus.publicar(empresa_id, snapshot)
+
+
+def _despues_de_rollback(session):
+    session.info.pop(CLAVE_SESION, None)
+    session.info.pop('balance_snapshots', None)
+
+
+event.listen(Session, 'before_commit', _antes_de_commit)
+event.listen(Session, 'after_commit', _despues_de_commit)
+event.listen(Session, 'after_soft_rollback', lambda session, previous_transaction: _despues_de_rollback(session))
+
+
+def init_app(app):
+    """Configurar el backend según BALANCE_EVENTOS_BACKEND (local | redis)"""
+    global _bus
+
+    _cupos.maximo = app.config.get('BALANCE_STREAMS_POR_WORKER', 2)
+    ttl_snapshot = app.config.get('BALANCE_SNAPSHOT_TTL', 300)
+
+    backend = app.config.get('BALANCE_EVENTOS_BACKEND', 'local')
+    if backend == 'redis':
+        try:
+            _bus = BusRedis(app.config['REDIS_URL'], ttl_snapshot)
+        except Exception as e:
+            print(f"⚠️  Redis no disponible para eventos de balance, usando backend local: {str(e)}")
+            _bus = BusLocal(ttl_snapshot)
+    else:
+        _bus = BusLocal(ttl_snapshot)
@@ -0,0 +1,191 @@
+"""Libro de totales por empresa (tabla balance_empresa)
+
+Las rutas que escriben ventas, gastos y deudas llaman a estas funciones
+dentro de su misma transacción, así el balance se lee con una sola
+búsqueda por clave primaria en lugar de recalcular SUM/COUNT.
+"""
+from app import cache, db
+from app.models import BalanceEmpresa, Venta, Gasto, Deuda
+from app.balance.eventos import marcar_cambio
+from sqlalchemy import func, update
+
+# Estados de deuda que cuentan como pendientes en el balance
+ESTADOS_PENDIENTES = ('pendiente', 'vencida')
+
+# Diferencia máxima tolerada al comparar montos (redondeo de floats)
+TOLERANCIA = 0.005
+
+CAMPOS = (
+    'total_ingresos',
+    'total_egresos',
+    'deudas_pendientes',
+    'cantidad_ventas',
+    'cantidad_gastos',
+    'cantidad_deudas_pendientes',
+)
+
+
+def aporte_deuda(deuda):
+    """Lo que una deuda suma al balance: (monto pendiente, cantidad)"""
+    if deuda is None or deuda.estado not in ESTADOS_PENDIENTES:
+        return 0.0, 0
+    return float(deuda.monto_pendiente or 0), 1
+
+
+def calcular_desde_fuentes(empresa_id):
+    """Recalcular los totales de una empresa desde venta, gasto y deuda"""
+    total_ingresos, cantidad_ventas = db.session.query(
+        func.coalesce(func.sum(Venta.total), 0), func.count(Venta.id)
+    ).filter(Venta.empresa_id == empresa_id).one()
+
+    total_egresos, cantidad_gastos = db.session.query(
+        func.coalesce(func.sum(Gasto.monto), 0), func.count(Gasto.id)
+    ).filter(Gasto.empresa_id == empresa_id).one()
+
+    deudas_pendientes, cantidad_deudas = db.session.query(
+        func.coalesce(func.sum(Deuda.monto_pendiente), 0), func.count(Deuda.id)
+    ).filter(
+        Deuda.empresa_id == empresa_id,
+        Deuda.estado.in_(ESTADOS_PENDIENTES)
+    ).one()
+
+    return {
+        'total_ingresos': float(total_ingresos),
+        'total_egresos': float(total_egresos),
+        'deudas_pendientes': float(deudas_pendientes),
+        'cantidad_ventas': cantidad_ventas,
+        'cantidad_gastos': cantidad_gastos,
+        'cantidad_deudas_pendientes': cantidad_deudas,
+    }
+
+
+def _insertar_si_falta(empresa_id):
+    """INSERT ... ON CONFLICT DO NOTHING de la fila recalculada; True si la insertó
+
+    Las tablas fuente ya incluyen el cambio de la transacción actual. Si
+    otra transacción creó la fila a la vez, esta no se pisa (y en
+    PostgreSQL se espera a que esa confirme).
+    """
+    dialecto = db.session.get_bind().dialect.name
+    if dialecto == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as insert_dialecto
+    elif dialecto == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as insert_dialecto
+    else:
+        raise RuntimeError(f'Motor no soportado para balance_empresa: {dialecto}')
+
+    resultado = db.session.execute(
+        insert_dialecto(BalanceEmpresa)
+        .values(empresa_id=empresa_id, version=1, **calcular_desde_fuentes(empresa_id))
+        .on_conflict_do_nothing(index_elements=['empresa_id'])
+    )
+    return resultado.rowcount == 1
+
+
+def registrar(empresa_id, **deltas):
+    """Sumar deltas a los totales de la empresa en la transacción actual
+
+    Usa un UPDATE atómico (col = col + delta) para que escrituras
+    concurrentes no se pisen. Si la empresa aún no tiene fila (la
+    migración 0010 las crea; queda por si acaso), se inserta recalculada
+    desde las tablas fuente, que ya incluyen el cambio; si otra
+    transacción la insertó primero se vuelve a aplicar el UPDATE.
+    """
+    deltas = {campo: valor for campo, valor in deltas.items() if valor}
+    if not deltas:
+        return
+
+    # Asegura que el cambio de la ruta esté en la BD antes de tocar el libro
+    db.session.flush()
+
+    valores = {
+        getattr(BalanceEmpresa, campo): getattr(BalanceEmpresa, campo) + valor
+        for campo, valor in deltas.items()
+    }
+    valores[BalanceEmpresa.version] = BalanceEmpresa.version + 1
+    sentencia = (
+        update(BalanceEmpresa)
+        .where(BalanceEmpresa.empresa_id == empresa_id)
+        .values(valores)
+        .execution_options(synchronize_session=False)
+    )
+
+    if db.session.execute(sentencia).rowcount == 0 and not _insertar_si_falta(empresa_id):
+        db.session.execute(sentencia)
+
+    marcar_cambio(db.session, empresa_id)
+    cache.marcar(db.session, empresa_id, 'balance')
+
+
+def registrar_cambio_deuda(empresa_id, antes, despues):
+    """Registrar la diferencia entre el aporte anterior y el nuevo de una deuda"""
+    monto_antes, cantidad_antes = antes
+    monto_despues, cantidad_despues = despues
+    registrar(
+        empresa_id,
+        deudas_pendientes=monto_despues - monto_antes,
+        cantidad_deudas_pendientes=cantidad_despues - cantidad_antes,
+    )
+
+
+def obtener(empresa_id):
+    """Leer la fila de balance de la empresa (solo lectura)
+
+    Sin fila (empresa sin migrar) devuelve los totales recalculados sin
+    guardarlos; la primera escritura o `flask balance reconstruir` la crea.
+    """
+    balance = db.session.get(BalanceEmpresa, empresa_id)
+    if balance is None:
+        balance = BalanceEmpresa(empresa_id=empresa_id, version=0, **calcular_desde_fuentes(empresa_id))
+    return balance
+
+
+def _diferentes(campo, guardado, real):
+    if campo.startswith('cantidad_'):
+        return guardado != real
+    return abs(guardado - real) > TOLERANCIA
+
+
+def reconstruir(empresa_id=None, corregir=True):
+    """Recalcular el libro desde las tablas fuente y reportar diferencias
+
+    Devuelve una lista de dicts {empresa_id, campo, guardado, real} con
+    cada valor que no coincidía. Con corregir=True además reescribe las
+    filas y hace commit.
+    """
+    from app.models import Empresa
+
+    if empresa_id is None:
+        empresa_ids = [fila[0] for fila in db.session.query(Empresa.id).order_by(Empresa.id)]
+    else:
+        empresa_ids = [empresa_id]
+
+    diferencias = []
+    for eid in empresa_ids:
+        real = calcular_desde_fuentes(eid)
+        balance = db.session.get(BalanceEmpresa, eid)
+
+        if balance is None:
+            diferencias.append({'empresa_id': eid, 'campo': '*', 'guardado': None, 'real': real})
+            if corregir:
+                db.session.add(BalanceEmpresa(empresa_id=eid, version=1, **real))
+                marcar_cambio(db.session, eid)
+            continue
+
+        corregida = False
+        for campo in CAMPOS:
+            guardado = getattr(balance, campo) or 0
+            if _diferentes(campo, guardado, real[campo]):
+                diferencias.append({'empresa_id': eid, 'campo': campo, 'guardado': guardado, 'real': real[campo]})
+                if corregir:
+                    setattr(balance, campo, real[campo])
+                    corregida = True
+
+        if corregida:
+            balance.version = (balance.version or 0) + 1
+            marcar_cambio(db.session, eid)
+
+    if corregir:
+        db.session.commit()
+
+    return diferencias
@@ -1,71 +1,130 @@
 """Routes de Balance - Dashboard Financiero
-Endpoint para calcular y devolver el balance completo
+Endpoint para devolver el balance completo desde el libro de totales
 """
-from flask import Blueprint, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from app import db
-from app.models import Venta, Gasto, Deuda, Usuario
-from sqlalchemy import func
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
+from flask_jwt_extended import jwt_required, current_user
+from app import cache, db
+from app.balance import eventos, ledger
+import click
+import json
+import queue
+import time
 
 balance_bp = Blueprint('balance', __name__)
 
 
 @balance_bp.route('/', methods=['GET'])
 @jwt_required()
+@cache.cachear('balance')
 def obtener_balance():
     """Obtener balance financiero completo"""
     try:
-        usuario_id = get_jwt_identity()
-        usuario = Usuario.query.get(usuario_id)
+        usuario = current_user
         
-        if not usuario:
-            return {'error': 'Usuario no encontrado'}, 404
-        
-        empresa_id = usuario.empresa_id
-        
-        # ✅ Calcular total ingresos (suma de TODAS las ventas)
-        total_ingresos = db.session.query(func.sum(Venta.total)) \
-            .filter_by(empresa_id=empresa_id).scalar() or 0
-        
-        # ✅ Calcular total egresos (suma de TODOS los gastos)
-        total_egresos = db.session.query(func.sum(Gasto.monto)) \
-            .filter_by(empresa_id=empresa_id).scalar() or 0
-        
-        # ✅ Calcular deudas pendientes (solo las que NO están pagadas)
-        deudas_pendientes = db.session.query(func.sum(Deuda.monto_pendiente)) \
-            .filter(
-                Deuda.empresa_id == empresa_id,
-                Deuda.estado.in_(['pendiente', 'vencida'])
-            ).scalar() or 0
-        
-        # ✅ Calcular balance neto = ingresos - egresos
-        balance_neto = float(total_ingresos) - float(total_egresos)
-        
-        # ✅ Calcular flujo disponible = balance neto - deudas pendientes
-        flujo_disponible = balance_neto - float(deudas_pendientes)
-        
-        # ✅ Contar registros para contexto
-        cantidad_ventas = Venta.query.filter_by(empresa_id=empresa_id).count()
-        cantidad_gastos = Gasto.query.filter_by(empresa_id=empresa_id).count()
-        cantidad_deudas_pendientes = Deuda.query.filter(
-            Deuda.empresa_id == empresa_id,
-            Deuda.estado.in_(['pendiente', 'vencida'])
-        ).count()
-        
-        response = {
-            'total_ingresos': float(total_ingresos),
-            'total_egresos': float(total_egresos),
-            'balance_neto': balance_neto,
-            'deudas_pendientes': float(deudas_pendientes),
-            'flujo_disponible': flujo_disponible,
-            'cantidad_ventas': cantidad_ventas,
-            'cantidad_gastos': cantidad_gastos,
-            'cantidad_deudas_pendientes': cantidad_deudas_pendientes
-        }
-        
-        print(f"✅ Balance calculado para empresa {empresa_id}: {response}")
-        return response, 200
+        # ✅ Una sola lectura por clave primaria en balance_empresa
+        return ledger.obtener(usuario.empresa_id).to_dict(), 200
         
     except Exception as e:
         print(f"❌ Error en obtener_balance: {str(e)}")
-        return {'error': str(e)}, 500
\ No newline at end of file
+        return {'error': str(e)}, 500
+
+
+def _evento_sse(evento):
+    """Formatear un snapshot como mensaje Server-Sent Events"""
+    return f"id: {evento['id']}\nevent: balance\ndata: {json.dumps(evento['balance'])}\n\n"
+
+
+@balance_bp.route('/stream', methods=['GET'])
+@jwt_required()
+def stream_balance():
+    """Stream SSE con un snapshot del balance cada vez que cambia
+    
+    El token va en el header Authorization (el dashboard lee el stream con
+    fetch; en la URL quedaría en el access log). Al reconectar, el cliente
+    envía Last-Event-ID y solo se reenvía el snapshot si hubo cambios desde
+    entonces; el snapshot sale del último evento recordado por el bus y la
+    BD solo se consulta si este proceso todavía no conoce la empresa. Por
+    encima de BALANCE_STREAMS_POR_WORKER responde 503 con Retry-After y el
+    dashboard consulta /api/balance/ hasta volver a conectarse.
+    """
+    empresa_id = current_user.empresa_id
+    try:
+        ultimo_id = int(request.headers.get('Last-Event-ID', ''))
+    except ValueError:
+        ultimo_id = None
+    
+    heartbeat = current_app.config.get('BALANCE_STREAM_HEARTBEAT', 15)
+    duracion_maxima = current_app.config.get('BALANCE_STREAM_MAX_SEGUNDOS', 300)
+    bus = eventos.get_bus()
+    cupos = eventos.get_cupos()
+    
+    if not cupos.tomar():
+        return {'error': 'Demasiados streams abiertos, reintenta más tarde'}, 503, {'Retry-After': '60'}
+    
+    # Suscribir antes de leer el snapshot para no perder cambios intermedios
+    cola = bus.suscribir(empresa_id)
+    
+    def cerrar():
+        bus.cancelar(empresa_id, cola)
+        cupos.liberar()
+    
+    try:
+        actual = bus.ultimo(empresa_id)
+        if actual is None:
+            actual = eventos.leer_snapshot(db.session, empresa_id)
+            if actual is not None:
+                bus.recordar(empresa_id, actual)
+    except Exception:
+        cerrar()
+        raise
+    finally:
+        # La conexión a la BD no se retiene mientras el stream está abierto
+        db.session.remove()
+    
+    def generar():
+        ultimo = ultimo_id
+        yield "retry: 3000\n\n"
+        if actual is not None and actual['id'] != ultimo:
+            ultimo = actual['id']
+            yield _evento_sse(actual)
+        
+        limite = time.monotonic() + duracion_maxima
+        while time.monotonic() < limite:
+            try:
+                evento = cola.get(timeout=min(heartbeat, max(limite - time.monotonic(), 0.1)))
+            except queue.Empty:
+                yield ": ping\n\n"
+                continue
+            if ultimo is not None and evento['id'] <= ultimo:
+                continue
+            ultimo = evento['id']
+            yield _evento_sse(evento)
+    
+    respuesta = Response(
+        stream_with_context(generar()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    # Al cerrar la respuesta (fin, desconexión o nunca iterada) se libera el cupo
+    respuesta.call_on_close(cerrar)
+    return respuesta
+
+
+@balance_bp.cli.command('reconstruir')
+@click.option('--empresa-id', type=int, default=None, help='Reconstruir solo esta empresa')
+@click.option('--solo-verificar', is_flag=True, help='Reportar diferencias sin corregirlas')
+def reconstruir_balance(empresa_id, solo_verificar):
+    """Recalcular balance_empresa desde ventas, gastos y deudas"""
+    diferencias = ledger.reconstruir(empresa_id=empresa_id, corregir=not solo_verificar)
+    
+    if not diferencias:
+        click.echo('✅ Balance consistente, sin diferencias')
+        return
+    
+    for d in diferencias:
+        click.echo(f"⚠️  Empresa {d['empresa_id']} · {d['campo']}: guardado={d['guardado']} real={d['real']}")
+    
+    accion = 'reportadas' if solo_verificar else 'corregidas'
+    click.echo(f"{'❌' if solo_verificar else '✅'} {len(diferencias)} diferencias {accion}")
+    if solo_verificar:
+        raise SystemExit(1)
@@ -0,0 +1,254 @@
+"""Caché de respuestas de lectura invalidada por etiquetas
+
+Las respuestas de los listados se guardan por (endpoint, empresa_id,
+argumentos de la URL). Cada respuesta depende de una etiqueta por
+empresa y recurso ("3:inventario", "3:balance", ...) que tiene un número
+de versión; la versión forma parte de la clave, así invalidar una
+etiqueta es solo incrementar su versión y las entradas viejas dejan de
+usarse hasta que el LRU o el TTL las descartan.
+
+Las escrituras marcan en la sesión las etiquetas que tocan (eventos de
+los modelos o `marcar` para UPDATE/INSERT masivos) y las versiones se
+incrementan después del commit; un rollback no invalida nada.
+
+Backends (RESPUESTAS_CACHE_BACKEND):
+- local: LRU acotado en memoria del proceso. Solo es coherente con un
+  worker: las invalidaciones no llegan a los otros procesos.
+- redis: entradas y versiones en Redis, compartidas por todos los workers
+  (por defecto en producción; sin Redis al arrancar queda desactivada).
+- off: sin caché, para desactivarla explícitamente.
+"""
+from collections import OrderedDict
+from functools import wraps
+from flask import request
+from flask_jwt_extended import current_user
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+import json
+import threading
+import time
+
+CLAVE_SESION = 'cache_etiquetas'
+PREFIJO = 'dalu:cache:'
+
+# Recurso de cada modelo cuyas escrituras invalidan respuestas
+RECURSOS_POR_MODELO = {
+    'Inventario': 'inventario',
+    'Venta': 'ventas',
+    'Gasto': 'gastos',
+    'Deuda': 'deudas',
+    'BalanceEmpresa': 'balance',
+}
+
+
+def etiqueta(empresa_id, recurso):
+    return f'{empresa_id}:{recurso}'
+
+
+class BackendLocal:
+    """LRU acotado con TTL por entrada; versiones en un dict del proceso"""
+
+    def __init__(self, maximo=2000, ttl=300):
+        self.maximo = maximo
+        self.ttl = ttl
+        self._datos = OrderedDict()
+        self._versiones = {}
+        self._lock = threading.Lock()
+
+    def version(self, nombre):
+        with self._lock:
+            return self._versiones.get(nombre, 0)
+
+    def invalidar(self, nombres):
+        with self._lock:
+            for nombre in nombres:
+                self._versiones[nombre] = self._versiones.get(nombre, 0) + 1
+
+    def get(self, clave):
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None:
+                return None
+            valor, expira = entrada
+            if expira < time.monotonic():
+                del self._datos[clave]
+                return None
+            self._datos.move_to_end(clave)
+            return valor
+
+    def set(self, clave, valor):
+        with self._lock:
+            self._datos[clave] = (valor, time.monotonic() + self.ttl)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.maximo:
+                self._datos.popitem(last=False)
+
+    def entradas(self):
+        return len(self._datos)
+
+
+class BackendRedis:
+    """Entradas JSON con expiración y versiones como contadores en Redis"""
+
+    def __init__(self, url, ttl=300):
+        import redis
+
+        self.ttl = ttl
+        self._redis = redis.Redis.from_url(url, socket_timeout=0.5)
+        self._redis.ping()
+
+    def version(self, nombre):
+        valor = self._redis.get(f'{PREFIJO}v:{nombre}')
+        return int(valor) if valor else 0
+
+    def invalidar(self, nombres):
+        pipe = self._redis.pipeline(transaction=False)
+        for nombre in nombres:
+            pipe.incr(f'{PREFIJO}v:{nombre}')
+        pipe.execute()
+
+    def get(self, clave):
+        valor = self._redis.get(f'{PREFIJO}r:{clave}')
+        return json.loads(valor) if valor else None
+
+    def set(self, clave, valor):
+        self._redis.set(f'{PREFIJO}r:{clave}', json.dumps(valor), ex=self.ttl)
+
+    def entradas(self):
+        return None
+
+
+class Contadores:
+    """Aciertos y fallos por endpoint en este proceso"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._datos = {}
+
+    def sumar(self, endpoint, tipo):
+        with self._lock:
+            por_endpoint = self._datos.setdefault(endpoint, {'hits': 0, 'misses': 0, 'errores': 0})
+            por_endpoint[tipo] += 1
+
+    def to_dict(self):
+        with self._lock:
+            return {endpoint: dict(valores) for endpoint, valores in self._datos.items()}
+
+
+_backend = None
+contadores = Contadores()
+
+
+def _clave(endpoint, empresa_id, nombre, version):
+    argumentos = '&'.join(f'{k}={v}' for k, v in sorted(request.args.items(multi=True)))
+    return f'{endpoint}|{empresa_id}|{nombre}@{version}|{argumentos}'
+
+
+def cachear(recurso):
+    """Decorador para GET que dependen solo de (empresa, recurso, argumentos)
+
+    Va debajo de @jwt_required(); solo se guardan respuestas 200.
+    """
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(*args, **kwargs):
+            if _backend is None:
+                return vista(*args, **kwargs)
+
+            endpoint = request.endpoint
+            empresa_id = current_user.empresa_id
+            nombre = etiqueta(empresa_id, recurso)
+            try:
+                clave = _clave(endpoint, empresa_id, nombre, _backend.version(nombre))
+                guardada = _backend.get(clave)
+            except Exception as e:
+                print(f"⚠️  Caché no disponible: {str(e)}")
+                contadores.sumar(endpoint, 'errores')
+                return vista(*args, **kwargs)
+
+            if guardada is not None:
+                contadores.sumar(endpoint, 'hits')
+                return guardada, 200
+
+            contadores.sumar(endpoint, 'misses')
+            respuesta = vista(*args, **kwargs)
+            if isinstance(respuesta, tuple) and respuesta[1] == 200 and isinstance(respuesta[0], dict):
+                try:
+                    _backend.set(clave, respuesta[0])
+                except Exception as e:
+                    print(f"⚠️  No se pudo guardar en caché: {str(e)}")
+            return respuesta
+        return envoltura
+    return decorador
+
+
+def marcar(session, empresa_id, *recursos):
+    """Anotar en la sesión etiquetas a invalidar cuando se confirme"""
+    etiquetas = session.info.setdefault(CLAVE_SESION, set())
+    for recurso in recursos:
+        etiquetas.add(etiqueta(empresa_id, recurso))
+
+
+def invalidar(empresa_id, *recursos):
+    """Invalidar etiquetas de inmediato (fuera de una transacción)"""
+    if _backend is not None:
+        _backend.invalidar([etiqueta(empresa_id, recurso) for recurso in recursos])
+
+
+def _marcar_objeto(mapper, connection, objeto):
+    session = Session.object_session(objeto)
+    if session is not None and objeto.empresa_id is not None:
+        marcar(session, objeto.empresa_id, RECURSOS_POR_MODELO[mapper.class_.__name__])
+
+
+def _despues_de_commit(session):
+    etiquetas = session.info.pop(CLAVE_SESION, None)
+    if etiquetas and _backend is not None:
+        try:
+            _backend.invalidar(etiquetas)
+        except Exception as e:
+            print(f"⚠️  No se pudo invalidar la caché: {str(e)}")
+
+
+def _despues_de_rollback(session, previous_transaction):
+    session.info.pop(CLAVE_SESION, None)
+
+
+def estado():
+    """Backend, entradas y contadores de este proceso"""
+    return {
+        'backend': type(_backend).__name__ if _backend is not None else 'off',
+        'entradas': _backend.entradas() if _backend is not None else 0,
+        'endpoints': contadores.to_dict(),
+    }
+
+
+def init_app(app):
+    """Elegir el backend y escuchar las escrituras de los modelos"""
+    global _backend
+    from app import models
+
+    backend = app.config.get('RESPUESTAS_CACHE_BACKEND', 'local')
+    ttl = app.config.get('RESPUESTAS_CACHE_TTL', 300)
+    if backend == 'redis':
+        try:
+            _backend = BackendRedis(app.config['REDIS_URL'], ttl=ttl)
+        except Exception as e:
+            # Un LRU local con varios workers serviría datos viejos: mejor sin caché
+            print(f"⚠️  Redis no disponible para la caché de respuestas, desactivada: {str(e)}")
+            _backend = None
+    elif backend == 'local':
+        _backend = BackendLocal(app.config.get('RESPUESTAS_CACHE_MAX', 2000), ttl=ttl)
+    else:
+        _backend = None
+
+    for nombre in RECURSOS_POR_MODELO:
+        modelo = getattr(models, nombre)
+        if not event.contains(modelo, 'after_insert', _marcar_objeto):
+            event.listen(modelo, 'after_insert', _marcar_objeto)
+            event.listen(modelo, 'after_update', _marcar_objeto)
+            event.listen(modelo, 'after_delete', _marcar_objeto)
+
+    if not event.contains(Session, 'after_commit', _despues_de_commit):
+        event.listen(Session, 'after_commit', _despues_de_commit)
+        event.listen(Session, 'after_soft_rollback', _despues_de_rollback)
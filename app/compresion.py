@@ -0,0 +1,90 @@
+"""Compresión de respuestas (brotli o gzip)
+
+Comprime en after_request las respuestas JSON/HTML/texto que superan
+COMPRESION_MINIMO bytes según el Accept-Encoding del cliente: brotli si
+el paquete está instalado y el cliente lo acepta, si no gzip. Un
+listado JSON de varios cientos de KB baja a una fracción en las
+conexiones lentas de los locales.
+
+No toca respuestas en streaming (exportaciones, SSE del balance), ni
+archivos enviados con send_file, ni las que ya traen Content-Encoding.
+Los estáticos los sirve WhiteNoise ya precomprimidos (app/estaticos.py).
+"""
+from flask import request
+import gzip
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+TIPOS_COMPRIMIBLES = {
+    'application/json',
+    'application/javascript',
+    'application/x-ndjson',
+    'image/svg+xml',
+    'text/css',
+    'text/csv',
+    'text/html',
+    'text/javascript',
+    'text/plain',
+}
+
+
+def _codificacion(aceptadas):
+    """Elegir 'br', 'gzip' o None según el Accept-Encoding (respeta q=0)"""
+    if brotli is not None and aceptadas.quality('br') > 0:
+        return 'br'
+    if aceptadas.quality('gzip') > 0:
+        return 'gzip'
+    return None
+
+
+def comprimir(respuesta, aceptadas, minimo=1024, nivel_gzip=6, nivel_brotli=4):
+    """Comprimir `respuesta` en el lugar si corresponde; devuelve la respuesta"""
+    if (
+        respuesta.direct_passthrough
+        or respuesta.is_streamed
+        or respuesta.status_code < 200
+        or respuesta.status_code in (204, 304)
+        or 'Content-Encoding' in respuesta.headers
+        or respuesta.mimetype not in TIPOS_COMPRIMIBLES
+    ):
+        return respuesta
+
+    # El contenido depende del Accept-Encoding aunque esta vez no se comprima
+    respuesta.vary.add('Accept-Encoding')
+
+    datos = respuesta.get_data()
+    if len(datos) < minimo:
+        return respuesta
+    codificacion = _codificacion(aceptadas)
+    if codificacion is None:
+        return respuesta
+
+    if codificacion == 'br':
+        comprimido = brotli.compress(datos, quality=nivel_brotli)
+    else:
+        comprimido = gzip.compress(datos, compresslevel=nivel_gzip, mtime=0)
+
+    respuesta.set_data(comprimido)
+    respuesta.headers['Content-Encoding'] = codificacion
+    if respuesta.headers.get('ETag') and not respuesta.headers['ETag'].startswith('W/'):
+        respuesta.headers['ETag'] = 'W/' + respuesta.headers['ETag']
+    return respuesta
+
+
+def init_app(app):
+    """Comprimir las respuestas de la app en after_request"""
+    if not app.config.get('COMPRESION', True):
+        return
+
+    @app.after_request
+    def _comprimir_respuesta(respuesta):
+        return comprimir(
+            respuesta,
+            request.accept_encodings,
+            minimo=app.config.get('COMPRESION_MINIMO', 1024),
+            nivel_gzip=app.config.get('COMPRESION_NIVEL_GZIP', 6),
+            nivel_brotli=app.config.get('COMPRESION_NIVEL_BROTLI', 4),
+        )
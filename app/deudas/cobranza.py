@@ -0,0 +1,107 @@
+"""Antigüedad de cartera y vencimiento de deudas
+
+- antiguedad(): montos pendientes por tramo de días vencidos con una
+  sola consulta agrupada (el CASE compara fecha_vencimiento contra
+  fechas de corte ya calculadas, así no depende de funciones de fecha
+  del motor).
+- marcar_vencidas(): pasa a 'vencida' las deudas pendientes cuya fecha
+  ya pasó, en UPDATEs por lotes de ids acotados con commit por lote
+  para no bloquear la tabla en bases con cientos de miles de deudas.
+"""
+from app import cache, db
+from app.balance.ledger import ESTADOS_PENDIENTES
+from app.models import Deuda
+from datetime import datetime, timedelta
+from sqlalchemy import case, func, select, update
+
+# (tramo, días vencidos desde, hasta); None = sin límite
+TRAMOS = (
+    ('al_dia', None, 0),
+    ('1_30', 1, 30),
+    ('31_60', 31, 60),
+    ('61_90', 61, 90),
+    ('90_mas', 91, None),
+)
+
+TAMANO_LOTE = 1000
+
+
+def _tramo(ahora):
+    """Expresión CASE con el tramo de cada deuda según su fecha de vencimiento"""
+    condiciones = [
+        (Deuda.fecha_vencimiento.is_(None), 'al_dia'),
+        (Deuda.fecha_vencimiento >= ahora, 'al_dia'),
+    ]
+    for nombre, desde, hasta in TRAMOS[1:-1]:
+        # Vencida hace entre `desde` y `hasta` días
+        condiciones.append((Deuda.fecha_vencimiento >= ahora - timedelta(days=hasta), nombre))
+    return case(*condiciones, else_=TRAMOS[-1][0])
+
+
+def antiguedad(empresa_id, ahora=None):
+    """Saldo pendiente y cantidad de deudas por tramo de antigüedad"""
+    ahora = ahora or datetime.utcnow()
+    tramo = _tramo(ahora).label('tramo')
+
+    filas = db.session.execute(
+        select(tramo, func.count(Deuda.id), func.coalesce(func.sum(Deuda.monto_pendiente), 0))
+        .where(
+            Deuda.empresa_id == empresa_id,
+            Deuda.estado.in_(ESTADOS_PENDIENTES),
+            Deuda.monto_pendiente > 0,
+        )
+        .group_by(tramo)
+    ).all()
+    por_tramo = {nombre: (cantidad, float(monto)) for nombre, cantidad, monto in filas}
+
+    tramos = []
+    for nombre, desde, hasta in TRAMOS:
+        cantidad, monto = por_tramo.get(nombre, (0, 0.0))
+        tramos.append({
+            'tramo': nombre,
+            'dias_desde': desde,
+            'dias_hasta': hasta,
+            'cantidad': cantidad,
+            'monto_pendiente': monto,
+        })
+
+    return {
+        'fecha_corte': ahora.isoformat(),
+        'tramos': tramos,
+        'total_pendiente': sum(t['monto_pendiente'] for t in tramos),
+        'total_vencido': sum(t['monto_pendiente'] for t in tramos if t['tramo'] != 'al_dia'),
+    }
+
+
+def marcar_vencidas(ahora=None, empresa_id=None, tamano_lote=TAMANO_LOTE):
+    """Pasar a 'vencida' las deudas pendientes con fecha de vencimiento pasada
+
+    No cambia el balance: pendiente y vencida aportan igual. Devuelve la
+    cantidad de deudas marcadas.
+    """
+    ahora = ahora or datetime.utcnow()
+    marcadas = 0
+
+    while True:
+        consulta = select(Deuda.id, Deuda.empresa_id).where(
+            Deuda.estado == 'pendiente',
+            Deuda.fecha_vencimiento < ahora,
+        )
+        if empresa_id is not None:
+            consulta = consulta.where(Deuda.empresa_id == empresa_id)
+        lote = db.session.execute(consulta.limit(tamano_lote)).all()
+        if not lote:
+            break
+
+        resultado = db.session.execute(
+            update(Deuda)
+            .where(Deuda.id.in_([deuda_id for deuda_id, _ in lote]), Deuda.estado == 'pendiente')
+            .values(estado='vencida', updated_at=ahora)
+            .execution_options(synchronize_session=False)
+        )
+        for eid in {eid for _, eid in lote}:
+            cache.marcar(db.session, eid, 'deudas')
+        db.session.commit()
+        marcadas += resultado.rowcount
+
+    return marcadas
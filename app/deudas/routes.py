@@ -1,30 +1,55 @@
 """Routes de Deudas - CRUD completo"""
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from app import db
-from app.models import Deuda, Usuario
+from flask_jwt_extended import jwt_required, current_user
+from app import cache, db, serializacion
+from app.models import Deuda
+from app.balance import ledger
+from app.deudas import cobranza
+from app.filtros import filtrar_rango_fechas, parsear_fecha
+from app.exportacion import parametros_exportacion, respuesta_exportacion
+from sqlalchemy import func, select
 from datetime import datetime
+import click
 
 deudas_bp = Blueprint('deudas', __name__)
 
 @deudas_bp.route('/', methods=['GET'])
 @jwt_required()
+@cache.cachear('deudas')
 def listar_deudas():
-    """Listar todas las deudas de la empresa"""
+    """Listar todas las deudas de la empresa (?fields=, ?formato=compacto)"""
     try:
-        usuario_id = get_jwt_identity()
-        usuario = Usuario.query.get(usuario_id)
-        deudas = Deuda.query.filter_by(empresa_id=usuario.empresa_id).all()
+        usuario = current_user
+        proyeccion = serializacion.DEUDA
+        try:
+            campos = serializacion.leer_campos(request.args, proyeccion.campos)
+        except ValueError as e:
+            return {'error': str(e)}, 400
         
-        # Calcular totales
-        total_pendiente = sum(d.monto_pendiente for d in deudas if d.estado == 'pendiente')
-        total_pagadas = sum(d.monto_total for d in deudas if d.estado == 'pagada')
+        deudas = proyeccion.dicts(
+            proyeccion.select(campos).where(Deuda.empresa_id == usuario.empresa_id), campos
+        )
+        
+        # Totales agrupados en SQL (vencidas cuentan como pendientes)
+        totales = dict.fromkeys(('pendiente', 'pagada'), 0.0)
+        for pendiente, monto_pendiente, monto_total in db.session.query(
+            Deuda.estado.in_(ledger.ESTADOS_PENDIENTES),
+            func.coalesce(func.sum(Deuda.monto_pendiente), 0),
+            func.coalesce(func.sum(Deuda.monto_total), 0),
+        ).filter(
+            Deuda.empresa_id == usuario.empresa_id,
+            Deuda.estado.in_(ledger.ESTADOS_PENDIENTES + ('pagada',))
+        ).group_by(Deuda.estado.in_(ledger.ESTADOS_PENDIENTES)):
+            if pendiente:
+                totales['pendiente'] = float(monto_pendiente)
+            else:
+                totales['pagada'] = float(monto_total)
         
         return {
-            'deudas': [d.to_dict() for d in deudas],
+            'deudas': serializacion.empaquetar(deudas, campos, request.args, proyeccion.campos),
             'total': len(deudas),
-            'total_pendiente': total_pendiente,
-            'total_pagadas': total_pagadas
+            'total_pendiente': totales['pendiente'],
+            'total_pagadas': totales['pagada']
         }, 200
     except Exception as e:
         return {'error': str(e)}, 500
@@ -34,8 +59,7 @@ def listar_deudas():
 def crear_deuda():
     """Crear nueva deuda manualmente"""
     try:
-        usuario_id = get_jwt_identity()
-        usuario = Usuario.query.get(usuario_id)
+        usuario = current_user
         data = request.get_json()
         
         # Validaciones
@@ -48,6 +72,13 @@ def crear_deuda():
         if monto_total <= 0:
             return {'error': 'El monto debe ser mayor a 0'}, 400
         
+        fecha_vencimiento = None
+        if data.get('fecha_vencimiento'):
+            try:
+                fecha_vencimiento = parsear_fecha(data['fecha_vencimiento'], 'fecha_vencimiento')
+            except ValueError as e:
+                return {'error': str(e)}, 400
+        
         deuda = Deuda(
             empresa_id=usuario.empresa_id,
             cliente_nombre=cliente_nombre,
@@ -56,10 +87,12 @@ def crear_deuda():
             monto_pagado=data.get('monto_pagado', 0),
             monto_pendiente=monto_total - data.get('monto_pagado', 0),
             estado=data.get('estado', 'pendiente'),
+            fecha_vencimiento=fecha_vencimiento,
             descripcion=data.get('descripcion'),
         )
         
         db.session.add(deuda)
+        ledger.registrar_cambio_deuda(usuario.empresa_id, (0.0, 0), ledger.aporte_deuda(deuda))
         db.session.commit()
         
         return {
@@ -71,13 +104,48 @@ def crear_deuda():
         db.session.rollback()
         return {'error': str(e)}, 500
 
+@deudas_bp.route('/antiguedad', methods=['GET'])
+@jwt_required()
+@cache.cachear('deudas')
+def antiguedad_deudas():
+    """Saldo pendiente por tramo de días vencidos (al día, 1-30, 31-60, 61-90, 90+)"""
+    try:
+        usuario = current_user
+        return cobranza.antiguedad(usuario.empresa_id), 200
+    except Exception as e:
+        return {'error': str(e)}, 500
+
+@deudas_bp.route('/exportar', methods=['GET'])
+@jwt_required()
+def exportar_deudas():
+    """Exportar deudas en streaming (formato, gzip, estado, desde, hasta sobre created_at)"""
+    try:
+        usuario = current_user
+        formato, comprimir = parametros_exportacion(request.args)
+        
+        columnas = ['id', 'created_at', 'venta_id', 'cliente_nombre', 'cliente_email', 'monto_total',
+                    'monto_pagado', 'monto_pendiente', 'estado', 'fecha_vencimiento', 'descripcion']
+        consulta = select(
+            Deuda.id, Deuda.created_at, Deuda.venta_id, Deuda.cliente_nombre, Deuda.cliente_email,
+            Deuda.monto_total, Deuda.monto_pagado, Deuda.monto_pendiente, Deuda.estado,
+            Deuda.fecha_vencimiento, Deuda.descripcion
+        ).filter(Deuda.empresa_id == usuario.empresa_id).order_by(Deuda.created_at, Deuda.id)
+        consulta = filtrar_rango_fechas(consulta, Deuda.created_at, request.args)
+        if request.args.get('estado'):
+            consulta = consulta.filter(Deuda.estado == request.args['estado'])
+        
+        return respuesta_exportacion(consulta, columnas, 'deudas', formato, comprimir)
+    except ValueError as e:
+        return {'error': str(e)}, 400
+    except Exception as e:
+        return {'error': str(e)}, 500
+
 @deudas_bp.route('/<int:deuda_id>', methods=['GET'])
 @jwt_required()
 def obtener_deuda(deuda_id):
     """Obtener detalles de una deuda"""
     try:
-        usuario_id = get_jwt_identity()
-        usuario = Usuario.query.get(usuario_id)
+        usuario = current_user
         
         deuda = Deuda.query.filter_by(
             id=deuda_id,
@@ -96,8 +164,7 @@ def obtener_deuda(deuda_id):
 def actualizar_deuda(deuda_id):
     """Actualizar una deuda (registrar pagos, cambiar estado)"""
     try:
-        usuario_id = get_jwt_identity()
-        usuario = Usuario.query.get(usuario_id)
+        usuario = current_user
         data = request.get_json()
         
         deuda = Deuda.query.filter_by(
@@ -108,6 +175,8 @@ def actualizar_deuda(deuda_id):
         if not deuda:
             return {'error': 'Deuda no encontrada'}, 404
         
+        aporte_anterior = ledger.aporte_deuda(deuda)
+        
         # Actualizar campos permitidos
         if 'cliente_nombre' in data:
             deuda.cliente_nombre = data['cliente_nombre']
@@ -142,6 +211,14 @@ def actualizar_deuda(deuda_id):
         if 'descripcion' in data:
             deuda.descripcion = data['descripcion']
         
+        if 'fecha_vencimiento' in data:
+            try:
+                deuda.fecha_vencimiento = parsear_fecha(data['fecha_vencimiento'], 'fecha_vencimiento') \
+                    if data['fecha_vencimiento'] else None
+            except ValueError as e:
+                return {'error': str(e)}, 400
+        
+        ledger.registrar_cambio_deuda(usuario.empresa_id, aporte_anterior, ledger.aporte_deuda(deuda))
         db.session.commit()
         
         return {
@@ -158,8 +235,7 @@ def actualizar_deuda(deuda_id):
 def eliminar_deuda(deuda_id):
     """Eliminar una deuda"""
     try:
-        usuario_id = get_jwt_identity()
-        usuario = Usuario.query.get(usuario_id)
+        usuario = current_user
         
         deuda = Deuda.query.filter_by(
             id=deuda_id,
@@ -169,7 +245,9 @@ def eliminar_deuda(deuda_id):
         if not deuda:
             return {'error': 'Deuda no encontrada'}, 404
         
+        aporte = ledger.aporte_deuda(deuda)
         db.session.delete(deuda)
+        ledger.registrar_cambio_deuda(usuario.empresa_id, aporte, (0.0, 0))
         db.session.commit()
         
         return {'message': 'Deuda eliminada exitosamente'}, 200
@@ -177,3 +255,12 @@ def eliminar_deuda(deuda_id):
     except Exception as e:
         db.session.rollback()
         return {'error': str(e)}, 500
+
+
+@deudas_bp.cli.command('marcar-vencidas')
+@click.option('--empresa-id', type=int, default=None, help='Solo esta empresa')
+@click.option('--lote', type=int, default=cobranza.TAMANO_LOTE, help='Deudas por UPDATE')
+def marcar_vencidas_cli(empresa_id, lote):
+    """Pasar a 'vencida' las deudas pendientes con fecha de vencimiento pasada"""
+    marcadas = cobranza.marcar_vencidas(empresa_id=empresa_id, tamano_lote=lote)
+    click.echo(f"✅ {marcadas} deudas marcadas como vencidas")
@@ -0,0 +1,118 @@
+"""Verificación de índices: corre las consultas de los endpoints bajo EXPLAIN
+
+`flask indices verificar` imprime, para cada consulta representativa de
+los listados y agregados, las tablas que se leen con un recorrido
+completo (Seq Scan / SCAN) en vez de usar un índice.
+
+En PostgreSQL se desactiva enable_seqscan dentro de la transacción: con
+tablas pequeñas el planner prefiere recorrer la tabla aunque exista el
+índice, y lo que interesa saber es si hay un índice utilizable.
+"""
+from app import db
+from app.inventario import busqueda, reposicion
+from app.models import BalanceEmpresa, Deuda, Gasto, Inventario, NovedadStock, TokenRevocado, Venta, VentaItem, VentaResumen
+from datetime import datetime, timedelta
+from sqlalchemy import func, select, text
+import click
+import re
+
+# Consultas por endpoint; cada una recibe el empresa_id de referencia
+CONSULTAS = {
+    'GET /api/inventario/': lambda eid: select(Inventario).where(Inventario.empresa_id == eid),
+    'GET /api/inventario/buscar': lambda eid: busqueda.consulta(eid, 'prod').limit(21),
+    'GET /api/inventario/sku/<sku>': lambda eid: select(Inventario.id).where(
+        Inventario.sku == 'SKU-1', Inventario.empresa_id == eid),
+    'GET /api/inventario/reposicion': lambda eid: reposicion.consulta_bajo_minimo(eid),
+    'GET /api/inventario/reposicion/novedades': lambda eid: reposicion.consulta_novedades(eid),
+    'flask inventario limpiar-novedades': lambda eid: select(NovedadStock.id).where(
+        NovedadStock.created_at < datetime.utcnow() - timedelta(days=90)),
+    'GET /api/ventas/ (página)': lambda eid: select(Venta).where(Venta.empresa_id == eid)
+        .order_by(Venta.created_at.desc(), Venta.id.desc()).limit(50),
+    'GET /api/ventas/ (items de la página)': lambda eid: select(VentaItem)
+        .where(VentaItem.venta_id.in_([1, 2, 3])),
+    'GET /api/ventas/resumen': lambda eid: select(VentaResumen).where(
+        VentaResumen.empresa_id == eid, VentaResumen.periodo == 'mes', VentaResumen.dimension == 'total',
+        VentaResumen.inicio >= datetime.utcnow().date() - timedelta(days=3 * 365)),
+    'GET /api/ventas/exportar': lambda eid: select(Venta.id, Venta.total).where(
+        Venta.empresa_id == eid, Venta.created_at >= datetime.utcnow() - timedelta(days=365)),
+    'DELETE /api/ventas/<id> (deuda asociada)': lambda eid: select(Deuda).where(Deuda.venta_id == 1),
+    'GET /api/gastos/': lambda eid: select(Gasto).where(Gasto.empresa_id == eid),
+    'GET /api/gastos/?categoria=': lambda eid: select(Gasto).where(
+        Gasto.empresa_id == eid, Gasto.categoria == 'servicios',
+        Gasto.fecha_gasto >= datetime.utcnow() - timedelta(days=30)),
+    'GET /api/gastos/totales': lambda eid: select(Gasto.categoria, func.sum(Gasto.monto)).where(
+        Gasto.empresa_id == eid, Gasto.fecha_gasto >= datetime.utcnow() - timedelta(days=365))
+        .group_by(Gasto.categoria),
+    'GET /api/gastos/exportar': lambda eid: select(Gasto.id, Gasto.monto).where(
+        Gasto.empresa_id == eid, Gasto.fecha_gasto >= datetime.utcnow() - timedelta(days=30)),
+    'GET /api/deudas/': lambda eid: select(Deuda).where(Deuda.empresa_id == eid),
+    'Deudas pendientes (balance)': lambda eid: select(Deuda.monto_pendiente).where(
+        Deuda.empresa_id == eid, Deuda.estado.in_(['pendiente', 'vencida'])),
+    'GET /api/deudas/antiguedad': lambda eid: select(Deuda.monto_pendiente).where(
+        Deuda.empresa_id == eid, Deuda.estado.in_(['pendiente', 'vencida']), Deuda.monto_pendiente > 0),
+    'flask deudas marcar-vencidas': lambda eid: select(Deuda.id).where(
+        Deuda.estado == 'pendiente', Deuda.fecha_vencimiento < datetime.utcnow()).limit(1000),
+    'GET /api/balance/': lambda eid: select(BalanceEmpresa).where(BalanceEmpresa.empresa_id == eid),
+    'Sincronización de tokens revocados': lambda eid: select(TokenRevocado.jti).where(
+        TokenRevocado.expira > datetime.utcnow(), TokenRevocado.created_at >= datetime.utcnow() - timedelta(seconds=65)),
+    'flask auth limpiar-revocados': lambda eid: select(TokenRevocado.id).where(TokenRevocado.expira <= datetime.utcnow()),
+}
+
+
+def _recorridos_postgresql(plan, encontrados):
+    if plan.get('Node Type') == 'Seq Scan':
+        encontrados.append(plan.get('Relation Name'))
+    for hijo in plan.get('Plans', []):
+        _recorridos_postgresql(hijo, encontrados)
+    return encontrados
+
+
+def recorridos_completos(consulta):
+    """Devolver las tablas que la consulta lee completas según EXPLAIN"""
+    conexion = db.session.connection()
+    compilada = consulta.compile(dialect=conexion.dialect, compile_kwargs={'render_postcompile': True})
+    sql = str(compilada)
+
+    if conexion.dialect.name == 'postgresql':
+        conexion.execute(text('SET LOCAL enable_seqscan = off'))
+        plan = conexion.exec_driver_sql(f'EXPLAIN (FORMAT JSON) {sql}', compilada.params).scalar()
+        return _recorridos_postgresql(plan[0]['Plan'], [])
+
+    if conexion.dialect.name == 'sqlite':
+        # SQLite: "SCAN tabla" es recorrido completo, "SEARCH tabla USING ..." usa índice;
+        # en una tabla virtual (FTS5) "VIRTUAL TABLE INDEX 0:M..." usa sus restricciones
+        parametros = tuple(compilada.params[nombre] for nombre in compilada.positiontup)
+        filas = conexion.exec_driver_sql(f'EXPLAIN QUERY PLAN {sql}', parametros)
+        return [
+            detalle.split()[1] for *_, detalle in filas
+            if detalle.startswith('SCAN ') and 'USING' not in detalle
+            and not re.search(r'VIRTUAL TABLE INDEX \d+:\S', detalle)
+        ]
+
+    raise click.ClickException(f'Motor no soportado: {conexion.dialect.name}')
+
+
+@click.group('indices')
+def indices_cli():
+    """Diagnóstico de índices"""
+
+
+@indices_cli.command('verificar')
+@click.option('--empresa-id', type=int, default=1, help='Empresa de referencia para los filtros')
+def verificar_indices(empresa_id):
+    """Reportar consultas de endpoints que aún hacen recorridos completos"""
+    con_recorrido = 0
+    for nombre, construir in CONSULTAS.items():
+        try:
+            tablas = recorridos_completos(construir(empresa_id))
+        finally:
+            db.session.rollback()
+        if tablas:
+            con_recorrido += 1
+            click.echo(f"❌ {nombre}: recorrido completo de {', '.join(tablas)}")
+        else:
+            click.echo(f"✅ {nombre}")
+
+    if con_recorrido:
+        click.echo(f"\n⚠️  {con_recorrido} consultas sin índice utilizable")
+        raise SystemExit(1)
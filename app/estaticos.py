@@ -0,0 +1,147 @@
+"""Estáticos con huella de contenido servidos por WhiteNoise
+
+`flask estaticos construir` (se ejecuta al construir la imagen) copia
+static/ a ESTATICOS_DIR agregando a cada archivo un hash de su
+contenido (css/dalu-style.css -> css/dalu-style.3f2a9c1b0d4e.css),
+genera las versiones .gz y .br de los archivos de texto y escribe
+manifest.json con la correspondencia.
+
+Con ESTATICOS_CONSTRUIDOS activo (por defecto en producción) y el
+manifiesto presente, url_for('static', filename=...) devuelve el nombre
+con huella y WhiteNoise sirve esos archivos con
+`Cache-Control: max-age=315360000, public, immutable` y la variante
+precomprimida que acepte el navegador. Un cambio en un archivo cambia
+su nombre, así que el navegador nunca usa una copia vieja.
+
+En desarrollo Flask sigue sirviendo static/ directamente.
+"""
+from pathlib import Path
+import click
+import gzip
+import hashlib
+import json
+import re
+import shutil
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    from whitenoise import WhiteNoise
+except ImportError:
+    WhiteNoise = None
+
+MANIFIESTO = 'manifest.json'
+LARGO_HUELLA = 12
+EXTENSIONES_COMPRIMIBLES = {'.css', '.js', '.svg', '.ico', '.html', '.json', '.txt', '.map'}
+
+_HUELLA = re.compile(r'\.[0-9a-f]{%d}\.[^./]+$' % LARGO_HUELLA)
+
+
+def con_huella(ruta, contenido):
+    """Ruta relativa con el hash del contenido antes de la extensión"""
+    huella = hashlib.sha256(contenido).hexdigest()[:LARGO_HUELLA]
+    return ruta.with_name(f'{ruta.stem}.{huella}{ruta.suffix}')
+
+
+def es_inmutable(ruta, url):
+    """Para WhiteNoise: los archivos con huella nunca cambian"""
+    return bool(_HUELLA.search(url))
+
+
+def _precomprimir(ruta, contenido):
+    """Escribir .gz (y .br si hay brotli) solo si ahorran al menos un 5 %"""
+    if ruta.suffix not in EXTENSIONES_COMPRIMIBLES:
+        return
+    limite = len(contenido) * 0.95
+    comprimido = gzip.compress(contenido, compresslevel=9, mtime=0)
+    if len(comprimido) < limite:
+        ruta.with_name(ruta.name + '.gz').write_bytes(comprimido)
+    if brotli is not None:
+        comprimido = brotli.compress(contenido, quality=11)
+        if len(comprimido) < limite:
+            ruta.with_name(ruta.name + '.br').write_bytes(comprimido)
+
+
+def construir(origen, destino):
+    """Copiar `origen` a `destino` con huellas y precompresión; devuelve el manifiesto"""
+    origen, destino = Path(origen), Path(destino)
+    if destino.exists():
+        shutil.rmtree(destino)
+
+    manifiesto = {}
+    for archivo in sorted(origen.rglob('*')):
+        if not archivo.is_file():
+            continue
+        relativa = archivo.relative_to(origen)
+        contenido = archivo.read_bytes()
+        versionada = con_huella(relativa, contenido)
+
+        # También se copia el original para rutas escritas a mano
+        for nombre in (relativa, versionada):
+            salida = destino / nombre
+            salida.parent.mkdir(parents=True, exist_ok=True)
+            salida.write_bytes(contenido)
+            _precomprimir(salida, contenido)
+        manifiesto[relativa.as_posix()] = versionada.as_posix()
+
+    (destino / MANIFIESTO).write_text(json.dumps(manifiesto, indent=2, sort_keys=True))
+    return manifiesto
+
+
+def leer_manifiesto(destino):
+    ruta = Path(destino) / MANIFIESTO
+    if not ruta.exists():
+        return None
+    return json.loads(ruta.read_text())
+
+
+@click.group('estaticos')
+def estaticos_cli():
+    """Estáticos con huella de contenido"""
+
+
+@estaticos_cli.command('construir')
+def construir_cmd():
+    """Generar ESTATICOS_DIR con nombres versionados y archivos .gz/.br"""
+    from flask import current_app
+
+    destino = current_app.config['ESTATICOS_DIR']
+    manifiesto = construir(current_app.static_folder, destino)
+    click.echo(f"✅ {len(manifiesto)} archivos en {destino}")
+    if brotli is None:
+        click.echo("⚠️  brotli no instalado: solo se generaron versiones .gz")
+
+
+def init_app(app):
+    """Servir los estáticos construidos con WhiteNoise y nombres con huella"""
+    app.cli.add_command(estaticos_cli)
+
+    if not app.config.get('ESTATICOS_CONSTRUIDOS'):
+        return
+    destino = app.config['ESTATICOS_DIR']
+    manifiesto = leer_manifiesto(destino)
+    if manifiesto is None:
+        print(f"⚠️  Sin {MANIFIESTO} en {destino}: ejecutar `flask estaticos construir`")
+        return
+
+    @app.url_defaults
+    def _nombre_con_huella(endpoint, valores):
+        if endpoint == 'static' and 'filename' in valores:
+            valores['filename'] = manifiesto.get(valores['filename'], valores['filename'])
+
+    # Sin WhiteNoise los sirve Flask desde la carpeta construida (sin cabeceras immutable)
+    app.static_folder = destino
+    if WhiteNoise is None:
+        print("⚠️  whitenoise no instalado: los estáticos los sirve Flask")
+        return
+
+    app.wsgi_app = WhiteNoise(
+        app.wsgi_app,
+        root=destino,
+        prefix=app.static_url_path,
+        max_age=app.config.get('ESTATICOS_MAX_AGE', 60),
+        immutable_file_test=es_inmutable,
+    )
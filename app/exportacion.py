@@ -0,0 +1,109 @@
+"""Exportaciones en streaming (CSV / NDJSON, opcionalmente gzip)
+
+Las filas se leen con un cursor del lado del servidor (stream_results +
+yield_per) y se escriben a la respuesta HTTP por bloques, sin crear
+objetos ORM ni listas completas en memoria. La memoria es constante
+sin importar cuántas filas tenga la exportación y el primer byte
+(el encabezado) sale antes de la primera consulta.
+"""
+from flask import Response, stream_with_context
+from app import db
+from datetime import date, datetime
+import csv
+import io
+import json
+import zlib
+
+FILAS_POR_BLOQUE = 1000
+
+
+class _Linea:
+    """Buffer mínimo para que csv.writer escriba una fila a la vez"""
+
+    def __init__(self):
+        self.valor = ''
+
+    def write(self, texto):
+        self.valor = texto
+
+
+def _valor_json(valor):
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    return valor
+
+
+def _filas_texto(consulta, columnas, formato):
+    """Generar bloques de texto con las filas ya serializadas"""
+    if formato == 'csv':
+        linea = _Linea()
+        escritor = csv.writer(linea)
+        escritor.writerow(columnas)
+        yield linea.valor
+
+    resultado = db.session.execute(
+        consulta.execution_options(stream_results=True, yield_per=FILAS_POR_BLOQUE)
+    )
+
+    for particion in resultado.partitions():
+        bloque = io.StringIO()
+        if formato == 'csv':
+            escritor = csv.writer(bloque)
+            for fila in particion:
+                escritor.writerow(
+                    [valor.isoformat() if isinstance(valor, (datetime, date)) else valor for valor in fila]
+                )
+        else:
+            for fila in particion:
+                bloque.write(json.dumps(
+                    {columna: _valor_json(valor) for columna, valor in zip(columnas, fila)}
+                ))
+                bloque.write('\n')
+        yield bloque.getvalue()
+
+
+def _comprimir(bloques):
+    compresor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 -> formato gzip
+    for bloque in bloques:
+        datos = compresor.compress(bloque.encode('utf-8'))
+        if datos:
+            yield datos
+    yield compresor.flush()
+
+
+def respuesta_exportacion(consulta, columnas, nombre, formato='csv', comprimir=False):
+    """Crear una respuesta HTTP que transmite la consulta como archivo
+
+    consulta es un select() de columnas (no de entidades ORM) en el mismo
+    orden que `columnas`, que se usan como encabezado / claves JSON.
+    """
+    if formato not in ('csv', 'ndjson'):
+        raise ValueError('Formato inválido. Usa: csv o ndjson')
+
+    bloques = _filas_texto(consulta, columnas, formato)
+    mimetype = 'text/csv' if formato == 'csv' else 'application/x-ndjson'
+    archivo = f'{nombre}.{formato}'
+
+    if comprimir:
+        cuerpo = _comprimir(bloques)
+        mimetype = 'application/gzip'
+        archivo += '.gz'
+    else:
+        cuerpo = (bloque.encode('utf-8') for bloque in bloques)
+
+    return Response(
+        stream_with_context(cuerpo),
+        mimetype=mimetype,
+        headers={
+            'Content-Disposition': f'attachment; filename="{archivo}"',
+            'Cache-Control': 'no-store',
+            'X-Accel-Buffering': 'no',
+        }
+    )
+
+
+def parametros_exportacion(args):
+    """Leer ?formato= y ?gzip= de la URL"""
+    formato = args.get('formato', 'csv')
+    comprimir = args.get('gzip') in ('1', 'true')
+    return formato, comprimir
@@ -0,0 +1,26 @@
+"""Filtros comunes para los parámetros de URL de los listados"""
+from datetime import datetime, timedelta
+
+
+def parsear_fecha(valor, campo):
+    """Parsear una fecha ISO de los parámetros de la URL; lanza ValueError"""
+    try:
+        return datetime.fromisoformat(valor)
+    except ValueError:
+        raise ValueError(f'Fecha inválida en "{campo}". Usa formato ISO (AAAA-MM-DD)')
+
+
+def filtrar_rango_fechas(query, columna, args):
+    """Aplicar ?desde= y ?hasta= sobre una columna de fecha
+
+    Una fecha "hasta" sin hora incluye todo ese día.
+    """
+    if args.get('desde'):
+        query = query.filter(columna >= parsear_fecha(args['desde'], 'desde'))
+    if args.get('hasta'):
+        hasta = parsear_fecha(args['hasta'], 'hasta')
+        if len(args['hasta']) == 10:
+            query = query.filter(columna < hasta + timedelta(days=1))
+        else:
+            query = query.filter(columna <= hasta)
+    return query
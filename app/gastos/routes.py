@@ -1,22 +1,40 @@
 """Routes de Gastos"""
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from app import db
-from app.models import Gasto, Usuario
+from flask_jwt_extended import jwt_required, current_user
+from app import cache, db, serializacion
+from app.models import Gasto
+from app.balance import ledger
+from app.filtros import filtrar_rango_fechas, parsear_fecha
+from app.exportacion import parametros_exportacion, respuesta_exportacion
+from sqlalchemy import func, select
 from datetime import datetime
 
 gastos_bp = Blueprint('gastos', __name__)
 
 @gastos_bp.route('/', methods=['GET'])
 @jwt_required()
+@cache.cachear('gastos')
 def listar_gastos():
-    """Listar gastos de la empresa"""
+    """Listar gastos de la empresa
+    
+    Filtros: ?desde=, ?hasta= sobre fecha_gasto, ?categoria=. Además
+    ?fields= y ?formato=compacto.
+    """
     try:
-        usuario_id = get_jwt_identity()
-        usuario = Usuario.query.get(usuario_id)
-        gastos = Gasto.query.filter_by(empresa_id=usuario.empresa_id).all()
+        usuario = current_user
+        proyeccion = serializacion.GASTO
+        try:
+            campos = serializacion.leer_campos(request.args, proyeccion.campos)
+            consulta = proyeccion.select(campos).where(Gasto.empresa_id == usuario.empresa_id)
+            if request.args.get('categoria'):
+                consulta = consulta.filter(Gasto.categoria == request.args['categoria'])
+            consulta = filtrar_rango_fechas(consulta, Gasto.fecha_gasto, request.args)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        
+        gastos = proyeccion.dicts(consulta.order_by(Gasto.fecha_gasto.desc(), Gasto.id.desc()), campos)
         return {
-            'gastos': [g.to_dict() for g in gastos],
+            'gastos': serializacion.empaquetar(gastos, campos, request.args, proyeccion.campos),
             'total': len(gastos)
         }, 200
     except Exception as e:
@@ -27,8 +45,8 @@ def listar_gastos():
 def crear_gasto():
     """Crear nuevo gasto"""
     try:
-        usuario_id = get_jwt_identity()
-        usuario = Usuario.query.get(usuario_id)
+        usuario = current_user
+        usuario_id = usuario.id
         data = request.get_json()
 
         # Validaciones básicas
@@ -40,6 +58,13 @@ def crear_gasto():
         if monto is None:
             return {'error': 'El monto es requerido'}, 400
 
+        fecha_gasto = None
+        if data.get('fecha_gasto'):
+            try:
+                fecha_gasto = parsear_fecha(data['fecha_gasto'], 'fecha_gasto')
+            except ValueError as e:
+                return {'error': str(e)}, 400
+
         gasto = Gasto(
             empresa_id=usuario.empresa_id,
             usuario_id=usuario_id,
@@ -47,9 +72,11 @@ def crear_gasto():
             categoria=data.get('categoria'),
             monto=monto,
             comprobante=data.get('comprobante'),
+            fecha_gasto=fecha_gasto or datetime.utcnow(),
         )
 
         db.session.add(gasto)
+        ledger.registrar(usuario.empresa_id, total_egresos=float(monto), cantidad_gastos=1)
         db.session.commit()
 
         return {
@@ -61,13 +88,76 @@ def crear_gasto():
         db.session.rollback()
         return {'error': str(e)}, 500
 
+def _mes(columna):
+    """Expresión SQL con el mes (AAAA-MM) de una columna de fecha"""
+    if db.session.get_bind().dialect.name == 'sqlite':
+        return func.strftime('%Y-%m', columna)
+    return func.to_char(func.date_trunc('month', columna), 'YYYY-MM')
+
+@gastos_bp.route('/totales', methods=['GET'])
+@jwt_required()
+@cache.cachear('gastos')
+def totales_gastos():
+    """Totales por categoría y mes agrupados en SQL (?desde=, ?hasta=, ?categoria=)"""
+    try:
+        usuario = current_user
+        mes = _mes(Gasto.fecha_gasto).label('mes')
+        consulta = db.session.query(
+            mes, Gasto.categoria, func.sum(Gasto.monto), func.count(Gasto.id)
+        ).filter(Gasto.empresa_id == usuario.empresa_id)
+        if request.args.get('categoria'):
+            consulta = consulta.filter(Gasto.categoria == request.args['categoria'])
+        try:
+            consulta = filtrar_rango_fechas(consulta, Gasto.fecha_gasto, request.args)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        
+        filas = consulta.group_by(mes, Gasto.categoria).order_by(mes, Gasto.categoria).all()
+        
+        totales = [
+            {'mes': m, 'categoria': categoria, 'monto': float(monto or 0), 'cantidad': cantidad}
+            for m, categoria, monto, cantidad in filas
+        ]
+        por_categoria = {}
+        for fila in totales:
+            clave = fila['categoria'] or 'sin categoría'
+            por_categoria[clave] = por_categoria.get(clave, 0.0) + fila['monto']
+        
+        return {
+            'totales': totales,
+            'por_categoria': por_categoria,
+            'monto_total': sum(fila['monto'] for fila in totales),
+        }, 200
+    except Exception as e:
+        return {'error': str(e)}, 500
+
+@gastos_bp.route('/exportar', methods=['GET'])
+@jwt_required()
+def exportar_gastos():
+    """Exportar gastos en streaming (formato, gzip, desde, hasta sobre fecha_gasto)"""
+    try:
+        usuario = current_user
+        formato, comprimir = parametros_exportacion(request.args)
+        
+        columnas = ['id', 'fecha_gasto', 'descripcion', 'categoria', 'monto', 'comprobante', 'created_at']
+        consulta = select(
+            Gasto.id, Gasto.fecha_gasto, Gasto.descripcion, Gasto.categoria,
+            Gasto.monto, Gasto.comprobante, Gasto.created_at
+        ).filter(Gasto.empresa_id == usuario.empresa_id).order_by(Gasto.fecha_gasto, Gasto.id)
+        consulta = filtrar_rango_fechas(consulta, Gasto.fecha_gasto, request.args)
+        
+        return respuesta_exportacion(consulta, columnas, 'gastos', formato, comprimir)
+    except ValueError as e:
+        return {'error': str(e)}, 400
+    except Exception as e:
+        return {'error': str(e)}, 500
+
 @gastos_bp.route('/<int:gasto_id>', methods=['GET'])
 @jwt_required()
 def obtener_gasto(gasto_id):
     """Obtener un gasto específico"""
     try:
-        usuario_id = get_jwt_identity()
-        usuario = Usuario.query.get(usuario_id)
+        usuario = current_user
         
         gasto = Gasto.query.filter_by(
             id=gasto_id,
@@ -86,8 +176,7 @@ def obtener_gasto(gasto_id):
 def actualizar_gasto(gasto_id):
     """Actualizar un gasto"""
     try:
-        usuario_id = get_jwt_identity()
-        usuario = Usuario.query.get(usuario_id)
+        usuario = current_user
         data = request.get_json()
         
         gasto = Gasto.query.filter_by(
@@ -98,6 +187,8 @@ def actualizar_gasto(gasto_id):
         if not gasto:
             return {'error': 'Gasto no encontrado'}, 404
         
+        monto_anterior = float(gasto.monto or 0)
+        
         if 'descripcion' in data:
             gasto.descripcion = data['descripcion']
         if 'categoria' in data:
@@ -106,7 +197,13 @@ def actualizar_gasto(gasto_id):
             gasto.monto = data['monto']
         if 'comprobante' in data:
             gasto.comprobante = data['comprobante']
+        if data.get('fecha_gasto'):
+            try:
+                gasto.fecha_gasto = parsear_fecha(data['fecha_gasto'], 'fecha_gasto')
+            except ValueError as e:
+                return {'error': str(e)}, 400
         
+        ledger.registrar(usuario.empresa_id, total_egresos=float(gasto.monto or 0) - monto_anterior)
         db.session.commit()
         
         return {
@@ -122,8 +219,7 @@ def actualizar_gasto(gasto_id):
 def eliminar_gasto(gasto_id):
     """Eliminar un gasto"""
     try:
-        usuario_id = get_jwt_identity()
-        usuario = Usuario.query.get(usuario_id)
+        usuario = current_user
         
         gasto = Gasto.query.filter_by(
             id=gasto_id,
@@ -134,6 +230,7 @@ def eliminar_gasto(gasto_id):
             return {'error': 'Gasto no encontrado'}, 404
         
         db.session.delete(gasto)
+        ledger.registrar(usuario.empresa_id, total_egresos=-float(gasto.monto or 0), cantidad_gastos=-1)
         db.session.commit()
         
         return {'message': 'Gasto eliminado exitosamente'}, 200
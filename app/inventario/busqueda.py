@@ -0,0 +1,221 @@
+"""Búsqueda de productos y lectura por SKU para el punto de venta
+
+Búsqueda por nombre, SKU y categoría (GET /api/inventario/buscar):
+- PostgreSQL: índice GIN de trigramas (pg_trgm) sobre
+  lower(nombre || ' ' || sku || ' ' || categoria). Encuentra subcadenas
+  (LIKE '%texto%') y parecidos con errores de tipeo (operador %); ordena
+  por SKU exacto, nombre que empieza con el texto y similitud.
+- SQLite: tabla FTS5 inventario_fts con contenido externo, mantenida por
+  triggers (solo al cambiar nombre, sku o categoría: descontar stock no
+  la toca). Cada palabra buscada es un prefijo; ordena por SKU exacto y
+  bm25.
+- Otros motores: LIKE sin índice.
+
+SKU exacto (GET /api/inventario/sku/<sku>, lector de código de barras):
+caché en memoria del proceso separada por empresa (una empresa con
+muchos productos no desaloja los de las demás). Los cambios de un
+producto la invalidan al confirmar en el mismo worker; en los demás
+workers la entrada vive a lo sumo INVENTARIO_SKU_CACHE_TTL segundos. El
+precio y el stock definitivos los vuelve a leer la venta al crearse.
+"""
+from sqlalchemy import DDL, bindparam, column, event, func, literal_column, or_, table, text
+from sqlalchemy.orm import Session
+from app import db, serializacion
+from app.auth.identidad import CacheTTL
+from app.models import Inventario
+import re
+import threading
+
+CLAVE_SESION = 'productos_modificados'
+
+LIMITE_POR_DEFECTO = 20
+LIMITE_MAXIMO = 100
+
+# Campos que devuelve la lectura por SKU
+CAMPOS_SKU = ('id', 'nombre', 'sku', 'categoria', 'precio_venta', 'cantidad_disponible')
+
+# Debe coincidir con la expresión del índice ix_inventario_busqueda_trgm
+TEXTO_POSTGRESQL = "lower(nombre || ' ' || sku || ' ' || coalesce(categoria, ''))"
+
+# Pesos de bm25 por columna de inventario_fts (nombre, sku, categoria)
+ORDEN_FTS = 'bm25(inventario_fts, 5.0, 10.0, 1.0)'
+
+FTS = table('inventario_fts', column('rowid'))
+
+DDL_POSTGRESQL = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"CREATE INDEX IF NOT EXISTS ix_inventario_busqueda_trgm ON inventario USING gin ({TEXTO_POSTGRESQL} gin_trgm_ops)",
+)
+
+DDL_SQLITE = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS inventario_fts USING fts5("
+    "nombre, sku, categoria, content='inventario', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER IF NOT EXISTS inventario_fts_ai AFTER INSERT ON inventario BEGIN "
+    "INSERT INTO inventario_fts(rowid, nombre, sku, categoria) VALUES (new.id, new.nombre, new.sku, new.categoria); END",
+    "CREATE TRIGGER IF NOT EXISTS inventario_fts_ad AFTER DELETE ON inventario BEGIN "
+    "INSERT INTO inventario_fts(inventario_fts, rowid, nombre, sku, categoria) "
+    "VALUES ('delete', old.id, old.nombre, old.sku, old.categoria); END",
+    "CREATE TRIGGER IF NOT EXISTS inventario_fts_au AFTER UPDATE OF nombre, sku, categoria ON inventario BEGIN "
+    "INSERT INTO inventario_fts(inventario_fts, rowid, nombre, sku, categoria) "
+    "VALUES ('delete', old.id, old.nombre, old.sku, old.categoria); "
+    "INSERT INTO inventario_fts(rowid, nombre, sku, categoria) VALUES (new.id, new.nombre, new.sku, new.categoria); END",
+    "INSERT INTO inventario_fts(inventario_fts) VALUES ('rebuild')",
+)
+
+# Con db.create_all() (desarrollo) el índice / la tabla FTS se crean junto con inventario
+for _sentencia in DDL_POSTGRESQL:
+    event.listen(Inventario.__table__, 'after_create', DDL(_sentencia).execute_if(dialect='postgresql'))
+for _sentencia in DDL_SQLITE:
+    event.listen(Inventario.__table__, 'after_create', DDL(_sentencia).execute_if(dialect='sqlite'))
+
+
+def normalizar(texto):
+    """Minúsculas y espacios simples, a lo sumo 100 caracteres"""
+    return ' '.join((texto or '').lower().split())[:100]
+
+
+def _escapar_like(texto):
+    return texto.replace('/', '//').replace('%', '/%').replace('_', '/_')
+
+
+def _terminos_fts(texto):
+    # Cada palabra entre comillas como prefijo: la sintaxis de FTS5 no se interpreta
+    return ' '.join(f'"{palabra}"*' for palabra in re.findall(r'\w+', texto))
+
+
+def consulta(empresa_id, texto, campos=None):
+    """SELECT de productos de la empresa que coinciden con `texto`, por relevancia"""
+    base = serializacion.PRODUCTO.select(campos).where(Inventario.empresa_id == empresa_id)
+    texto = normalizar(texto)
+    if not texto:
+        return base.order_by(Inventario.nombre, Inventario.id)
+
+    sku_exacto = func.lower(Inventario.sku) == texto
+    motor = db.session.get_bind().dialect.name
+
+    if motor == 'postgresql':
+        documento = literal_column(TEXTO_POSTGRESQL)
+        buscado = bindparam('texto', texto)
+        patron = bindparam('patron', '%' + _escapar_like(texto) + '%')
+        return base.where(
+            or_(documento.like(patron, escape='/'), documento.bool_op('%')(buscado))
+        ).order_by(
+            sku_exacto.desc(),
+            func.lower(Inventario.nombre).startswith(texto, autoescape=True).desc(),
+            func.similarity(documento, buscado).desc(),
+            Inventario.nombre,
+            Inventario.id,
+        )
+
+    terminos = _terminos_fts(texto)
+    if motor == 'sqlite' and terminos:
+        return base.join(FTS, FTS.c.rowid == Inventario.id).where(
+            text('inventario_fts MATCH :terminos').bindparams(terminos=terminos)
+        ).order_by(sku_exacto.desc(), text(ORDEN_FTS), Inventario.nombre, Inventario.id)
+
+    return base.where(or_(
+        func.lower(Inventario.nombre).contains(texto, autoescape=True),
+        func.lower(Inventario.sku).contains(texto, autoescape=True),
+        func.lower(Inventario.categoria).contains(texto, autoescape=True),
+    )).order_by(sku_exacto.desc(), Inventario.nombre, Inventario.id)
+
+
+def buscar(empresa_id, texto, limite=LIMITE_POR_DEFECTO, desplazamiento=0, campos=None):
+    """Página de resultados: (productos, hay_mas)"""
+    # Se pide una fila extra para saber si hay otra página
+    filas = serializacion.PRODUCTO.dicts(
+        consulta(empresa_id, texto, campos).limit(limite + 1).offset(desplazamiento), campos
+    )
+    return filas[:limite], len(filas) > limite
+
+
+class CacheSku:
+    """Productos por SKU exacto, una CacheTTL por empresa"""
+
+    def __init__(self, maximo=5000, ttl=30):
+        self.maximo = maximo
+        self.ttl = ttl
+        self._empresas = {}
+        self._skus = {}  # (empresa_id, inventario_id) -> sku, para invalidar por id
+        self._lock = threading.Lock()
+
+    def _cache(self, empresa_id):
+        cache = self._empresas.get(empresa_id)
+        if cache is None:
+            with self._lock:
+                cache = self._empresas.setdefault(empresa_id, CacheTTL(self.maximo, self.ttl))
+        return cache
+
+    def get(self, empresa_id, sku):
+        return self._cache(empresa_id).get(sku)
+
+    def set(self, empresa_id, sku, producto):
+        self._skus[(empresa_id, producto['id'])] = sku
+        self._cache(empresa_id).set(sku, producto)
+
+    def invalidar(self, empresa_id, inventario_id):
+        sku = self._skus.pop((empresa_id, inventario_id), None)
+        if sku is not None:
+            self._cache(empresa_id).invalidar(sku)
+
+    def limpiar(self):
+        with self._lock:
+            self._empresas.clear()
+            self._skus.clear()
+
+
+_cache_sku = CacheSku()
+
+
+def por_sku(empresa_id, sku):
+    """Producto con ese SKU exacto (dict con CAMPOS_SKU) o None"""
+    producto = _cache_sku.get(empresa_id, sku)
+    if producto is not None:
+        return producto
+    filas = serializacion.PRODUCTO.dicts(
+        serializacion.PRODUCTO.select(CAMPOS_SKU)
+        .where(Inventario.sku == sku, Inventario.empresa_id == empresa_id),
+        CAMPOS_SKU,
+    )
+    if not filas:
+        return None
+    _cache_sku.set(empresa_id, sku, filas[0])
+    return filas[0]
+
+
+def marcar(session, empresa_id, inventario_ids):
+    """Anotar en la sesión productos cuya entrada por SKU se invalida al confirmar
+
+    Para UPDATE/INSERT masivos, que no disparan los eventos de Inventario.
+    """
+    modificados = session.info.setdefault(CLAVE_SESION, set())
+    for inventario_id in inventario_ids:
+        modificados.add((empresa_id, inventario_id))
+
+
+def _marcar_producto(mapper, connection, producto):
+    session = Session.object_session(producto)
+    if session is not None:
+        marcar(session, producto.empresa_id, (producto.id,))
+
+
+def _despues_de_commit(session):
+    for empresa_id, inventario_id in session.info.pop(CLAVE_SESION, ()):
+        _cache_sku.invalidar(empresa_id, inventario_id)
+
+
+def _despues_de_rollback(session, previous_transaction):
+    session.info.pop(CLAVE_SESION, None)
+
+
+def init_app(app):
+    """Configurar la caché por SKU y escuchar cambios en Inventario"""
+    _cache_sku.maximo = app.config.get('INVENTARIO_SKU_CACHE_MAX', 5000)
+    _cache_sku.ttl = app.config.get('INVENTARIO_SKU_CACHE_TTL', 30)
+
+    if not event.contains(Inventario, 'after_update', _marcar_producto):
+        event.listen(Inventario, 'after_update', _marcar_producto)
+        event.listen(Inventario, 'after_delete', _marcar_producto)
+        event.listen(Session, 'after_commit', _despues_de_commit)
+        event.listen(Session, 'after_soft_rollback', _despues_de_rollback)
@@ -0,0 +1,277 @@
+"""Importación masiva de inventario desde CSV o NDJSON
+
+El archivo se lee como stream y se procesa en lotes de tamaño fijo, así
+la memoria no depende del tamaño del archivo. Por cada lote:
+- se validan las filas,
+- se buscan los SKUs existentes con una sola consulta IN,
+- los SKUs nuevos se insertan en bloque (COPY en PostgreSQL,
+  executemany en otros motores) y los existentes de la empresa se
+  actualizan en bloque por clave primaria,
+- se hace commit del lote; si la BD lo rechaza, solo ese lote se
+  descarta y sus filas quedan en el reporte de errores.
+"""
+from app import cache, db
+from app.inventario import busqueda
+from app.models import Inventario
+from datetime import datetime
+from sqlalchemy import insert, update
+import csv
+import io
+import json
+import math
+
+TAMANO_LOTE = 1000
+
+# Máximo de errores detallados en el reporte (el conteo sigue siendo exacto)
+MAX_ERRORES_REPORTADOS = 1000
+
+# Valores para las columnas opcionales que no vienen en una fila nueva
+DEFECTOS = {
+    'descripcion': None,
+    'categoria': None,
+    'costo_unitario': 0.0,
+    'precio_venta': 0.0,
+    'cantidad_disponible': 0,
+    'cantidad_minima': 5,
+}
+
+# Largo máximo de las columnas de texto (la descripción es Text)
+LARGOS = {'nombre': 255, 'sku': 100, 'categoria': 100}
+
+# Columnas Integer de la BD
+MAX_ENTERO = 2**31 - 1
+
+COLUMNAS_COPY = (
+    'empresa_id', 'nombre', 'descripcion', 'sku', 'categoria', 'costo_unitario',
+    'precio_venta', 'cantidad_disponible', 'cantidad_minima', 'created_at', 'updated_at',
+)
+
+
+def detectar_formato(nombre_archivo, content_type=None):
+    """Deducir 'csv' o 'ndjson' del nombre o del content type"""
+    nombre = (nombre_archivo or '').lower()
+    if nombre.endswith(('.ndjson', '.jsonl')) or 'ndjson' in (content_type or ''):
+        return 'ndjson'
+    return 'csv'
+
+
+def leer_filas(stream, formato):
+    """Generar (numero_fila, dict) desde un stream de texto"""
+    if formato == 'ndjson':
+        for numero, linea in enumerate(stream, start=1):
+            linea = linea.strip()
+            if not linea:
+                continue
+            try:
+                fila = json.loads(linea)
+            except ValueError:
+                yield numero, None
+                continue
+            yield numero, fila if isinstance(fila, dict) else None
+    else:
+        # La fila 1 es el encabezado
+        for numero, fila in enumerate(csv.DictReader(stream), start=2):
+            yield numero, fila
+
+
+def _vacio(valor):
+    return valor is None or (isinstance(valor, str) and not valor.strip())
+
+
+def _texto(fila, campo, largo, etiqueta):
+    """Texto de la fila recortado; el SKU puede venir como número en NDJSON"""
+    valor = fila.get(campo)
+    if _vacio(valor):
+        return None
+    if campo == 'sku' and isinstance(valor, int) and not isinstance(valor, bool):
+        valor = str(valor)
+    if not isinstance(valor, str):
+        raise ValueError(f'{etiqueta} debe ser texto')
+    valor = valor.strip()
+    if largo is not None and len(valor) > largo:
+        raise ValueError(f'{etiqueta} no puede superar {largo} caracteres')
+    return valor
+
+
+def _numero(valor, entero):
+    # bool es int en Python: en NDJSON true/false no son cantidades
+    if isinstance(valor, bool) or not isinstance(valor, (int, float, str)):
+        raise ValueError
+    numero = float(valor)
+    if not math.isfinite(numero):
+        raise ValueError
+    if not entero:
+        return numero
+    if not numero.is_integer() or abs(numero) > MAX_ENTERO:
+        raise ValueError
+    return int(numero)
+
+
+def validar_fila(fila):
+    """Convertir una fila cruda en valores de Inventario; lanza ValueError
+
+    Solo se incluyen las columnas opcionales que vienen en la fila, así
+    una actualización no pisa con defectos lo que el archivo no trae.
+    Tipos y largos se validan aquí para que una fila inválida no haga
+    fallar el lote entero en la BD.
+    """
+    if fila is None:
+        raise ValueError('Fila mal formada')
+
+    nombre = _texto(fila, 'nombre', LARGOS['nombre'], 'Nombre')
+    sku = _texto(fila, 'sku', LARGOS['sku'], 'SKU')
+    if not nombre or not sku:
+        raise ValueError('Nombre y SKU son requeridos')
+
+    valores = {'nombre': nombre, 'sku': sku}
+    for campo, etiqueta in (('descripcion', 'Descripción'), ('categoria', 'Categoría')):
+        valor = _texto(fila, campo, LARGOS.get(campo), etiqueta)
+        if valor is not None:
+            valores[campo] = valor
+
+    try:
+        for campo, entero in (('costo_unitario', False), ('precio_venta', False),
+                              ('cantidad_disponible', True), ('cantidad_minima', True)):
+            if not _vacio(fila.get(campo)):
+                valores[campo] = _numero(fila[campo], entero)
+    except (TypeError, ValueError):
+        raise ValueError('Costo y precio deben ser numéricos y las cantidades enteras')
+
+    if valores.get('costo_unitario', 0) < 0 or valores.get('precio_venta', 0) < 0:
+        raise ValueError('Costo y precio no pueden ser negativos')
+    if valores.get('cantidad_disponible', 0) < 0 or valores.get('cantidad_minima', 0) < 0:
+        raise ValueError('Las cantidades no pueden ser negativas')
+
+    return valores
+
+
+def _insertar_copy(filas):
+    """Insertar con COPY ... FROM STDIN (PostgreSQL)"""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    for fila in filas:
+        escritor.writerow([
+            '' if fila[columna] is None else fila[columna] for columna in COLUMNAS_COPY
+        ])
+    buffer.seek(0)
+
+    cursor = db.session.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY inventario ({', '.join(COLUMNAS_COPY)}) FROM STDIN WITH (FORMAT csv)",
+            buffer
+        )
+    finally:
+        cursor.close()
+
+
+def _insertar(filas):
+    if not filas:
+        return
+    if db.session.get_bind().dialect.name == 'postgresql':
+        _insertar_copy(filas)
+    else:
+        db.session.execute(insert(Inventario), filas)
+
+
+def _procesar_lote(lote, empresa_id, actualizar, vistos):
+    """Escribir un lote y hacer commit; devuelve (creados, actualizados, errores)"""
+    # Una sola consulta para todos los SKUs del lote
+    skus = [valores['sku'] for _, valores in lote]
+    existentes = {
+        sku: (inventario_id, eid)
+        for inventario_id, sku, eid in db.session.query(
+            Inventario.id, Inventario.sku, Inventario.empresa_id
+        ).filter(Inventario.sku.in_(skus))
+    }
+
+    ahora = datetime.utcnow()
+    nuevos = []
+    actualizaciones = []
+    errores = []
+    for numero, valores in lote:
+        sku = valores['sku']
+        if sku in vistos:
+            errores.append((numero, sku, 'SKU repetido en el archivo'))
+            continue
+        vistos.add(sku)
+
+        if sku in existentes:
+            inventario_id, eid = existentes[sku]
+            if eid != empresa_id or not actualizar:
+                errores.append((numero, sku, 'El SKU ya existe'))
+                continue
+            valores.update(id=inventario_id, updated_at=ahora)
+            actualizaciones.append(valores)
+        else:
+            nuevos.append({
+                **DEFECTOS, **valores,
+                'empresa_id': empresa_id, 'created_at': ahora, 'updated_at': ahora,
+            })
+
+    _insertar(nuevos)
+    if actualizaciones:
+        db.session.execute(update(Inventario), actualizaciones)
+    # Los INSERT/UPDATE masivos no disparan eventos de los modelos
+    cache.marcar(db.session, empresa_id, 'inventario')
+    busqueda.marcar(db.session, empresa_id, [valores['id'] for valores in actualizaciones])
+    db.session.commit()
+
+    return len(nuevos), len(actualizaciones), errores
+
+
+def _guardar_lote(lote, empresa_id, actualizar, vistos, reporte):
+    """Procesar un lote; si la BD lo rechaza se descarta solo ese lote"""
+    try:
+        creados, actualizados, errores = _procesar_lote(lote, empresa_id, actualizar, vistos)
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Error guardando lote de importación (filas {lote[0][0]}-{lote[-1][0]}): {str(e)}")
+        for numero, valores in lote:
+            _agregar_error(reporte, numero, valores['sku'], 'No se pudo guardar el lote de esta fila')
+        return
+
+    reporte['creados'] += creados
+    reporte['actualizados'] += actualizados
+    for numero, sku, mensaje in errores:
+        _agregar_error(reporte, numero, sku, mensaje)
+
+
+def _agregar_error(reporte, numero, sku, mensaje):
+    reporte['con_error'] += 1
+    if len(reporte['errores']) < MAX_ERRORES_REPORTADOS:
+        reporte['errores'].append({'fila': numero, 'sku': sku, 'error': mensaje})
+
+
+def importar(stream, formato, empresa_id, actualizar=True, tamano_lote=TAMANO_LOTE):
+    """Importar productos desde un stream de texto y devolver el reporte
+
+    Con actualizar=True los SKUs que ya existen en la empresa se
+    actualizan; si no, se reportan como error. Un SKU de otra empresa
+    siempre es error porque el SKU es único en toda la tabla. Los SKUs
+    vistos se recuerdan en todo el archivo (no solo en el lote) para
+    reportar los repetidos aunque caigan en lotes distintos. Si un lote
+    falla en la BD, sus filas se reportan como error y se sigue con el
+    siguiente.
+    """
+    reporte = {'procesadas': 0, 'creados': 0, 'actualizados': 0, 'con_error': 0, 'errores': []}
+
+    vistos = set()
+    lote = []
+    for numero, fila in leer_filas(stream, formato):
+        reporte['procesadas'] += 1
+        try:
+            lote.append((numero, validar_fila(fila)))
+        except ValueError as e:
+            sku = fila.get('sku') if isinstance(fila, dict) else None
+            _agregar_error(reporte, numero, sku, str(e))
+            continue
+
+        if len(lote) >= tamano_lote:
+            _guardar_lote(lote, empresa_id, actualizar, vistos, reporte)
+            lote = []
+
+    if lote:
+        _guardar_lote(lote, empresa_id, actualizar, vistos, reporte)
+
+    return reporte
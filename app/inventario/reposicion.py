@@ -0,0 +1,145 @@
+"""Reposición: productos en o bajo su cantidad mínima y novedades de stock
+
+La lista (GET /api/inventario/reposicion) lee el índice parcial
+ix_inventario_empresa_id_bajo_minimo, que solo contiene los productos con
+cantidad_disponible <= cantidad_minima: no recorre el catálogo.
+
+Cada cambio de stock que cruza el mínimo (ventas, anulaciones, edición
+del producto) agrega una fila a novedad_stock en la misma transacción.
+Compras lee solo lo nuevo con un cursor "<transaccion>-<id>"
+(GET /api/inventario/reposicion/novedades?desde=<cursor>). Las importaciones
+masivas no generan novedades; la lista siempre refleja el stock actual.
+
+El cursor sigue el orden de confirmación, no el de inserción:
+- PostgreSQL: cada novedad guarda el id de su transacción
+  (pg_current_xact_id()) y solo se entregan las de transacciones menores
+  que pg_snapshot_xmin(pg_current_snapshot()), es decir, ya terminadas y
+  sin ninguna más antigua en curso. Una venta que confirma tarde (p. ej.
+  esperando los bloqueos de descontar) tiene un id de transacción mayor
+  que todo lo ya entregado, así que no queda detrás del cursor. Una
+  transacción larga abierta retrasa la entrega hasta que termina, nunca
+  la pierde. Requiere PostgreSQL 13 o posterior.
+- SQLite: las escrituras son de a una y el id ya sigue el orden de
+  confirmación; transaccion queda en 0.
+"""
+from datetime import datetime, timedelta
+from sqlalchemy import BigInteger, Text, cast, delete, func, select, tuple_
+from app import db, serializacion
+from app.models import Inventario, NovedadStock
+
+LIMITE_POR_DEFECTO = 100
+LIMITE_MAXIMO = 1000
+
+CURSOR_INICIAL = (0, 0)
+
+
+def _postgresql():
+    return db.session.get_bind().dialect.name == 'postgresql'
+
+
+def _xid(expresion):
+    # xid8 no tiene cast directo a bigint
+    return cast(cast(expresion, Text), BigInteger)
+
+
+def leer_cursor(texto):
+    """(transaccion, id) de un cursor "<transaccion>-<id>" (o solo "<id>"); ValueError si no es válido"""
+    partes = str(texto).split('-')
+    if len(partes) > 2:
+        raise ValueError(texto)
+    cursor = (int(partes[0]), int(partes[1])) if len(partes) == 2 else (0, int(partes[0]))
+    if min(cursor) < 0:
+        raise ValueError(texto)
+    return cursor
+
+
+def formatear_cursor(cursor):
+    return f'{cursor[0]}-{cursor[1]}'
+
+
+def bajo_minimo(cantidad, minimo):
+    return cantidad is not None and minimo is not None and cantidad <= minimo
+
+
+def registrar(empresa_id, inventario_id, antes, despues, minimo_antes, minimo_despues=None):
+    """Agregar a la sesión una novedad si el cambio cruza el mínimo (o None)
+
+    `antes` None es un producto nuevo: cuenta como si estuviera sobre el mínimo.
+    """
+    if minimo_despues is None:
+        minimo_despues = minimo_antes
+    estaba, queda = bajo_minimo(antes, minimo_antes), bajo_minimo(despues, minimo_despues)
+    if estaba == queda:
+        return None
+    novedad = NovedadStock(
+        empresa_id=empresa_id,
+        inventario_id=inventario_id,
+        tipo='bajo' if queda else 'repuesto',
+        cantidad_disponible=despues,
+        cantidad_minima=minimo_despues,
+    )
+    if _postgresql():
+        novedad.transaccion = _xid(func.pg_current_xact_id())
+    db.session.add(novedad)
+    return novedad
+
+
+def consulta_bajo_minimo(empresa_id, campos=None):
+    """SELECT de los productos en o bajo su mínimo, los más faltantes primero"""
+    return serializacion.REPOSICION.select(campos).where(
+        Inventario.empresa_id == empresa_id,
+        Inventario.cantidad_disponible <= Inventario.cantidad_minima,
+    ).order_by(
+        (Inventario.cantidad_disponible - Inventario.cantidad_minima), Inventario.nombre, Inventario.id
+    )
+
+
+def _confirmadas(consulta):
+    """Solo novedades de transacciones terminadas sin otra más antigua en curso (PostgreSQL)"""
+    if _postgresql():
+        return consulta.where(NovedadStock.transaccion < _xid(func.pg_snapshot_xmin(func.pg_current_snapshot())))
+    return consulta
+
+
+def ultimo_cursor(empresa_id):
+    """Cursor de la última novedad entregable de la empresa (CURSOR_INICIAL si no hay)"""
+    fila = db.session.execute(_confirmadas(
+        select(NovedadStock.transaccion, NovedadStock.id)
+        .where(NovedadStock.empresa_id == empresa_id)
+        .order_by(NovedadStock.transaccion.desc(), NovedadStock.id.desc())
+        .limit(1)
+    )).first()
+    return tuple(fila) if fila else CURSOR_INICIAL
+
+
+def consulta_novedades(empresa_id, desde=CURSOR_INICIAL, limite=LIMITE_POR_DEFECTO):
+    """SELECT de las novedades posteriores al cursor `desde`, en orden de confirmación"""
+    return _confirmadas(
+        select(NovedadStock, Inventario.nombre, Inventario.sku)
+        .outerjoin(Inventario, Inventario.id == NovedadStock.inventario_id)
+        .where(
+            NovedadStock.empresa_id == empresa_id,
+            tuple_(NovedadStock.transaccion, NovedadStock.id) > tuple_(*desde),
+        )
+        .order_by(NovedadStock.transaccion, NovedadStock.id)
+        .limit(limite + 1)
+    )
+
+
+def novedades(empresa_id, desde=CURSOR_INICIAL, limite=LIMITE_POR_DEFECTO):
+    """Novedades posteriores al cursor `desde`: (novedades, cursor, hay_mas)"""
+    filas = db.session.execute(consulta_novedades(empresa_id, desde, limite)).all()
+    hay_mas = len(filas) > limite
+    filas = filas[:limite]
+    resultado = [{**novedad.to_dict(), 'nombre': nombre, 'sku': sku} for novedad, nombre, sku in filas]
+    if filas:
+        desde = (filas[-1][0].transaccion, filas[-1][0].id)
+    return resultado, desde, hay_mas
+
+
+def limpiar(dias):
+    """Borrar las novedades con más de `dias` días; devuelve cuántas"""
+    limite = datetime.utcnow() - timedelta(days=dias)
+    resultado = db.session.execute(delete(NovedadStock).where(NovedadStock.created_at < limite))
+    db.session.commit()
+    return resultado.rowcount
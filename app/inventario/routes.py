@@ -3,25 +3,165 @@ Blueprint de Inventario
 Maneja: CRUD de productos, control de stock
 """
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from app import db
-from app.models import Inventario, Usuario
+from flask_jwt_extended import jwt_required, current_user
+from app import cache, db, serializacion
+from app.models import Inventario
+from app.inventario import busqueda, importacion, reposicion
+import click
+import io
 
 inventario_bp = Blueprint('inventario', __name__)
 
+
+def _cantidades(data, defectos):
+    """Cantidades de stock del cuerpo como enteros ("10" y 10.0 se aceptan); ValueError si no lo son
+
+    `defectos` es {campo: valor si falta}; con valor None el campo ausente se omite.
+    """
+    cantidades = {}
+    for campo, defecto in defectos.items():
+        if campo not in data and defecto is None:
+            continue
+        valor = data.get(campo, defecto)
+        try:
+            cantidades[campo] = int(valor)
+            if cantidades[campo] != float(valor):
+                raise ValueError
+        except (TypeError, ValueError):
+            raise ValueError(f'{campo} debe ser un número entero')
+    return cantidades
+
 @inventario_bp.route('/', methods=['GET'])
 @jwt_required()
+@cache.cachear('inventario')
 def listar_productos():
-    """Listar todos los productos de la empresa"""
+    """Listar todos los productos de la empresa (?fields=, ?formato=compacto)"""
     try:
-        usuario_id = get_jwt_identity()
-        usuario = Usuario.query.get(usuario_id)
+        usuario = current_user
+        proyeccion = serializacion.PRODUCTO
+        try:
+            campos = serializacion.leer_campos(request.args, proyeccion.campos)
+        except ValueError as e:
+            return {'error': str(e)}, 400
         
-        productos = Inventario.query.filter_by(empresa_id=usuario.empresa_id).all()
+        # Solo las columnas que devuelve la API, como tuplas
+        productos = proyeccion.dicts(
+            proyeccion.select(campos).where(Inventario.empresa_id == usuario.empresa_id), campos
+        )
         
         return {
             'total': len(productos),
-            'productos': [p.to_dict() for p in productos]
+            'productos': serializacion.empaquetar(productos, campos, request.args, proyeccion.campos)
+        }, 200
+        
+    except Exception as e:
+        return {'error': str(e)}, 500
+
+@inventario_bp.route('/buscar', methods=['GET'])
+@jwt_required()
+@cache.cachear('inventario')
+def buscar_productos():
+    """Buscar productos por nombre, SKU o categoría, por relevancia
+    
+    Parámetros: q (texto; vacío lista por nombre), limite, desplazamiento,
+    fields y formato=compacto como en el listado.
+    """
+    try:
+        usuario = current_user
+        args = request.args
+        try:
+            campos = serializacion.leer_campos(args, serializacion.PRODUCTO.campos)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        try:
+            limite = min(max(int(args.get('limite', busqueda.LIMITE_POR_DEFECTO)), 1), busqueda.LIMITE_MAXIMO)
+            desplazamiento = max(int(args.get('desplazamiento', 0)), 0)
+        except ValueError:
+            return {'error': 'El límite y el desplazamiento deben ser números enteros'}, 400
+        
+        productos, hay_mas = busqueda.buscar(
+            usuario.empresa_id, args.get('q', ''), limite, desplazamiento, campos
+        )
+        
+        return {
+            'productos': serializacion.empaquetar(productos, campos, args, serializacion.PRODUCTO.campos),
+            'total': len(productos),
+            'limite': limite,
+            'desplazamiento': desplazamiento,
+            'hay_mas': hay_mas
+        }, 200
+        
+    except Exception as e:
+        return {'error': str(e)}, 500
+
+@inventario_bp.route('/sku/<path:sku>', methods=['GET'])
+@jwt_required()
+def obtener_por_sku(sku):
+    """Producto por SKU exacto (lector de código de barras), desde la caché del proceso"""
+    try:
+        producto = busqueda.por_sku(current_user.empresa_id, sku)
+        
+        if producto is None:
+            return {'error': 'Producto no encontrado'}, 404
+        
+        return {'producto': producto}, 200
+        
+    except Exception as e:
+        return {'error': str(e)}, 500
+
+@inventario_bp.route('/reposicion', methods=['GET'])
+@jwt_required()
+def listar_reposicion():
+    """Productos en o bajo su cantidad mínima, los más faltantes primero
+    
+    Devuelve también el cursor de novedades actual: desde ahí
+    /reposicion/novedades entrega solo los cambios posteriores.
+    """
+    try:
+        usuario = current_user
+        proyeccion = serializacion.REPOSICION
+        try:
+            campos = serializacion.leer_campos(request.args, proyeccion.campos)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        
+        # Cursor antes de la lista: una novedad entre ambas lecturas se vuelve a entregar, no se pierde
+        cursor = reposicion.ultimo_cursor(usuario.empresa_id)
+        productos = proyeccion.dicts(reposicion.consulta_bajo_minimo(usuario.empresa_id, campos), campos)
+        
+        return {
+            'productos': serializacion.empaquetar(productos, campos, request.args, proyeccion.campos),
+            'total': len(productos),
+            'cursor': reposicion.formatear_cursor(cursor)
+        }, 200
+        
+    except Exception as e:
+        return {'error': str(e)}, 500
+
+@inventario_bp.route('/reposicion/novedades', methods=['GET'])
+@jwt_required()
+def novedades_reposicion():
+    """Cruces del mínimo posteriores a ?desde=<cursor> (tipo bajo o repuesto)
+    
+    El cursor es el que devolvió la lista o la lectura anterior; sin desde
+    se lee desde el principio.
+    """
+    try:
+        usuario = current_user
+        try:
+            desde = reposicion.leer_cursor(request.args.get('desde', '0'))
+            limite = min(max(int(request.args.get('limite', reposicion.LIMITE_POR_DEFECTO)), 1),
+                         reposicion.LIMITE_MAXIMO)
+        except ValueError:
+            return {'error': 'desde debe ser un cursor devuelto por la API y limite un número entero'}, 400
+        
+        novedades, cursor, hay_mas = reposicion.novedades(usuario.empresa_id, desde, limite)
+        
+        return {
+            'novedades': novedades,
+            'total': len(novedades),
+            'cursor': reposicion.formatear_cursor(cursor),
+            'hay_mas': hay_mas
         }, 200
         
     except Exception as e:
@@ -32,14 +172,18 @@ def listar_productos():
 def crear_producto():
     """Crear nuevo producto"""
     try:
-        usuario_id = get_jwt_identity()
-        usuario = Usuario.query.get(usuario_id)
+        usuario = current_user
         data = request.get_json()
         
         # Validaciones
         if not data.get('nombre') or not data.get('sku'):
             return {'error': 'Nombre y SKU son requeridos'}, 400
         
+        try:
+            cantidades = _cantidades(data, {'cantidad_disponible': 0, 'cantidad_minima': 5})
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        
         # Verificar SKU único
         if Inventario.query.filter_by(sku=data['sku']).first():
             return {'error': 'El SKU ya existe'}, 409
@@ -52,11 +196,15 @@ def crear_producto():
             categoria=data.get('categoria'),
             costo_unitario=data.get('costo_unitario', 0),
             precio_venta=data.get('precio_venta', 0),
-            cantidad_disponible=data.get('cantidad_disponible', 0),
-            cantidad_minima=data.get('cantidad_minima', 5),
+            cantidad_disponible=cantidades['cantidad_disponible'],
+            cantidad_minima=cantidades['cantidad_minima'],
         )
         
         db.session.add(producto)
+        db.session.flush()
+        # Un producto nuevo con stock en o bajo el mínimo entra a la lista de reposición
+        reposicion.registrar(usuario.empresa_id, producto.id, None,
+                             producto.cantidad_disponible, producto.cantidad_minima)
         db.session.commit()
         
         return {
@@ -68,13 +216,54 @@ def crear_producto():
         db.session.rollback()
         return {'error': str(e)}, 500
 
+@inventario_bp.route('/importar', methods=['POST'])
+@jwt_required()
+def importar_productos():
+    """Importar productos en bloque desde un archivo CSV o NDJSON
+    
+    Acepta multipart con el campo "archivo" o el archivo como cuerpo
+    (Content-Type text/csv o application/x-ndjson). ?formato=csv|ndjson
+    fuerza el formato y ?modo=insertar reporta los SKUs existentes como
+    error en vez de actualizarlos.
+    """
+    try:
+        usuario = current_user
+        
+        archivo = request.files.get('archivo')
+        if archivo:
+            binario = archivo.stream
+            formato = importacion.detectar_formato(archivo.filename, archivo.mimetype)
+        else:
+            binario = request.stream
+            formato = importacion.detectar_formato(None, request.mimetype)
+        
+        formato = request.args.get('formato', formato)
+        if formato not in ('csv', 'ndjson'):
+            return {'error': 'Formato inválido. Usa: csv o ndjson'}, 400
+        
+        stream = io.TextIOWrapper(binario, encoding='utf-8-sig', newline='')
+        reporte = importacion.importar(
+            stream,
+            formato,
+            usuario.empresa_id,
+            actualizar=request.args.get('modo', 'upsert') != 'insertar'
+        )
+        
+        return {
+            'message': 'Importación finalizada',
+            'reporte': reporte
+        }, 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return {'error': str(e)}, 500
+
 @inventario_bp.route('/<int:producto_id>', methods=['GET'])
 @jwt_required()
 def obtener_producto(producto_id):
     """Obtener detalles de un producto"""
     try:
-        usuario_id = get_jwt_identity()
-        usuario = Usuario.query.get(usuario_id)
+        usuario = current_user
         
         producto = Inventario.query.filter_by(
             id=producto_id,
@@ -94,8 +283,7 @@ def obtener_producto(producto_id):
 def actualizar_producto(producto_id):
     """Actualizar un producto"""
     try:
-        usuario_id = get_jwt_identity()
-        usuario = Usuario.query.get(usuario_id)
+        usuario = current_user
         data = request.get_json()
         
         producto = Inventario.query.filter_by(
@@ -106,6 +294,13 @@ def actualizar_producto(producto_id):
         if not producto:
             return {'error': 'Producto no encontrado'}, 404
         
+        stock_antes = producto.cantidad_disponible
+        minimo_antes = producto.cantidad_minima
+        try:
+            cantidades = _cantidades(data, {'cantidad_disponible': None, 'cantidad_minima': None})
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        
         # Actualizar campos
         if 'nombre' in data:
             producto.nombre = data['nombre']
@@ -116,10 +311,15 @@ def actualizar_producto(producto_id):
         if 'costo_unitario' in data:
             producto.costo_unitario = data['costo_unitario']
         if 'cantidad_disponible' in data:
-            producto.cantidad_disponible = data['cantidad_disponible']
+            producto.cantidad_disponible = cantidades['cantidad_disponible']
+        if 'cantidad_minima' in data:
+            producto.cantidad_minima = cantidades['cantidad_minima']
         if 'categoria' in data:
             producto.categoria = data['categoria']
         
+        # Novedad de reposición en la misma transacción si cruza el mínimo
+        reposicion.registrar(usuario.empresa_id, producto.id, stock_antes, producto.cantidad_disponible,
+                             minimo_antes, producto.cantidad_minima)
         db.session.commit()
         
         return {
@@ -136,8 +336,7 @@ def actualizar_producto(producto_id):
 def eliminar_producto(producto_id):
     """Eliminar un producto"""
     try:
-        usuario_id = get_jwt_identity()
-        usuario = Usuario.query.get(usuario_id)
+        usuario = current_user
         
         producto = Inventario.query.filter_by(
             id=producto_id,
@@ -155,3 +354,34 @@ def eliminar_producto(producto_id):
     except Exception as e:
         db.session.rollback()
         return {'error': str(e)}, 500
+
+
+@inventario_bp.cli.command('importar')
+@click.argument('archivo', type=click.Path(exists=True, dir_okay=False))
+@click.option('--empresa-id', type=int, required=True, help='Empresa dueña de los productos')
+@click.option('--formato', type=click.Choice(['csv', 'ndjson']), default=None, help='Por defecto se deduce de la extensión')
+@click.option('--modo', type=click.Choice(['upsert', 'insertar']), default='upsert')
+@click.option('--lote', type=int, default=importacion.TAMANO_LOTE, help='Filas por lote')
+def importar_productos_cli(archivo, empresa_id, formato, modo, lote):
+    """Importar productos desde un archivo CSV o NDJSON"""
+    formato = formato or importacion.detectar_formato(archivo)
+    
+    with open(archivo, encoding='utf-8-sig', newline='') as stream:
+        reporte = importacion.importar(
+            stream, formato, empresa_id, actualizar=modo == 'upsert', tamano_lote=lote
+        )
+    
+    for error in reporte['errores']:
+        click.echo(f"⚠️  Fila {error['fila']} ({error['sku']}): {error['error']}")
+    click.echo(
+        f"✅ {reporte['procesadas']} filas: {reporte['creados']} creados, "
+        f"{reporte['actualizados']} actualizados, {reporte['con_error']} con error"
+    )
+
+
+@inventario_bp.cli.command('limpiar-novedades')
+@click.option('--dias', type=int, default=90, help='Conservar las novedades de los últimos N días')
+def limpiar_novedades_cli(dias):
+    """Borrar las novedades de reposición antiguas"""
+    borradas = reposicion.limpiar(dias)
+    click.echo(f"✅ {borradas} novedades de reposición borradas")
@@ -0,0 +1,63 @@
+"""Movimientos de stock atómicos
+
+El stock se modifica con un UPDATE condicional en la BD en vez de
+leer, comparar en Python y escribir: dos workers vendiendo el mismo
+SKU a la vez no pueden pasar ambos la validación y sobrevender. El
+UPDATE devuelve (RETURNING) el stock resultante para registrar, en la
+misma transacción, los cruces de la cantidad mínima.
+"""
+from app import cache, db
+from app.inventario import busqueda, reposicion
+from app.models import Inventario
+from sqlalchemy import update
+
+
+def descontar(empresa_id, lineas):
+    """Descontar {inventario_id: cantidad} solo si hay stock suficiente
+
+    Cada línea es un UPDATE ... WHERE cantidad_disponible >= cantidad.
+    Se recorren en orden de id para que dos carritos concurrentes tomen
+    los bloqueos de fila en el mismo orden y no haya deadlocks. Devuelve
+    la lista de ids sin stock suficiente; si no está vacía la
+    transacción debe revertirse.
+    """
+    sin_stock = []
+    for inventario_id in sorted(lineas):
+        cantidad = lineas[inventario_id]
+        fila = db.session.execute(
+            update(Inventario)
+            .where(
+                Inventario.id == inventario_id,
+                Inventario.empresa_id == empresa_id,
+                Inventario.cantidad_disponible >= cantidad
+            )
+            .values(cantidad_disponible=Inventario.cantidad_disponible - cantidad)
+            .returning(Inventario.cantidad_disponible, Inventario.cantidad_minima)
+            .execution_options(synchronize_session=False)
+        ).first()
+        if fila is None:
+            sin_stock.append(inventario_id)
+            continue
+        reposicion.registrar(empresa_id, inventario_id, fila.cantidad_disponible + cantidad,
+                             fila.cantidad_disponible, fila.cantidad_minima)
+    cache.marcar(db.session, empresa_id, 'inventario')
+    busqueda.marcar(db.session, empresa_id, lineas)
+    return sin_stock
+
+
+def reponer(empresa_id, lineas):
+    """Devolver {inventario_id: cantidad} al stock (p. ej. al anular una venta)"""
+    for inventario_id in sorted(lineas):
+        cantidad = lineas[inventario_id]
+        fila = db.session.execute(
+            update(Inventario)
+            .where(Inventario.id == inventario_id, Inventario.empresa_id == empresa_id)
+            .values(cantidad_disponible=Inventario.cantidad_disponible + cantidad)
+            .returning(Inventario.cantidad_disponible, Inventario.cantidad_minima)
+            .execution_options(synchronize_session=False)
+        ).first()
+        if fila is not None:
+            reposicion.registrar(empresa_id, inventario_id, fila.cantidad_disponible - cantidad,
+                                 fila.cantidad_disponible, fila.cantidad_minima)
+    cache.marcar(db.session, empresa_id, 'inventario')
+    busqueda.marcar(db.session, empresa_id, lineas)
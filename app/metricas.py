@@ -0,0 +1,141 @@
+"""Métricas Prometheus por endpoint
+
+Por cada petición se registra, con etiquetas de blueprint, endpoint,
+método y estado:
+
+- dalu_http_request_duration_seconds: latencia (histograma)
+- dalu_http_response_size_bytes: tamaño de la respuesta ya comprimida
+- dalu_sql_queries_per_request / dalu_sql_seconds_per_request: cuántas
+  sentencias SQL ejecutó la petición y cuánto tiempo pasó en la base
+  (eventos before/after_cursor_execute del motor)
+
+GET /api/metrics las devuelve en formato de texto de Prometheus. Con
+gunicorn cada worker escribe sus valores en PROMETHEUS_MULTIPROC_DIR
+(lo fija gunicorn.conf.py) y la respuesta suma los de todos los
+workers, así no importa qué worker atienda el scrape.
+
+El endpoint usa el nombre de la regla de Flask (p. ej.
+'inventario.listar_productos'), no la URL, para no crear una serie por
+id; las rutas inexistentes van todas a 'sin_ruta'.
+"""
+from flask import g, has_request_context, request
+from sqlalchemy import event
+import os
+import time
+
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Histogram, generate_latest, multiprocess,
+    )
+except ImportError:
+    Histogram = None
+
+ETIQUETAS = ('blueprint', 'endpoint', 'method', 'status')
+
+if Histogram is not None:
+    LATENCIA = Histogram(
+        'dalu_http_request_duration_seconds', 'Latencia de las peticiones HTTP', ETIQUETAS,
+        buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    )
+    TAMANO = Histogram(
+        'dalu_http_response_size_bytes', 'Tamaño del cuerpo de la respuesta', ETIQUETAS,
+        buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304),
+    )
+    CONSULTAS = Histogram(
+        'dalu_sql_queries_per_request', 'Sentencias SQL ejecutadas por petición', ETIQUETAS,
+        buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100, 200),
+    )
+    TIEMPO_SQL = Histogram(
+        'dalu_sql_seconds_per_request', 'Tiempo en la base de datos por petición', ETIQUETAS,
+        buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+    )
+
+
+class MedicionPeticion:
+    """Contadores de la petición en curso (en flask.g)"""
+
+    __slots__ = ('inicio', 'consultas', 'tiempo_sql')
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.consultas = 0
+        self.tiempo_sql = 0.0
+
+
+def medicion_actual():
+    """MedicionPeticion de la petición en curso, o None fuera de una petición"""
+    if not has_request_context():
+        return None
+    return g.get('_medicion')
+
+
+def _antes_de_sql(conexion, cursor, sentencia, parametros, contexto, executemany):
+    conexion.info.setdefault('_inicio_sql', []).append(time.perf_counter())
+
+
+def _despues_de_sql(conexion, cursor, sentencia, parametros, contexto, executemany):
+    pila = conexion.info.get('_inicio_sql')
+    if not pila:
+        return
+    duracion = time.perf_counter() - pila.pop()
+    medicion = medicion_actual()
+    if medicion is not None:
+        medicion.consultas += 1
+        medicion.tiempo_sql += duracion
+
+
+def _etiquetas(respuesta):
+    regla = request.url_rule
+    return (
+        request.blueprint or '',
+        regla.endpoint if regla is not None else 'sin_ruta',
+        request.method,
+        str(respuesta.status_code),
+    )
+
+
+def exportar():
+    """(cuerpo, content-type) con las métricas de todos los workers"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registro = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registro)
+    else:
+        registro = REGISTRY
+    return generate_latest(registro), CONTENT_TYPE_LATEST
+
+
+def disponible():
+    return Histogram is not None
+
+
+def init_app(app):
+    """Medir cada petición y las sentencias SQL del motor de la app"""
+    from app import db
+
+    if not disponible():
+        print("⚠️  prometheus_client no instalado: /api/metrics desactivado")
+        return
+
+    with app.app_context():
+        motor = db.engine
+    event.listen(motor, 'before_cursor_execute', _antes_de_sql)
+    event.listen(motor, 'after_cursor_execute', _despues_de_sql)
+
+    @app.before_request
+    def _iniciar_medicion():
+        g._medicion = MedicionPeticion()
+
+    @app.after_request
+    def _registrar_medicion(respuesta):
+        medicion = g.pop('_medicion', None)
+        if medicion is None:
+            return respuesta
+        etiquetas = _etiquetas(respuesta)
+        LATENCIA.labels(*etiquetas).observe(time.perf_counter() - medicion.inicio)
+        CONSULTAS.labels(*etiquetas).observe(medicion.consultas)
+        TIEMPO_SQL.labels(*etiquetas).observe(medicion.tiempo_sql)
+        # En streaming el tamaño no se conoce de antemano y calcularlo
+        # consumiría el generador (un stream SSE no terminaría nunca)
+        if not respuesta.is_streamed and not respuesta.direct_passthrough:
+            TAMANO.labels(*etiquetas).observe(respuesta.calculate_content_length())
+        return respuesta
@@ -3,7 +3,6 @@ Modelos SQLAlchemy para la aplicación DALU
 Define la estructura de todas las tablas de la BD
 """
 from app import db
-from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
 from sqlalchemy import func
 
@@ -26,6 +25,7 @@ class Empresa(db.Model):
     ventas = db.relationship('Venta', backref='empresa', lazy=True, cascade='all, delete-orphan')
     gastos = db.relationship('Gasto', backref='empresa', lazy=True, cascade='all, delete-orphan')
     deudas = db.relationship('Deuda', backref='empresa', lazy=True, cascade='all, delete-orphan')
+    balance = db.relationship('BalanceEmpresa', backref='empresa', uselist=False, cascade='all, delete-orphan')
     
     def to_dict(self):
         return {
@@ -52,12 +52,14 @@ class Usuario(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     def set_password(self, password):
-        """Encriptar y guardar contraseña"""
-        self.password_hash = generate_password_hash(password)
+        """Encriptar y guardar contraseña (método de PASSWORD_HASH_METODO)"""
+        from app.auth import contrasenas
+        self.password_hash = contrasenas.generar(password)
     
     def check_password(self, password):
         """Verificar contraseña"""
-        return check_password_hash(self.password_hash, password)
+        from app.auth import contrasenas
+        return contrasenas.verificar(self.password_hash, password)
     
     def to_dict(self):
         return {
@@ -72,9 +74,17 @@ class Usuario(db.Model):
 class Inventario(db.Model):
     """Modelo para productos en inventario"""
     __tablename__ = 'inventario'
+    __table_args__ = (
+        # Índice parcial: solo los productos en o bajo su mínimo (lista de reposición)
+        db.Index(
+            'ix_inventario_empresa_id_bajo_minimo', 'empresa_id',
+            postgresql_where=db.text('cantidad_disponible <= cantidad_minima'),
+            sqlite_where=db.text('cantidad_disponible <= cantidad_minima'),
+        ),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
-    empresa_id = db.Column(db.Integer, db.ForeignKey('empresa.id'), nullable=False)
+    empresa_id = db.Column(db.Integer, db.ForeignKey('empresa.id'), nullable=False, index=True)
     nombre = db.Column(db.String(255), nullable=False)
     descripcion = db.Column(db.Text)
     sku = db.Column(db.String(100), nullable=False, unique=True)
@@ -105,6 +115,9 @@ class Inventario(db.Model):
 class Venta(db.Model):
     """Modelo para ventas"""
     __tablename__ = 'venta'
+    __table_args__ = (
+        db.Index('ix_venta_empresa_id_created_at', 'empresa_id', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     empresa_id = db.Column(db.Integer, db.ForeignKey('empresa.id'), nullable=False)
@@ -143,11 +156,12 @@ class VentaItem(db.Model):
     __tablename__ = 'venta_item'
     
     id = db.Column(db.Integer, primary_key=True)
-    venta_id = db.Column(db.Integer, db.ForeignKey('venta.id'), nullable=False)
+    venta_id = db.Column(db.Integer, db.ForeignKey('venta.id'), nullable=False, index=True)
     inventario_id = db.Column(db.Integer, db.ForeignKey('inventario.id'), nullable=False)
     cantidad = db.Column(db.Integer, nullable=False)
     precio_unitario = db.Column(db.Float, nullable=False)
     subtotal = db.Column(db.Float, nullable=False)
+    categoria = db.Column(db.String(100))  # categoría del producto al momento de la venta (venta_resumen)
     
     def to_dict(self):
         return {
@@ -161,6 +175,10 @@ class VentaItem(db.Model):
 class Gasto(db.Model):
     """Modelo para gastos"""
     __tablename__ = 'gasto'
+    __table_args__ = (
+        db.Index('ix_gasto_empresa_id_fecha_gasto', 'empresa_id', 'fecha_gasto'),
+        db.Index('ix_gasto_empresa_id_categoria_fecha_gasto', 'empresa_id', 'categoria', 'fecha_gasto'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     empresa_id = db.Column(db.Integer, db.ForeignKey('empresa.id'), nullable=False)
@@ -188,10 +206,15 @@ class Gasto(db.Model):
 class Deuda(db.Model):
     """Modelo para deudas de clientes"""
     __tablename__ = 'deuda'
+    __table_args__ = (
+        db.Index('ix_deuda_empresa_id_estado', 'empresa_id', 'estado'),
+        db.Index('ix_deuda_empresa_id_created_at', 'empresa_id', 'created_at'),
+        db.Index('ix_deuda_estado_fecha_vencimiento', 'estado', 'fecha_vencimiento'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     empresa_id = db.Column(db.Integer, db.ForeignKey('empresa.id'), nullable=False)
-    venta_id = db.Column(db.Integer, db.ForeignKey('venta.id'), nullable=True)
+    venta_id = db.Column(db.Integer, db.ForeignKey('venta.id'), nullable=True, index=True)
     cliente_nombre = db.Column(db.String(255), nullable=False)
     cliente_email = db.Column(db.String(120))
     monto_total = db.Column(db.Float, nullable=False)
@@ -213,3 +236,109 @@ class Deuda(db.Model):
             'estado': self.estado,
             'dias_vencimiento': (self.fecha_vencimiento - datetime.utcnow()).days if self.fecha_vencimiento else None,
         }
+
+class BalanceEmpresa(db.Model):
+    """Totales acumulados por empresa, mantenidos en cada escritura"""
+    __tablename__ = 'balance_empresa'
+    
+    empresa_id = db.Column(db.Integer, db.ForeignKey('empresa.id'), primary_key=True)
+    total_ingresos = db.Column(db.Float, nullable=False, default=0)
+    total_egresos = db.Column(db.Float, nullable=False, default=0)
+    deudas_pendientes = db.Column(db.Float, nullable=False, default=0)
+    cantidad_ventas = db.Column(db.Integer, nullable=False, default=0)
+    cantidad_gastos = db.Column(db.Integer, nullable=False, default=0)
+    cantidad_deudas_pendientes = db.Column(db.Integer, nullable=False, default=0)
+    version = db.Column(db.Integer, nullable=False, default=0)  # sube en cada cambio, id de evento SSE
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        total_ingresos = float(self.total_ingresos or 0)
+        total_egresos = float(self.total_egresos or 0)
+        deudas_pendientes = float(self.deudas_pendientes or 0)
+        balance_neto = total_ingresos - total_egresos
+        return {
+            'total_ingresos': total_ingresos,
+            'total_egresos': total_egresos,
+            'balance_neto': balance_neto,
+            'deudas_pendientes': deudas_pendientes,
+            'flujo_disponible': balance_neto - deudas_pendientes,
+            'cantidad_ventas': self.cantidad_ventas or 0,
+            'cantidad_gastos': self.cantidad_gastos or 0,
+            'cantidad_deudas_pendientes': self.cantidad_deudas_pendientes or 0,
+        }
+
+class VentaResumen(db.Model):
+    """Totales de ventas por periodo (día, semana, mes) y dimensión
+
+    dimension='total' tiene valor ''; 'tipo_pago' y 'categoria' guardan
+    el valor de esa dimensión. Por categoría los ingresos son la suma
+    de los subtotales de los items (sin impuesto).
+    """
+    __tablename__ = 'venta_resumen'
+    
+    empresa_id = db.Column(db.Integer, db.ForeignKey('empresa.id'), primary_key=True)
+    periodo = db.Column(db.String(10), primary_key=True)  # dia, semana, mes
+    dimension = db.Column(db.String(20), primary_key=True)  # total, tipo_pago, categoria
+    inicio = db.Column(db.Date, primary_key=True)
+    valor = db.Column(db.String(100), primary_key=True, default='')
+    ingresos = db.Column(db.Float, nullable=False, default=0)
+    unidades = db.Column(db.Integer, nullable=False, default=0)
+    tickets = db.Column(db.Integer, nullable=False, default=0)
+    
+    def to_dict(self):
+        ingresos = float(self.ingresos or 0)
+        return {
+            'inicio': self.inicio.isoformat(),
+            'valor': self.valor if self.dimension != 'total' else None,
+            'ingresos': ingresos,
+            'unidades': self.unidades,
+            'tickets': self.tickets,
+            'ticket_promedio': round(ingresos / self.tickets, 2) if self.tickets else 0.0,
+        }
+
+class TokenRevocado(db.Model):
+    """Tokens revocados, sincronizados a la memoria de cada worker
+
+    Con jti es un token puntual (logout). Sin jti revoca todos los tokens
+    del usuario emitidos hasta created_at (p. ej. al desactivarlo).
+    Pasada la fecha `expira` ningún token afectado sigue siendo válido y
+    la fila se puede borrar.
+    """
+    __tablename__ = 'token_revocado'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    jti = db.Column(db.String(64), nullable=True, unique=True)
+    usuario_id = db.Column(db.Integer, nullable=True, index=True)
+    expira = db.Column(db.DateTime, nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+class NovedadStock(db.Model):
+    """Cruce del stock de un producto por su cantidad mínima
+
+    tipo 'bajo': quedó en o bajo el mínimo; 'repuesto': volvió a superarlo.
+    Se registra en la misma transacción que el cambio de stock; (transaccion,
+    id) sirve de cursor en orden de confirmación (ver inventario.reposicion).
+    """
+    __tablename__ = 'novedad_stock'
+    __table_args__ = (
+        db.Index('ix_novedad_stock_empresa_id_transaccion_id', 'empresa_id', 'transaccion', 'id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    transaccion = db.Column(db.BigInteger, nullable=False, default=0, server_default='0')  # xid en PostgreSQL
+    empresa_id = db.Column(db.Integer, db.ForeignKey('empresa.id'), nullable=False)
+    inventario_id = db.Column(db.Integer, nullable=False)  # sin FK: la novedad sobrevive al producto
+    tipo = db.Column(db.String(10), nullable=False)  # bajo, repuesto
+    cantidad_disponible = db.Column(db.Integer, nullable=False)
+    cantidad_minima = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'inventario_id': self.inventario_id,
+            'tipo': self.tipo,
+            'cantidad_disponible': self.cantidad_disponible,
+            'cantidad_minima': self.cantidad_minima,
+            'created_at': self.created_at.isoformat(),
+        }
@@ -0,0 +1,196 @@
+"""Perfilador de consultas SQL: N+1 y consultas lentas
+
+Con PERFILADOR=1 (staging, desarrollo) cada petición registra todas sus
+sentencias SQL con su duración y el punto del código de la app que las
+originó. Al terminar la petición se imprime:
+
+- N+1: la misma sentencia (mismo SQL, distintos parámetros) ejecutada
+  PERFILADOR_REPETIDAS veces o más, con los lugares desde donde salió.
+  Es el patrón típico de un lazy load dentro de un bucle
+  (venta.items, item.inventario, Venta.usuario...).
+- Consultas lentas: las que superan PERFILADOR_LENTA_MS, con su plan
+  (EXPLAIN en PostgreSQL, EXPLAIN QUERY PLAN en SQLite) obtenido en otra
+  conexión al final de la petición.
+
+registrar() sirve también fuera de una petición (pruebas, scripts); el
+plugin app/pytest_consultas.py lo usa para fijar presupuestos de
+consultas por prueba. Los eventos del motor están siempre escuchando,
+pero sin un registro activo solo cuestan una lectura de ContextVar.
+"""
+from app import db
+from collections import defaultdict, namedtuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+from flask import g, request
+from sqlalchemy import event
+import os
+import sys
+import time
+
+Consulta = namedtuple('Consulta', 'sentencia parametros segundos sitio')
+
+_registros = ContextVar('registros_consultas', default=())
+
+_ESTE_ARCHIVO = os.path.abspath(__file__)
+_CARPETA_APP = os.path.dirname(_ESTE_ARCHIVO)
+_RAIZ = os.path.dirname(_CARPETA_APP)
+
+
+class Registro:
+    """Consultas ejecutadas mientras el registro está activo"""
+
+    def __init__(self):
+        self.consultas = []
+
+    def __len__(self):
+        return len(self.consultas)
+
+    @property
+    def segundos(self):
+        return sum(consulta.segundos for consulta in self.consultas)
+
+    def repetidas(self, minimo):
+        """[(sentencia, veces, sitios)] de las sentencias ejecutadas `minimo` veces o más"""
+        por_sentencia = defaultdict(list)
+        for consulta in self.consultas:
+            por_sentencia[consulta.sentencia].append(consulta.sitio)
+        return sorted(
+            (
+                (sentencia, len(sitios), sorted(set(sitios)))
+                for sentencia, sitios in por_sentencia.items() if len(sitios) >= minimo
+            ),
+            key=lambda grupo: -grupo[1],
+        )
+
+    def lentas(self, umbral_ms):
+        return [consulta for consulta in self.consultas if consulta.segundos * 1000 >= umbral_ms]
+
+    def resumen(self):
+        """Texto con cada consulta, su duración y su origen (para mensajes de error)"""
+        lineas = [f'{len(self)} consultas, {self.segundos * 1000:.1f} ms']
+        for numero, consulta in enumerate(self.consultas, 1):
+            lineas.append(f'  {numero:>3}. [{consulta.segundos * 1000:.1f} ms] {consulta.sitio}')
+            lineas.append(f'       {_una_linea(consulta.sentencia)}')
+        return '\n'.join(lineas)
+
+
+@contextmanager
+def registrar():
+    """Registrar las consultas ejecutadas dentro del bloque (en este hilo/contexto)"""
+    registro = Registro()
+    token = _registros.set(_registros.get() + (registro,))
+    try:
+        yield registro
+    finally:
+        _registros.reset(token)
+
+
+def _una_linea(sentencia, largo=300):
+    texto = ' '.join(sentencia.split())
+    return texto if len(texto) <= largo else texto[:largo] + '…'
+
+
+def _sitio():
+    """Primer frame del código de la app (fuera de este módulo) que llevó a la consulta"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        archivo = frame.f_code.co_filename
+        if archivo.startswith(_CARPETA_APP) and archivo != _ESTE_ARCHIVO:
+            return f'{os.path.relpath(archivo, _RAIZ)}:{frame.f_lineno} en {frame.f_code.co_name}'
+        frame = frame.f_back
+    return 'fuera de la app'
+
+
+def _antes_de_sql(conexion, cursor, sentencia, parametros, contexto, executemany):
+    if _registros.get():
+        conexion.info.setdefault('_perfilador_inicio', []).append(time.perf_counter())
+
+
+def _despues_de_sql(conexion, cursor, sentencia, parametros, contexto, executemany):
+    registros = _registros.get()
+    pila = conexion.info.get('_perfilador_inicio')
+    if not registros or not pila:
+        return
+    consulta = Consulta(
+        sentencia,
+        None if executemany else parametros,
+        time.perf_counter() - pila.pop(),
+        _sitio(),
+    )
+    for registro in registros:
+        registro.consultas.append(consulta)
+
+
+def plan(consulta):
+    """Plan de ejecución de una consulta SELECT registrada, como texto"""
+    if consulta.parametros is None or not consulta.sentencia.lstrip().upper().startswith(('SELECT', 'WITH')):
+        return None
+    # El EXPLAIN no cuenta en los registros activos (p. ej. el de una prueba)
+    token = _registros.set(())
+    try:
+        with db.engine.connect() as conexion:
+            if conexion.dialect.name == 'postgresql':
+                filas = conexion.exec_driver_sql(f'EXPLAIN {consulta.sentencia}', consulta.parametros)
+                return '\n'.join(fila[0] for fila in filas)
+            if conexion.dialect.name == 'sqlite':
+                filas = conexion.exec_driver_sql(f'EXPLAIN QUERY PLAN {consulta.sentencia}', consulta.parametros)
+                return '\n'.join(detalle for *_, detalle in filas)
+        return None
+    finally:
+        _registros.reset(token)
+
+
+def reportar(registro, origen, repetidas=5, lenta_ms=100, explain=True):
+    """Imprimir los N+1 y las consultas lentas de `registro`; devuelve si hubo hallazgos"""
+    grupos = registro.repetidas(repetidas)
+    lentas = registro.lentas(lenta_ms)
+
+    for sentencia, veces, sitios in grupos:
+        print(f"⚠️  N+1 en {origen}: {veces}× {_una_linea(sentencia, 160)}")
+        for sitio in sitios:
+            print(f"      desde {sitio}")
+
+    for consulta in lentas:
+        print(f"🐢 Consulta lenta en {origen} ({consulta.segundos * 1000:.1f} ms) desde {consulta.sitio}")
+        print(f"      {_una_linea(consulta.sentencia)}")
+        if explain:
+            try:
+                texto = plan(consulta)
+            except Exception as e:
+                texto = f'EXPLAIN falló: {str(e)}'
+            if texto:
+                for linea in texto.splitlines():
+                    print(f"      | {linea}")
+
+    return bool(grupos or lentas)
+
+
+def init_app(app):
+    """Escuchar las sentencias del motor y, con PERFILADOR activo, perfilar cada petición"""
+    with app.app_context():
+        motor = db.engine
+    event.listen(motor, 'before_cursor_execute', _antes_de_sql)
+    event.listen(motor, 'after_cursor_execute', _despues_de_sql)
+
+    if not app.config.get('PERFILADOR'):
+        return
+
+    @app.before_request
+    def _iniciar_perfil():
+        registro = Registro()
+        g._perfil = (registro, _registros.set(_registros.get() + (registro,)))
+
+    @app.teardown_request
+    def _reportar_perfil(error):
+        perfil = g.pop('_perfil', None)
+        if perfil is None:
+            return
+        registro, token = perfil
+        _registros.reset(token)
+        reportar(
+            registro,
+            f'{request.method} {request.path}',
+            repetidas=app.config.get('PERFILADOR_REPETIDAS', 5),
+            lenta_ms=app.config.get('PERFILADOR_LENTA_MS', 100),
+            explain=app.config.get('PERFILADOR_EXPLAIN', True),
+        )
@@ -0,0 +1,156 @@
+"""Pool de conexiones configurable y sus métricas por worker
+
+Las opciones del motor (tamaño, overflow, reciclado, pre-ping y
+statement_timeout) salen de variables de entorno DB_*. Con
+DB_PGBOUNCER=1 la app habla con PgBouncer en modo transacción: no se
+envían parámetros de arranque (PgBouncer los rechaza) y el
+statement_timeout se aplica con SET LOCAL al inicio de cada
+transacción. Con DB_POOL_SIZE=0 se usa NullPool y el pooling queda
+solo en PgBouncer.
+
+PoolMedido mide cuánto espera cada checkout; /api/health/pool devuelve
+las métricas del worker que atiende la petición.
+"""
+from sqlalchemy import event, text
+from sqlalchemy.pool import NullPool, QueuePool
+import os
+import threading
+import time
+
+
+class MetricasPool:
+    """Contadores de checkout del pool, compartidos por los hilos del worker"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self):
+        with self._lock:
+            self.checkouts = 0
+            self.esperando = 0
+            self.espera_total = 0.0
+            self.espera_maxima = 0.0
+            self.timeouts = 0
+            self.conexiones_creadas = 0
+
+    def inicio_espera(self):
+        with self._lock:
+            self.esperando += 1
+
+    def fin_espera(self, segundos, ok):
+        with self._lock:
+            self.esperando -= 1
+            if ok:
+                self.checkouts += 1
+                self.espera_total += segundos
+                self.espera_maxima = max(self.espera_maxima, segundos)
+            else:
+                self.timeouts += 1
+
+    def conexion_creada(self):
+        with self._lock:
+            self.conexiones_creadas += 1
+
+    def to_dict(self):
+        with self._lock:
+            promedio = self.espera_total / self.checkouts if self.checkouts else 0.0
+            return {
+                'checkouts': self.checkouts,
+                'esperando': self.esperando,
+                'espera_promedio_ms': round(promedio * 1000, 3),
+                'espera_maxima_ms': round(self.espera_maxima * 1000, 3),
+                'timeouts': self.timeouts,
+                'conexiones_creadas': self.conexiones_creadas,
+            }
+
+
+metricas = MetricasPool()
+
+
+class PoolMedido(QueuePool):
+    """QueuePool que registra el tiempo de espera de cada checkout"""
+
+    def _do_get(self):
+        metricas.inicio_espera()
+        inicio = time.perf_counter()
+        ok = False
+        try:
+            conexion = super()._do_get()
+            ok = True
+            return conexion
+        finally:
+            metricas.fin_espera(time.perf_counter() - inicio, ok)
+
+
+def _entero(nombre, defecto):
+    return int(os.getenv(nombre, defecto))
+
+
+def opciones_motor(uri):
+    """SQLALCHEMY_ENGINE_OPTIONS según la URL y las variables DB_*"""
+    if uri.startswith('sqlite') and ':memory:' in uri:
+        return {}
+
+    tamano = _entero('DB_POOL_SIZE', 5)
+    if tamano == 0:
+        opciones = {'poolclass': NullPool}
+    else:
+        opciones = {
+            'poolclass': PoolMedido,
+            'pool_size': tamano,
+            'max_overflow': _entero('DB_MAX_OVERFLOW', 10),
+            'pool_timeout': _entero('DB_POOL_TIMEOUT', 30),
+            'pool_recycle': _entero('DB_POOL_RECYCLE', 1800),
+            'pool_pre_ping': os.getenv('DB_POOL_PRE_PING', '1') == '1',
+        }
+
+    timeout_ms = _entero('DB_STATEMENT_TIMEOUT_MS', 0)
+    pgbouncer = os.getenv('DB_PGBOUNCER', '0') == '1'
+    if uri.startswith('postgresql') and timeout_ms and not pgbouncer:
+        opciones['connect_args'] = {'options': f'-c statement_timeout={timeout_ms}'}
+    return opciones
+
+
+def _fijar_timeout_por_transaccion(timeout_ms):
+    def _al_iniciar(conexion):
+        conexion.execute(text(f'SET LOCAL statement_timeout = {int(timeout_ms)}'))
+    return _al_iniciar
+
+
+def init_app(app):
+    """Registrar los eventos del motor de la app"""
+    from app import db
+
+    with app.app_context():
+        motor = db.engine
+
+    event.listen(motor, 'connect', lambda *args: metricas.conexion_creada())
+
+    timeout_ms = _entero('DB_STATEMENT_TIMEOUT_MS', 0)
+    if motor.dialect.name == 'postgresql' and timeout_ms and os.getenv('DB_PGBOUNCER', '0') == '1':
+        event.listen(motor, 'begin', _fijar_timeout_por_transaccion(timeout_ms))
+
+
+def estado(motor, opciones=None):
+    """Estado actual del pool de `motor` más las métricas acumuladas
+
+    `opciones` son las SQLALCHEMY_ENGINE_OPTIONS con las que se creó el
+    motor; de ahí sale max_overflow, que QueuePool no expone.
+    """
+    pool = motor.pool
+    datos = {
+        'pid': os.getpid(),
+        'clase': type(pool).__name__,
+    }
+    if isinstance(pool, QueuePool):
+        datos.update({
+            'tamano': pool.size(),
+            'en_uso': pool.checkedout(),
+            'libres': pool.checkedin(),
+            'overflow': max(pool.overflow(), 0),
+            'max_overflow': (opciones or {}).get('max_overflow'),
+            'timeout': pool.timeout(),
+        })
+    datos.update(metricas.to_dict())
+    return datos
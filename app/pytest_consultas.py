@@ -0,0 +1,50 @@
+"""Plugin de pytest: presupuesto de consultas SQL por endpoint
+
+Activarlo con `pytest -p app.pytest_consultas` o con
+`pytest_plugins = ['app.pytest_consultas']` en el conftest.py, como
+tests/conftest.py (que define las fixtures app, client y token usadas
+abajo; ver tests/test_presupuesto_consultas.py).
+
+    def test_listar_ventas(client, token, presupuesto_consultas):
+        with presupuesto_consultas(2):
+            client.get('/api/ventas/?limite=50', headers=token)
+
+    def test_sin_n_mas_1(client, token, presupuesto_consultas):
+        with presupuesto_consultas(10, repetidas=3):
+            client.get('/api/deudas/', headers=token)
+
+La prueba falla si el bloque ejecuta más de `maximo` sentencias o, con
+`repetidas`, si una misma sentencia se repite esas veces o más (N+1).
+El mensaje lista cada consulta con el archivo y línea de la app que la
+originó. Requiere que la app se haya creado con create_app() (registra
+los eventos del motor).
+"""
+from app import perfilador
+from contextlib import contextmanager
+import pytest
+
+
+@pytest.fixture
+def presupuesto_consultas():
+    """Context manager que falla la prueba si el bloque excede su presupuesto de consultas"""
+
+    @contextmanager
+    def _presupuesto(maximo, repetidas=None):
+        with perfilador.registrar() as registro:
+            yield registro
+
+        if len(registro) > maximo:
+            pytest.fail(
+                f'Presupuesto de consultas excedido: {len(registro)} > {maximo}\n{registro.resumen()}',
+                pytrace=False,
+            )
+        if repetidas is not None:
+            grupos = registro.repetidas(repetidas)
+            if grupos:
+                detalle = '\n'.join(
+                    f'  {veces}× {sentencia}\n    desde ' + '\n    desde '.join(sitios)
+                    for sentencia, veces, sitios in grupos
+                )
+                pytest.fail(f'Posible N+1 (sentencias repetidas {repetidas}+ veces):\n{detalle}', pytrace=False)
+
+    return _presupuesto
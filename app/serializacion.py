@@ -0,0 +1,190 @@
+"""Serialización rápida de listados
+
+- Proyeccion: lee solo las columnas que devuelve la API como tuplas
+  (sin crear objetos ORM ni pasar por el identity map) y arma los dicts
+  con el mismo formato que los to_dict() de los modelos.
+- ?fields=a,b,c recorta tanto las columnas del SELECT como el payload;
+  ?formato=compacto envía los nombres de columna una vez y cada fila
+  como lista.
+- ProveedorJSON: codifica las respuestas con orjson si está instalado;
+  si no, usa el json de la librería estándar como siempre.
+"""
+from flask.json.provider import DefaultJSONProvider
+from app import db
+from app.models import Deuda, Gasto, Inventario, Venta
+from datetime import datetime
+from sqlalchemy import select
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class ProveedorJSON(DefaultJSONProvider):
+    """Proveedor JSON de Flask que usa orjson cuando está disponible"""
+
+    def _orjson(self, obj):
+        opciones = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            opciones |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=self.default, option=opciones)
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return self._orjson(obj).decode()
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        return self._app.response_class(
+            self._orjson(self._prepare_response_obj(args, kwargs)),
+            mimetype=self.mimetype,
+        )
+
+
+def _iso(valor):
+    return valor.isoformat() if valor is not None else None
+
+
+def leer_campos(args, disponibles):
+    """Leer ?fields=a,b,c; None si no viene. Lanza ValueError con campos desconocidos"""
+    valor = args.get('fields')
+    if not valor:
+        return None
+    campos = list(dict.fromkeys(campo.strip() for campo in valor.split(',') if campo.strip()))
+    desconocidos = [campo for campo in campos if campo not in disponibles]
+    if desconocidos:
+        raise ValueError(
+            f'Campos desconocidos: {", ".join(desconocidos)}. Disponibles: {", ".join(disponibles)}'
+        )
+    return campos
+
+
+def es_compacto(args):
+    return args.get('formato') == 'compacto'
+
+
+def compactar(filas, campos):
+    """Formato compacto: {columnas: [...], filas: [[...], ...]}"""
+    return {
+        'columnas': list(campos),
+        'filas': [[fila.get(campo) for campo in campos] for fila in filas],
+    }
+
+
+def empaquetar(filas, campos, args, todos):
+    """Devolver las filas como lista de dicts o, con ?formato=compacto, compactadas"""
+    if es_compacto(args):
+        return compactar(filas, campos or todos)
+    return filas
+
+
+class Proyeccion:
+    """Columnas que lee un listado y campos calculados a partir de ellas
+
+    derivados es {campo: (dependencias, funcion(dict_fila))}; se aplican
+    en orden y pueden reemplazar un campo leído (p. ej. fecha -> texto
+    ISO). Con una lista de campos solo se leen las columnas necesarias.
+    """
+
+    def __init__(self, *columnas, derivados=None):
+        self.columnas = {columna.key: columna for columna in columnas}
+        self.derivados = derivados or {}
+        self.campos = tuple(dict.fromkeys([*self.columnas, *self.derivados]))
+
+    def _necesarias(self, campos):
+        necesarias = set()
+        for campo in campos:
+            if campo in self.derivados:
+                necesarias.update(self.derivados[campo][0])
+            if campo in self.columnas:
+                necesarias.add(campo)
+        return necesarias
+
+    def select(self, campos=None, incluir=()):
+        """SELECT de las columnas que hacen falta para `campos` (todas si es None)"""
+        if campos is None:
+            return select(*self.columnas.values())
+        necesarias = self._necesarias(campos) | set(incluir)
+        return select(*[columna for nombre, columna in self.columnas.items() if nombre in necesarias])
+
+    def convertir(self, filas, campos=None):
+        """Convertir filas (Row) en dicts con los `campos` pedidos"""
+        if not filas:
+            return []
+        nombres = filas[0]._fields
+        derivados = [
+            (campo, calcular) for campo, (_, calcular) in self.derivados.items()
+            if campos is None or campo in campos
+        ]
+
+        resultado = []
+        for fila in filas:
+            datos = dict(zip(nombres, fila))
+            for campo, calcular in derivados:
+                datos[campo] = calcular(datos)
+            if campos is not None:
+                datos = {campo: datos[campo] for campo in campos}
+            resultado.append(datos)
+        return resultado
+
+    def dicts(self, consulta, campos=None):
+        """Ejecutar `consulta` (creada con self.select()) y devolver dicts"""
+        return self.convertir(db.session.execute(consulta).all(), campos)
+
+
+PRODUCTO = Proyeccion(
+    Inventario.id, Inventario.nombre, Inventario.descripcion, Inventario.sku, Inventario.categoria,
+    Inventario.costo_unitario, Inventario.precio_venta, Inventario.cantidad_disponible,
+    derivados={
+        'ganancia_unitaria': (('precio_venta', 'costo_unitario'), lambda d: d['precio_venta'] - d['costo_unitario']),
+    },
+)
+
+# Lista de reposición: faltante = unidades para volver al mínimo
+REPOSICION = Proyeccion(
+    Inventario.id, Inventario.nombre, Inventario.sku, Inventario.categoria, Inventario.costo_unitario,
+    Inventario.cantidad_disponible, Inventario.cantidad_minima,
+    derivados={
+        'faltante': (('cantidad_disponible', 'cantidad_minima'), lambda d: d['cantidad_minima'] - d['cantidad_disponible']),
+    },
+)
+
+GASTO = Proyeccion(
+    Gasto.id, Gasto.descripcion, Gasto.categoria, Gasto.monto, Gasto.comprobante, Gasto.fecha_gasto,
+    derivados={
+        'fecha_gasto': (('fecha_gasto',), lambda d: _iso(d['fecha_gasto'])),
+    },
+)
+
+
+def _dias_vencimiento(datos):
+    if datos['fecha_vencimiento'] is None:
+        return None
+    return (datos['fecha_vencimiento'] - datetime.utcnow()).days
+
+
+DEUDA = Proyeccion(
+    Deuda.id, Deuda.cliente_nombre, Deuda.cliente_email, Deuda.monto_total, Deuda.monto_pagado,
+    Deuda.monto_pendiente, Deuda.estado, Deuda.descripcion, Deuda.fecha_vencimiento, Deuda.created_at,
+    derivados={
+        'dias_vencimiento': (('fecha_vencimiento',), _dias_vencimiento),
+        'fecha_vencimiento': (('fecha_vencimiento',), lambda d: _iso(d['fecha_vencimiento'])),
+        'created_at': (('created_at',), lambda d: _iso(d['created_at'])),
+    },
+)
+
+# Cabecera de una venta en los listados (sin notas ni impuesto); los items se agregan aparte
+VENTA = Proyeccion(
+    Venta.id, Venta.cliente_nombre, Venta.cliente_email, Venta.cliente_telefono,
+    Venta.subtotal, Venta.total, Venta.tipo_pago, Venta.estado, Venta.created_at,
+    derivados={
+        'cliente_email': (('cliente_email',), lambda d: d['cliente_email'] or ''),
+        'cliente_telefono': (('cliente_telefono',), lambda d: d['cliente_telefono'] or ''),
+        'subtotal': (('subtotal',), lambda d: float(d['subtotal']) if d['subtotal'] else 0),
+        'total': (('total',), lambda d: float(d['total'])),
+        'created_at': (('created_at',), lambda d: d['created_at'].isoformat() if d['created_at'] else ''),
+    },
+)
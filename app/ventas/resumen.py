@@ -0,0 +1,207 @@
+"""Series de ventas pre-agregadas (tabla venta_resumen)
+
+crear_venta y eliminar_venta suman o restan cada ticket a sus filas de
+día, semana y mes (total, por tipo de pago y por categoría) con un solo
+INSERT ... ON CONFLICT DO UPDATE en la misma transacción. Así un gráfico
+mensual de tres años lee unas decenas de filas en vez de recorrer
+venta y venta_item.
+
+La serie por categoría usa venta_item.categoria, la categoría del
+producto guardada al vender: al eliminar la venta se resta del mismo
+grupo aunque el producto haya cambiado de categoría o ya no exista.
+
+`flask ventas reconstruir-resumen` recalcula la tabla desde las ventas
+(backfill inicial o corrección). En PostgreSQL cada escritura toma un
+advisory lock compartido por empresa y la reconstrucción uno exclusivo:
+mientras se recalcula una empresa sus ventas esperan, así ningún delta
+confirmado a mitad de camino se pierde al reemplazar las filas.
+"""
+from app import db
+from app.models import Venta, VentaItem, VentaResumen
+from collections import defaultdict
+from datetime import timedelta
+from sqlalchemy import delete, func, insert, select, text
+
+PERIODOS = ('dia', 'semana', 'mes')
+DIMENSIONES = ('total', 'tipo_pago', 'categoria')
+
+SIN_CATEGORIA = 'sin categoría'
+FILAS_POR_INSERT = 1000
+
+# Primera mitad de la clave del advisory lock (la segunda es el empresa_id)
+CLAVE_BLOQUEO = 0x76727331
+
+
+def inicio_periodo(fecha, periodo):
+    """Primer día del periodo que contiene `fecha` (semanas de lunes a domingo)"""
+    dia = fecha.date() if hasattr(fecha, 'date') else fecha
+    if periodo == 'semana':
+        return dia - timedelta(days=dia.weekday())
+    if periodo == 'mes':
+        return dia.replace(day=1)
+    return dia
+
+
+def _acumular(acumulado, empresa_id, fecha, dimension, valor, ingresos, unidades, tickets):
+    for periodo in PERIODOS:
+        clave = (empresa_id, periodo, dimension, inicio_periodo(fecha, periodo), valor)
+        fila = acumulado[clave]
+        fila[0] += ingresos
+        fila[1] += unidades
+        fila[2] += tickets
+
+
+def _filas(acumulado):
+    return [
+        {
+            'empresa_id': empresa_id, 'periodo': periodo, 'dimension': dimension,
+            'inicio': inicio, 'valor': valor,
+            'ingresos': ingresos, 'unidades': unidades, 'tickets': tickets,
+        }
+        for (empresa_id, periodo, dimension, inicio, valor), (ingresos, unidades, tickets)
+        in sorted(acumulado.items())
+    ]
+
+
+def _bloquear(empresa_id, exclusivo=False):
+    """Advisory lock de la empresa hasta el fin de la transacción (solo PostgreSQL)"""
+    if db.session.get_bind().dialect.name != 'postgresql':
+        return
+    funcion = 'pg_advisory_xact_lock' if exclusivo else 'pg_advisory_xact_lock_shared'
+    db.session.execute(
+        text(f'SELECT {funcion}(:clave, :empresa_id)'),
+        {'clave': CLAVE_BLOQUEO, 'empresa_id': empresa_id}
+    )
+
+
+def _sumar(acumulado):
+    """Upsert atómico: col = col + delta (filas ordenadas para evitar deadlocks)"""
+    filas = _filas(acumulado)
+    if not filas:
+        return
+
+    # Compartido: las ventas no se bloquean entre sí, solo con reconstruir
+    for empresa_id in sorted({fila['empresa_id'] for fila in filas}):
+        _bloquear(empresa_id)
+
+    dialecto = db.session.get_bind().dialect.name
+    if dialecto == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as insert_dialecto
+    elif dialecto == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as insert_dialecto
+    else:
+        raise RuntimeError(f'Motor no soportado para venta_resumen: {dialecto}')
+
+    sentencia = insert_dialecto(VentaResumen).values(filas)
+    db.session.execute(sentencia.on_conflict_do_update(
+        index_elements=['empresa_id', 'periodo', 'dimension', 'inicio', 'valor'],
+        set_={
+            'ingresos': VentaResumen.ingresos + sentencia.excluded.ingresos,
+            'unidades': VentaResumen.unidades + sentencia.excluded.unidades,
+            'tickets': VentaResumen.tickets + sentencia.excluded.tickets,
+        }
+    ))
+
+
+def registrar_venta(venta, signo=1):
+    """Sumar (signo=1) o restar (signo=-1) una venta a las series"""
+    acumulado = defaultdict(lambda: [0.0, 0, 0])
+    fecha = venta.created_at
+    unidades = sum(item.cantidad for item in venta.items)
+    total = float(venta.total or 0)
+
+    _acumular(acumulado, venta.empresa_id, fecha, 'total', '', signo * total, signo * unidades, signo)
+    _acumular(acumulado, venta.empresa_id, fecha, 'tipo_pago', venta.tipo_pago or '',
+              signo * total, signo * unidades, signo)
+
+    por_categoria = defaultdict(lambda: [0.0, 0])
+    for item in venta.items:
+        categoria = item.categoria or SIN_CATEGORIA
+        por_categoria[categoria][0] += float(item.subtotal or 0)
+        por_categoria[categoria][1] += item.cantidad
+    for categoria, (ingresos, unidades_categoria) in por_categoria.items():
+        _acumular(acumulado, venta.empresa_id, fecha, 'categoria', categoria,
+                  signo * ingresos, signo * unidades_categoria, signo)
+
+    _sumar(acumulado)
+
+
+def mover_tipo_pago(venta, anterior):
+    """Pasar una venta de la serie de `anterior` a la de su tipo_pago actual"""
+    if (anterior or '') == (venta.tipo_pago or ''):
+        return
+    acumulado = defaultdict(lambda: [0.0, 0, 0])
+    total = float(venta.total or 0)
+    unidades = sum(item.cantidad for item in venta.items)
+    _acumular(acumulado, venta.empresa_id, venta.created_at, 'tipo_pago', anterior or '', -total, -unidades, -1)
+    _acumular(acumulado, venta.empresa_id, venta.created_at, 'tipo_pago', venta.tipo_pago or '', total, unidades, 1)
+    _sumar(acumulado)
+
+
+def serie(empresa_id, periodo='mes', dimension='total', desde=None, hasta=None):
+    """Filas de la serie ordenadas por inicio de periodo"""
+    consulta = VentaResumen.query.filter(
+        VentaResumen.empresa_id == empresa_id,
+        VentaResumen.periodo == periodo,
+        VentaResumen.dimension == dimension,
+        VentaResumen.tickets > 0,
+    )
+    if desde is not None:
+        consulta = consulta.filter(VentaResumen.inicio >= inicio_periodo(desde, periodo))
+    if hasta is not None:
+        consulta = consulta.filter(VentaResumen.inicio <= hasta)
+    return consulta.order_by(VentaResumen.inicio, VentaResumen.valor).all()
+
+
+def reconstruir(empresa_id=None):
+    """Recalcular venta_resumen desde venta y venta_item; devuelve filas escritas
+
+    Cada empresa se recalcula en su propia transacción con el advisory
+    lock exclusivo tomado antes de leer. En motores sin advisory locks
+    (SQLite, desarrollo) conviene correrlo sin ventas en curso.
+    """
+    from app.models import Empresa
+
+    if empresa_id is None:
+        empresa_ids = [fila[0] for fila in db.session.query(Empresa.id).order_by(Empresa.id)]
+    else:
+        empresa_ids = [empresa_id]
+
+    escritas = 0
+    for eid in empresa_ids:
+        acumulado = defaultdict(lambda: [0.0, 0, 0])
+        _bloquear(eid, exclusivo=True)
+
+        # Unidades por venta en la misma consulta, solo con items de esta empresa
+        ventas = db.session.execute(
+            select(Venta.created_at, Venta.total, Venta.tipo_pago, func.coalesce(func.sum(VentaItem.cantidad), 0))
+            .outerjoin(VentaItem, VentaItem.venta_id == Venta.id)
+            .where(Venta.empresa_id == eid)
+            .group_by(Venta.id, Venta.created_at, Venta.total, Venta.tipo_pago)
+            .execution_options(stream_results=True, yield_per=FILAS_POR_INSERT)
+        )
+        for created_at, total, tipo_pago, unidades in ventas:
+            total = float(total or 0)
+            _acumular(acumulado, eid, created_at, 'total', '', total, unidades, 1)
+            _acumular(acumulado, eid, created_at, 'tipo_pago', tipo_pago or '', total, unidades, 1)
+
+        # Igual que registrar_venta: la categoría guardada en el item, vacía o nula -> SIN_CATEGORIA
+        categoria = func.coalesce(func.nullif(VentaItem.categoria, ''), SIN_CATEGORIA)
+        categorias = db.session.execute(
+            select(Venta.created_at, categoria, func.sum(VentaItem.subtotal), func.sum(VentaItem.cantidad))
+            .join(VentaItem, VentaItem.venta_id == Venta.id)
+            .where(Venta.empresa_id == eid)
+            .group_by(Venta.id, Venta.created_at, categoria)
+            .execution_options(stream_results=True, yield_per=FILAS_POR_INSERT)
+        )
+        for created_at, valor, ingresos, unidades in categorias:
+            _acumular(acumulado, eid, created_at, 'categoria', valor, float(ingresos or 0), unidades, 1)
+
+        db.session.execute(delete(VentaResumen).where(VentaResumen.empresa_id == eid))
+        filas = _filas(acumulado)
+        for inicio in range(0, len(filas), FILAS_POR_INSERT):
+            db.session.execute(insert(VentaResumen), filas[inicio:inicio + FILAS_POR_INSERT])
+        db.session.commit()
+        escritas += len(filas)
+
+    return escritas
@@ -1,102 +1,274 @@
 """Routes de Ventas - CRUD completo con relación a Inventario y Deudas"""
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from app import db
-from app.models import Venta, VentaItem, Inventario, Usuario, Deuda
+from flask_jwt_extended import jwt_required, current_user
+from app import cache, db, serializacion
+from app.models import Venta, VentaItem, Inventario, Deuda
+from app.balance import ledger
+from app.inventario import stock
+from app.ventas import resumen
+from app.filtros import filtrar_rango_fechas, parsear_fecha
+from app.exportacion import parametros_exportacion, respuesta_exportacion
+from sqlalchemy import select
+from sqlalchemy import and_, or_
+from collections import defaultdict
 from datetime import datetime
+import base64
+import click
 
 ventas_bp = Blueprint('ventas', __name__)
 
+LIMITE_POR_DEFECTO = 50
+LIMITE_MAXIMO = 500
+
+
+def _codificar_cursor(created_at, venta_id):
+    """Codificar la posición (created_at, id) de la última venta de la página"""
+    crudo = f"{created_at.isoformat()}|{venta_id}"
+    return base64.urlsafe_b64encode(crudo.encode()).decode()
+
+
+def _decodificar_cursor(cursor):
+    """Decodificar un cursor; lanza ValueError si no es válido"""
+    try:
+        crudo = base64.urlsafe_b64decode(cursor.encode()).decode()
+        fecha, venta_id = crudo.split('|')
+        return datetime.fromisoformat(fecha), int(venta_id)
+    except Exception:
+        raise ValueError('Cursor inválido')
+
+
+def _filtrar_ventas(query, empresa_id, args):
+    """Aplicar los filtros de empresa, rango de fechas, estado y tipo de pago"""
+    query = query.filter(Venta.empresa_id == empresa_id)
+    query = filtrar_rango_fechas(query, Venta.created_at, args)
+    
+    if args.get('estado'):
+        query = query.filter(Venta.estado == args['estado'])
+    if args.get('tipo_pago'):
+        query = query.filter(Venta.tipo_pago == args['tipo_pago'])
+    
+    return query
+
+
+def _items_por_venta(items_query):
+    """Cargar items y nombres de producto en una sola consulta, agrupados por venta"""
+    filas = items_query.with_entities(
+        VentaItem.id,
+        VentaItem.venta_id,
+        VentaItem.inventario_id,
+        Inventario.nombre,
+        VentaItem.cantidad,
+        VentaItem.precio_unitario,
+        VentaItem.subtotal,
+    ).outerjoin(Inventario, Inventario.id == VentaItem.inventario_id) \
+        .order_by(VentaItem.venta_id, VentaItem.id)
+    
+    items = defaultdict(list)
+    for item_id, venta_id, inventario_id, nombre, cantidad, precio, subtotal in filas:
+        items[venta_id].append({
+            'id': item_id,
+            'venta_id': venta_id,
+            'inventario_id': inventario_id,
+            'producto_nombre': nombre if nombre else 'N/A',
+            'cantidad': cantidad,
+            'precio_unitario': float(precio),
+            'subtotal': float(subtotal)
+        })
+    return items
+
+
+CAMPOS_VENTA = serializacion.VENTA.campos + ('items',)
+
+
+def _ventas_a_dicts(filas, campos, items_query=None):
+    """Serializar filas de venta con el formato que espera el frontend
+
+    Con items_query se agrega a cada venta la lista de sus items.
+    """
+    ventas = serializacion.VENTA.convertir(filas, campos)
+    if items_query is not None:
+        items = _items_por_venta(items_query) if filas else {}
+        for fila, venta in zip(filas, ventas):
+            venta['items'] = items.get(fila.id, [])
+    return ventas
+
+
 @ventas_bp.route('/', methods=['GET'])
 @jwt_required()
 def listar_ventas():
-    """Listar todas las ventas de la empresa"""
+    """Listar ventas de la empresa
+    
+    Por defecto pagina con cursor sobre (created_at, id), de la más reciente
+    a la más antigua. Parámetros: limite, cursor, desde, hasta, estado,
+    tipo_pago, fields (p. ej. id,total,items) y formato=compacto. Con
+    ?todas=1 devuelve todas las ventas sin paginar.
+    """
     try:
-        usuario_id = get_jwt_identity()
-        usuario = Usuario.query.get(usuario_id)
-        
-        if not usuario:
-            return {'error': 'Usuario no encontrado'}, 404
-        
-        ventas = Venta.query.filter_by(empresa_id=usuario.empresa_id).all()
-        
-        resultado = []
-        for venta in ventas:
-            # Convertir items a dict
-            items_list = []
-            if hasattr(venta, 'items') and venta.items:
-                for item in venta.items:
-                    items_list.append({
-                        'id': item.id,
-                        'venta_id': item.venta_id,
-                        'inventario_id': item.inventario_id,
-                        'producto_nombre': item.inventario.nombre if item.inventario else 'N/A',
-                        'cantidad': item.cantidad,
-                        'precio_unitario': float(item.precio_unitario),
-                        'subtotal': float(item.subtotal)
-                    })
+        usuario = current_user
+        
+        args = request.args
+        try:
+            campos = serializacion.leer_campos(args, CAMPOS_VENTA)
+            ventas_query = _filtrar_ventas(
+                serializacion.VENTA.select(
+                    [c for c in campos if c != 'items'] if campos else None,
+                    incluir=('id', 'created_at')
+                ),
+                usuario.empresa_id, args
+            )
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        
+        campos_cabecera = [c for c in campos if c != 'items'] if campos else None
+        con_items = campos is None or 'items' in campos
+        
+        # Modo sin paginar (formato original)
+        if args.get('todas') in ('1', 'true'):
+            filas = db.session.execute(ventas_query.order_by(Venta.created_at, Venta.id)).all()
+            items_query = _filtrar_ventas(
+                db.session.query(VentaItem).join(Venta, Venta.id == VentaItem.venta_id),
+                usuario.empresa_id, args
+            ) if con_items else None
+            resultado = _ventas_a_dicts(filas, campos_cabecera, items_query)
             
-            venta_dict = {
-                'id': venta.id,
-                'cliente_nombre': venta.cliente_nombre,
-                'cliente_email': venta.cliente_email or '',
-                'cliente_telefono': getattr(venta, 'cliente_telefono', '') or '',
-                'subtotal': float(venta.subtotal) if venta.subtotal else 0,
-                'total': float(venta.total),
-                'tipo_pago': venta.tipo_pago,
-                'estado': venta.estado,
-                'created_at': venta.created_at.isoformat() if venta.created_at else '',
-                'items': items_list
-            }
-            resultado.append(venta_dict)
+            return {
+                'ventas': serializacion.empaquetar(resultado, campos, args, CAMPOS_VENTA),
+                'total': len(resultado)
+            }, 200
+        
+        # Modo paginado por cursor
+        try:
+            limite = min(max(int(args.get('limite', LIMITE_POR_DEFECTO)), 1), LIMITE_MAXIMO)
+        except ValueError:
+            return {'error': 'El límite debe ser un número entero'}, 400
+        
+        if args.get('cursor'):
+            try:
+                cursor_fecha, cursor_id = _decodificar_cursor(args['cursor'])
+            except ValueError as e:
+                return {'error': str(e)}, 400
+            ventas_query = ventas_query.filter(or_(
+                Venta.created_at < cursor_fecha,
+                and_(Venta.created_at == cursor_fecha, Venta.id < cursor_id)
+            ))
+        
+        # Se pide una fila extra para saber si hay otra página
+        filas = db.session.execute(
+            ventas_query.order_by(Venta.created_at.desc(), Venta.id.desc()).limit(limite + 1)
+        ).all()
+        hay_mas = len(filas) > limite
+        filas = filas[:limite]
+        items_query = db.session.query(VentaItem).filter(
+            VentaItem.venta_id.in_([f.id for f in filas])
+        ) if con_items else None
+        resultado = _ventas_a_dicts(filas, campos_cabecera, items_query)
+        
+        siguiente_cursor = None
+        if hay_mas:
+            ultima = filas[-1]
+            siguiente_cursor = _codificar_cursor(ultima.created_at, ultima.id)
         
         return {
-            'ventas': resultado,
-            'total': len(resultado)
+            'ventas': serializacion.empaquetar(resultado, campos, args, CAMPOS_VENTA),
+            'total': len(resultado),
+            'limite': limite,
+            'siguiente_cursor': siguiente_cursor
         }, 200
         
     except Exception as e:
         print(f"❌ Error en listar_ventas: {str(e)}")
         return {'error': str(e)}, 500
 
+def _lineas_del_pedido(data):
+    """Normalizar el pedido a {inventario_id: cantidad}
+    
+    Acepta un carrito ("items": [{inventario_id, cantidad}, ...]) o el
+    formato anterior de un solo producto (inventario_id + cantidad).
+    Las líneas repetidas del mismo producto se suman. Lanza ValueError
+    si alguna línea no es válida.
+    """
+    items = data.get('items')
+    if items is None:
+        items = [{'inventario_id': data.get('inventario_id'), 'cantidad': data.get('cantidad')}]
+    
+    if not isinstance(items, list) or not items:
+        raise ValueError('El carrito debe tener al menos un producto')
+    
+    lineas = {}
+    for item in items:
+        if not isinstance(item, dict) or not item.get('inventario_id') or not item.get('cantidad'):
+            raise ValueError('Faltan campos requeridos')
+        try:
+            inventario_id = int(item['inventario_id'])
+            cantidad = int(item['cantidad'])
+        except (TypeError, ValueError):
+            raise ValueError('inventario_id y cantidad deben ser números enteros')
+        if cantidad <= 0:
+            raise ValueError('La cantidad debe ser mayor a 0')
+        lineas[inventario_id] = lineas.get(inventario_id, 0) + cantidad
+    
+    return lineas
+
+
 @ventas_bp.route('/', methods=['POST'])
 @jwt_required()
 def crear_venta():
-    """Crear una nueva venta con validación de stock"""
+    """Crear una venta de uno o varios productos con validación de stock
+    
+    Todos los productos del carrito se cargan en una sola consulta y el
+    stock, la venta, sus items y la deuda (si es a crédito) se guardan
+    en una única transacción: o se registra el ticket completo o nada.
+    El stock se descuenta con un UPDATE condicional al final de la
+    transacción, así los bloqueos de fila duran lo mínimo.
+    """
     try:
-        usuario_id = get_jwt_identity()
-        usuario = Usuario.query.get(usuario_id)
-        
-        if not usuario:
-            return {'error': 'Usuario no encontrado'}, 404
+        usuario = current_user
+        usuario_id = usuario.id
         
         data = request.get_json()
         
         # Validaciones
-        inventario_id = data.get('inventario_id')
-        cantidad = data.get('cantidad')
         cliente_nombre = data.get('cliente_nombre')
         tipo_pago = data.get('tipo_pago', 'contado')
         
-        if not inventario_id or not cantidad or not cliente_nombre:
+        if not cliente_nombre:
             return {'error': 'Faltan campos requeridos'}, 400
         
-        # Verificar producto y stock
-        producto = Inventario.query.filter_by(
-            id=inventario_id,
-            empresa_id=usuario.empresa_id
-        ).first()
+        try:
+            lineas = _lineas_del_pedido(data)
+            impuesto_porcentaje = float(data.get('impuesto_porcentaje', 0) or 0)
+        except ValueError as e:
+            return {'error': str(e)}, 400
         
-        if not producto:
-            return {'error': 'Producto no encontrado'}, 404
+        if impuesto_porcentaje < 0:
+            return {'error': 'El impuesto no puede ser negativo'}, 400
         
-        cantidad = int(cantidad)
-        if producto.cantidad_disponible < cantidad:
-            return {'error': f'Stock insuficiente. Disponible: {producto.cantidad_disponible}'}, 400
-        
-        # Calcular totales
-        subtotal = producto.precio_venta * cantidad
-        ganancia = (producto.precio_venta - producto.costo_unitario) * cantidad
+        # Verificar productos y stock (una sola consulta IN)
+        productos = {
+            p.id: p for p in Inventario.query.filter(
+                Inventario.id.in_(list(lineas)),
+                Inventario.empresa_id == usuario.empresa_id
+            )
+        }
+        
+        faltantes = [inventario_id for inventario_id in lineas if inventario_id not in productos]
+        if faltantes:
+            return {'error': f'Producto no encontrado: {", ".join(str(i) for i in faltantes)}'}, 404
+        
+        # Validación rápida; la definitiva es el UPDATE condicional de stock.descontar
+        for inventario_id, cantidad in lineas.items():
+            producto = productos[inventario_id]
+            if producto.cantidad_disponible < cantidad:
+                return {'error': f'Stock insuficiente para {producto.nombre}. Disponible: {producto.cantidad_disponible}'}, 400
+        
+        # Calcular totales una sola vez para todo el ticket
+        subtotal = sum(productos[i].precio_venta * cantidad for i, cantidad in lineas.items())
+        ganancia = sum(
+            (productos[i].precio_venta - productos[i].costo_unitario) * cantidad
+            for i, cantidad in lineas.items()
+        )
+        impuesto = round(subtotal * impuesto_porcentaje / 100, 2)
+        total = subtotal + impuesto
         
         # Crear venta
         venta = Venta(
@@ -106,42 +278,63 @@ def crear_venta():
             cliente_email=data.get('cliente_email', ''),
             cliente_telefono=data.get('cliente_telefono', ''),
             subtotal=subtotal,
-            total=subtotal,
+            impuesto=impuesto,
+            total=total,
             tipo_pago=tipo_pago,
             estado='completada',
+            notas=data.get('notas'),
         )
         
-        db.session.add(venta)
-        db.session.flush()  # Para obtener el ID de la venta
-        
-        # Crear item de venta
-        venta_item = VentaItem(
-            venta_id=venta.id,
-            inventario_id=inventario_id,
-            cantidad=cantidad,
-            precio_unitario=producto.precio_venta,
-            subtotal=subtotal,
-        )
-        
-        db.session.add(venta_item)
+        # Crear items
+        for inventario_id, cantidad in lineas.items():
+            producto = productos[inventario_id]
+            venta.items.append(VentaItem(
+                inventario_id=inventario_id,
+                cantidad=cantidad,
+                precio_unitario=producto.precio_venta,
+                subtotal=producto.precio_venta * cantidad,
+                categoria=producto.categoria,
+            ))
         
-        # Descontar del inventario
-        producto.cantidad_disponible -= cantidad
+        db.session.add(venta)
         
-        # Si es crédito, crear deuda automáticamente
-        if tipo_pago == 'credito':
-            deuda = Deuda(
+        # Si es crédito, crear una sola deuda por el total del ticket
+        es_credito = tipo_pago == 'credito'
+        if es_credito:
+            if len(lineas) == 1:
+                inventario_id, cantidad = next(iter(lineas.items()))
+                descripcion = f'Venta de {cantidad} x {productos[inventario_id].nombre}'
+            else:
+                descripcion = f'Venta de {sum(lineas.values())} unidades ({len(lineas)} productos)'
+            venta.deuda = Deuda(
                 empresa_id=usuario.empresa_id,
-                venta_id=venta.id,
                 cliente_nombre=cliente_nombre,
                 cliente_email=data.get('cliente_email', ''),
-                monto_total=subtotal,
+                monto_total=total,
                 monto_pagado=0,
-                monto_pendiente=subtotal,
+                monto_pendiente=total,
                 estado='pendiente',
-                descripcion=f'Venta de {cantidad} x {producto.nombre}',
+                descripcion=descripcion,
             )
-            db.session.add(deuda)
+        
+        db.session.flush()
+        
+        # Descontar del inventario de forma atómica
+        sin_stock = stock.descontar(usuario.empresa_id, lineas)
+        if sin_stock:
+            db.session.rollback()
+            producto = db.session.get(Inventario, sin_stock[0])
+            return {'error': f'Stock insuficiente para {producto.nombre}. Disponible: {producto.cantidad_disponible}'}, 400
+        
+        # Actualizar totales del balance en la misma transacción
+        ledger.registrar(
+            usuario.empresa_id,
+            total_ingresos=total,
+            cantidad_ventas=1,
+            deudas_pendientes=total if es_credito else 0,
+            cantidad_deudas_pendientes=1 if es_credito else 0,
+        )
+        resumen.registrar_venta(venta)
         
         db.session.commit()
         
@@ -150,8 +343,11 @@ def crear_venta():
             'venta': {
                 'id': venta.id,
                 'cliente_nombre': venta.cliente_nombre,
+                'subtotal': float(venta.subtotal),
+                'impuesto': float(venta.impuesto),
                 'total': float(venta.total),
-                'tipo_pago': venta.tipo_pago
+                'tipo_pago': venta.tipo_pago,
+                'cantidad_items': len(lineas)
             },
             'ganancia': float(ganancia)
         }, 201
@@ -161,16 +357,91 @@ def crear_venta():
         print(f"❌ Error en crear_venta: {str(e)}")
         return {'error': str(e)}, 500
 
+@ventas_bp.route('/exportar', methods=['GET'])
+@jwt_required()
+def exportar_ventas():
+    """Exportar ventas en streaming (CSV o NDJSON, opcional gzip)
+    
+    Parámetros: formato, gzip, desde, hasta, estado, tipo_pago. Con
+    ?detalle=items se exporta una fila por item vendido.
+    """
+    try:
+        usuario = current_user
+        
+        formato, comprimir = parametros_exportacion(request.args)
+        
+        if request.args.get('detalle') == 'items':
+            columnas = ['venta_id', 'created_at', 'cliente_nombre', 'tipo_pago', 'estado',
+                        'inventario_id', 'producto_nombre', 'cantidad', 'precio_unitario', 'subtotal']
+            consulta = select(
+                Venta.id, Venta.created_at, Venta.cliente_nombre, Venta.tipo_pago, Venta.estado,
+                VentaItem.inventario_id, Inventario.nombre, VentaItem.cantidad,
+                VentaItem.precio_unitario, VentaItem.subtotal
+            ).join(VentaItem, VentaItem.venta_id == Venta.id) \
+                .outerjoin(Inventario, Inventario.id == VentaItem.inventario_id) \
+                .order_by(Venta.created_at, Venta.id, VentaItem.id)
+            nombre = 'ventas_items'
+        else:
+            columnas = ['id', 'created_at', 'cliente_nombre', 'cliente_email', 'cliente_telefono',
+                        'subtotal', 'impuesto', 'total', 'tipo_pago', 'estado']
+            consulta = select(
+                Venta.id, Venta.created_at, Venta.cliente_nombre, Venta.cliente_email,
+                Venta.cliente_telefono, Venta.subtotal, Venta.impuesto, Venta.total,
+                Venta.tipo_pago, Venta.estado
+            ).order_by(Venta.created_at, Venta.id)
+            nombre = 'ventas'
+        
+        consulta = _filtrar_ventas(consulta, usuario.empresa_id, request.args)
+        return respuesta_exportacion(consulta, columnas, nombre, formato, comprimir)
+        
+    except ValueError as e:
+        return {'error': str(e)}, 400
+    except Exception as e:
+        print(f"❌ Error en exportar_ventas: {str(e)}")
+        return {'error': str(e)}, 500
+
+@ventas_bp.route('/resumen', methods=['GET'])
+@jwt_required()
+@cache.cachear('ventas')
+def resumen_ventas():
+    """Serie de ventas por periodo desde la tabla pre-agregada
+    
+    ?periodo=dia|semana|mes (por defecto mes), ?por=tipo_pago|categoria
+    para separar la serie, ?desde= / ?hasta= en formato ISO.
+    """
+    try:
+        usuario = current_user
+        periodo = request.args.get('periodo', 'mes')
+        dimension = request.args.get('por', 'total')
+        
+        if periodo not in resumen.PERIODOS:
+            return {'error': 'Periodo inválido. Usa: dia, semana o mes'}, 400
+        if dimension not in resumen.DIMENSIONES:
+            return {'error': 'Dimensión inválida. Usa: tipo_pago o categoria'}, 400
+        
+        try:
+            desde = parsear_fecha(request.args['desde'], 'desde') if request.args.get('desde') else None
+            hasta = parsear_fecha(request.args['hasta'], 'hasta').date() if request.args.get('hasta') else None
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        
+        filas = resumen.serie(usuario.empresa_id, periodo, dimension, desde, hasta)
+        return {
+            'periodo': periodo,
+            'por': dimension,
+            'serie': [fila.to_dict() for fila in filas],
+        }, 200
+        
+    except Exception as e:
+        print(f"❌ Error en resumen_ventas: {str(e)}")
+        return {'error': str(e)}, 500
+
 @ventas_bp.route('/<int:venta_id>', methods=['GET'])
 @jwt_required()
 def obtener_venta(venta_id):
     """Obtener detalles de una venta"""
     try:
-        usuario_id = get_jwt_identity()
-        usuario = Usuario.query.get(usuario_id)
-        
-        if not usuario:
-            return {'error': 'Usuario no encontrado'}, 404
+        usuario = current_user
         
         venta = Venta.query.filter_by(
             id=venta_id,
@@ -191,11 +462,7 @@ def obtener_venta(venta_id):
 def actualizar_venta(venta_id):
     """Actualizar una venta"""
     try:
-        usuario_id = get_jwt_identity()
-        usuario = Usuario.query.get(usuario_id)
-        
-        if not usuario:
-            return {'error': 'Usuario no encontrado'}, 404
+        usuario = current_user
         
         data = request.get_json()
         
@@ -214,7 +481,9 @@ def actualizar_venta(venta_id):
         if 'cliente_telefono' in data:
             venta.cliente_telefono = data['cliente_telefono']
         if 'tipo_pago' in data:
+            tipo_pago_anterior = venta.tipo_pago
             venta.tipo_pago = data['tipo_pago']
+            resumen.mover_tipo_pago(venta, tipo_pago_anterior)
         if 'estado' in data:
             venta.estado = data['estado']
         
@@ -235,11 +504,7 @@ def actualizar_venta(venta_id):
 def eliminar_venta(venta_id):
     """Eliminar una venta y revertir stock"""
     try:
-        usuario_id = get_jwt_identity()
-        usuario = Usuario.query.get(usuario_id)
-        
-        if not usuario:
-            return {'error': 'Usuario no encontrado'}, 404
+        usuario = current_user
         
         venta = Venta.query.filter_by(
             id=venta_id,
@@ -250,19 +515,29 @@ def eliminar_venta(venta_id):
             return {'error': 'Venta no encontrada'}, 404
         
         # Revertir stock de todos los items
+        devoluciones = defaultdict(int)
         for item in venta.items:
-            producto = Inventario.query.get(item.inventario_id)
-            if producto:
-                producto.cantidad_disponible += item.cantidad
-                db.session.add(producto)
+            devoluciones[item.inventario_id] += item.cantidad
+        stock.reponer(usuario.empresa_id, devoluciones)
         
         # Eliminar deuda asociada si existe
         deuda = Deuda.query.filter_by(venta_id=venta_id).first()
+        monto_deuda, cantidad_deuda = ledger.aporte_deuda(deuda)
         if deuda:
             db.session.delete(deuda)
         
         # Eliminar venta
+        total_venta = float(venta.total or 0)
+        resumen.registrar_venta(venta, signo=-1)
         db.session.delete(venta)
+        
+        ledger.registrar(
+            usuario.empresa_id,
+            total_ingresos=-total_venta,
+            cantidad_ventas=-1,
+            deudas_pendientes=-monto_deuda,
+            cantidad_deudas_pendientes=-cantidad_deuda,
+        )
         db.session.commit()
         
         return {'message': 'Venta eliminada y stock revertido'}, 200
@@ -271,3 +546,11 @@ def eliminar_venta(venta_id):
         db.session.rollback()
         print(f"❌ Error en eliminar_venta: {str(e)}")
         return {'error': str(e)}, 500
+
+
+@ventas_bp.cli.command('reconstruir-resumen')
+@click.option('--empresa-id', type=int, default=None, help='Reconstruir solo esta empresa')
+def reconstruir_resumen_cli(empresa_id):
+    """Recalcular venta_resumen (series por día, semana y mes) desde las ventas"""
+    filas = resumen.reconstruir(empresa_id=empresa_id)
+    click.echo(f"✅ venta_resumen reconstruida: {filas} filas")
@@ -0,0 +1,5 @@
+"""Benchmarks y pruebas de carga de DALU PRO
+
+Scripts pensados para correr contra una instancia local (gunicorn o
+flask run) con PostgreSQL. No forman parte de la app en producción.
+"""
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+"""
+Tiempo de arranque de un worker
+
+Mide en procesos nuevos (sin caché de imports) cuánto tarda importar la
+app, crear la app con create_app() y responder la primera petición a
+la API y a una página con plantilla. Imprime la mediana de N corridas.
+
+Uso:
+    FLASK_ENV=production python -m benchmarks.arranque --corridas 10
+    PRECOMPILAR_PLANTILLAS=1 python -m benchmarks.arranque --precalentar
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Código que corre en cada proceso hijo; imprime una línea JSON con tiempos
+_MEDICION = r'''
+import json, os, time
+inicio = time.perf_counter()
+from app import create_app
+importado = time.perf_counter()
+app = create_app(os.getenv('FLASK_ENV', 'development'))
+creado = time.perf_counter()
+if os.getenv('BENCH_PRECALENTAR') == '1':
+    from app.arranque import precalentar
+    precalentar(app)
+precalentado = time.perf_counter()
+cliente = app.test_client()
+cliente.get('/api/health')
+api = time.perf_counter()
+cliente.get('/login')
+pagina = time.perf_counter()
+print(json.dumps({
+    'importar': importado - inicio,
+    'create_app': creado - importado,
+    'precalentar': precalentado - creado,
+    'primera_api': api - precalentado,
+    'primera_pagina': pagina - api,
+    'total': pagina - inicio,
+}))
+'''
+
+
+def medir(corridas, precalentar):
+    entorno = dict(os.environ, BENCH_PRECALENTAR='1' if precalentar else '0')
+    resultados = []
+    for _ in range(corridas):
+        salida = subprocess.run(
+            [sys.executable, '-c', _MEDICION],
+            capture_output=True, text=True, env=entorno, check=True,
+        )
+        resultados.append(json.loads(salida.stdout.strip().splitlines()[-1]))
+    return {
+        fase: round(statistics.median(r[fase] for r in resultados) * 1000, 1)
+        for fase in resultados[0]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--corridas', type=int, default=5)
+    parser.add_argument('--precalentar', action='store_true', help='Llamar a app.arranque.precalentar antes de medir')
+    args = parser.parse_args()
+
+    mediana_ms = medir(args.corridas, args.precalentar)
+    print(json.dumps({
+        'flask_env': os.getenv('FLASK_ENV', 'development'),
+        'corridas': args.corridas,
+        'mediana_ms': mediana_ms,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,321 @@
+#!/usr/bin/env python
+"""
+Benchmark de endpoints con comparación contra una línea base
+
+Recorre los endpoints de todos los blueprints (auth, inventario,
+ventas, gastos, deudas, balance) y reporta por endpoint: peticiones
+por segundo, latencia p50/p95/p99, errores y consultas SQL por
+petición, en JSON.
+
+Dos modos:
+- En proceso (por defecto): Flask test client contra --database-url.
+  Las consultas se cuentan con app.perfilador. Sin --database-url crea
+  una BD SQLite temporal con benchmarks.datos.
+- HTTP (--url): contra un gunicorn local, con --concurrencia hilos. Las
+  consultas salen de la diferencia de /api/metrics antes y después de
+  cada endpoint (suma de todos los workers).
+
+Con --base base.json compara contra una corrida anterior y termina con
+código 1 si algún endpoint empeoró: p95 más de --tolerancia (y más de
+--margen-ms), más consultas por petición o errores nuevos.
+--guardar-base escribe la corrida actual como nueva línea base.
+
+Uso:
+    python -m benchmarks.endpoints --peticiones 200 --guardar-base benchmarks/base.json
+    python -m benchmarks.endpoints --peticiones 200 --base benchmarks/base.json
+    python -m benchmarks.endpoints --url http://localhost:5000 --concurrencia 16 \\
+        --usuario bench1 --password bench123 --peticiones 2000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+# (nombre, método, ruta, cuerpo); {producto}, {venta} y las fechas salen de _preparar_contexto
+ESCENARIOS = (
+    ('auth.verify', 'GET', '/api/auth/verify', None),
+    ('auth.login', 'POST', '/api/auth/login', 'login'),
+    ('inventario.listar', 'GET', '/api/inventario/', None),
+    ('inventario.listar_campos', 'GET', '/api/inventario/?fields=id,nombre,precio_venta,cantidad_disponible', None),
+    ('inventario.obtener', 'GET', '/api/inventario/{producto}', None),
+    ('inventario.buscar', 'GET', '/api/inventario/buscar?q=producto+12&limite=20&fields=id,nombre,precio_venta,cantidad_disponible', None),
+    ('inventario.sku', 'GET', '/api/inventario/sku/{sku}', None),
+    ('inventario.reposicion', 'GET', '/api/inventario/reposicion', None),
+    ('inventario.reposicion_novedades', 'GET', '/api/inventario/reposicion/novedades?desde=0&limite=100', None),
+    ('ventas.listar_pagina', 'GET', '/api/ventas/?limite=50', None),
+    ('ventas.listar_compacto', 'GET', '/api/ventas/?limite=200&formato=compacto', None),
+    ('ventas.obtener', 'GET', '/api/ventas/{venta}', None),
+    ('ventas.resumen_mes', 'GET', '/api/ventas/resumen?periodo=mes', None),
+    ('ventas.resumen_categoria', 'GET', '/api/ventas/resumen?periodo=semana&por=categoria', None),
+    ('ventas.exportar_mes', 'GET', '/api/ventas/exportar?formato=ndjson&desde={hace_30_dias}', None),
+    ('ventas.crear', 'POST', '/api/ventas/', 'venta'),
+    ('gastos.listar_mes', 'GET', '/api/gastos/?desde={hace_30_dias}', None),
+    ('gastos.totales', 'GET', '/api/gastos/totales?desde={hace_365_dias}', None),
+    ('gastos.crear', 'POST', '/api/gastos/', 'gasto'),
+    ('deudas.listar', 'GET', '/api/deudas/', None),
+    ('deudas.antiguedad', 'GET', '/api/deudas/antiguedad', None),
+    ('balance.obtener', 'GET', '/api/balance/', None),
+)
+
+
+def percentil(valores, p):
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))
+    return ordenados[indice]
+
+
+class ClienteLocal:
+    """Flask test client; cuenta consultas con el perfilador"""
+
+    concurrente = False
+
+    def __init__(self, app):
+        self.app = app
+        self.cliente = app.test_client()
+        self.encabezados = {}
+
+    def pedir(self, metodo, ruta, cuerpo=None):
+        from app import perfilador
+
+        with perfilador.registrar() as registro:
+            respuesta = self.cliente.open(ruta, method=metodo, json=cuerpo, headers=self.encabezados)
+            respuesta.get_data()
+        return respuesta.status_code, respuesta.get_json(silent=True), len(registro)
+
+    def consultas_totales(self):
+        return None
+
+
+class ClienteHTTP:
+    """requests contra una instancia en marcha; una sesión por hilo"""
+
+    concurrente = True
+
+    def __init__(self, url):
+        import requests
+
+        self.url = url.rstrip('/')
+        self._requests = requests
+        self._local = threading.local()
+        self.encabezados = {}
+
+    def _sesion(self):
+        if not hasattr(self._local, 'sesion'):
+            self._local.sesion = self._requests.Session()
+        return self._local.sesion
+
+    def pedir(self, metodo, ruta, cuerpo=None):
+        respuesta = self._sesion().request(metodo, self.url + ruta, json=cuerpo, headers=self.encabezados)
+        try:
+            datos = respuesta.json()
+        except ValueError:
+            datos = None
+        return respuesta.status_code, datos, None
+
+    def consultas_totales(self):
+        """(suma de consultas, peticiones) de /api/metrics, sin contar el propio scrape"""
+        texto = self._sesion().get(self.url + '/api/metrics', headers=self.encabezados).text
+        totales = {'_sum': 0.0, '_count': 0.0}
+        for linea in texto.splitlines():
+            if not linea.startswith('dalu_sql_queries_per_request_') or 'endpoint="metrics"' in linea:
+                continue
+            nombre, _, valor = linea.rpartition(' ')
+            for sufijo in totales:
+                if nombre.startswith(f'dalu_sql_queries_per_request{sufijo}{{'):
+                    totales[sufijo] += float(valor)
+        return totales['_sum'], totales['_count']
+
+
+def _cuerpo(tipo, contexto, numero):
+    if tipo == 'login':
+        return {'username': contexto['usuario'], 'password': contexto['password']}
+    if tipo == 'venta':
+        return {'inventario_id': contexto['producto'], 'cantidad': 1, 'cliente_nombre': f'Bench {numero}'}
+    if tipo == 'gasto':
+        return {'descripcion': f'Gasto bench {numero}', 'monto': 1000, 'categoria': 'servicios'}
+    return None
+
+
+def _preparar_contexto(cliente, usuario, password):
+    estado, datos, _ = cliente.pedir('POST', '/api/auth/login', {'username': usuario, 'password': password})
+    if estado != 200:
+        sys.exit(f'❌ Login falló ({estado}): {datos}')
+    cliente.encabezados = {'Authorization': f"Bearer {datos['access_token']}"}
+
+    _, datos, _ = cliente.pedir('GET', '/api/inventario/?fields=id,sku,cantidad_disponible')
+    productos = datos['productos'] if datos else []
+    _, datos, _ = cliente.pedir('GET', '/api/ventas/?limite=1&fields=id')
+    ventas = datos['ventas'] if datos else []
+    if not productos or not ventas:
+        sys.exit('❌ La empresa no tiene productos o ventas: generar datos con benchmarks.datos')
+
+    hoy = datetime.utcnow().date()
+    # El de más stock, para que las ventas del benchmark no se queden sin unidades
+    producto = max(productos, key=lambda p: p['cantidad_disponible'])
+    return {
+        'usuario': usuario,
+        'password': password,
+        'producto': producto['id'],
+        'sku': producto['sku'],
+        'venta': ventas[0]['id'],
+        'hace_30_dias': (hoy - timedelta(days=30)).isoformat(),
+        'hace_365_dias': (hoy - timedelta(days=365)).isoformat(),
+    }
+
+
+def medir(cliente, contexto, peticiones, concurrencia, calentamiento, filtro=None):
+    resultados = {}
+    for nombre, metodo, ruta, tipo_cuerpo in ESCENARIOS:
+        if filtro and not any(parte in nombre for parte in filtro):
+            continue
+        ruta = ruta.format(**contexto)
+
+        for numero in range(calentamiento):
+            cliente.pedir(metodo, ruta, _cuerpo(tipo_cuerpo, contexto, numero))
+
+        antes = cliente.consultas_totales()
+        latencias, consultas, errores = [], [], 0
+
+        def una(numero):
+            inicio = time.perf_counter()
+            estado, _, cantidad = cliente.pedir(metodo, ruta, _cuerpo(tipo_cuerpo, contexto, numero))
+            return time.perf_counter() - inicio, estado, cantidad
+
+        inicio = time.perf_counter()
+        if cliente.concurrente and concurrencia > 1:
+            with ThreadPoolExecutor(concurrencia) as ejecutor:
+                medidas = list(ejecutor.map(una, range(peticiones)))
+        else:
+            medidas = [una(numero) for numero in range(peticiones)]
+        segundos = time.perf_counter() - inicio
+
+        for duracion, estado, cantidad in medidas:
+            latencias.append(duracion * 1000)
+            errores += estado >= 400
+            if cantidad is not None:
+                consultas.append(cantidad)
+
+        if antes is not None:
+            despues = cliente.consultas_totales()
+            contadas = despues[1] - antes[1]
+            por_peticion = (despues[0] - antes[0]) / contadas if contadas else None
+        else:
+            por_peticion = sum(consultas) / len(consultas) if consultas else None
+
+        resultados[nombre] = {
+            'peticiones': peticiones,
+            'errores': errores,
+            'rps': round(peticiones / segundos, 1) if segundos else None,
+            'p50_ms': round(percentil(latencias, 50), 2),
+            'p95_ms': round(percentil(latencias, 95), 2),
+            'p99_ms': round(percentil(latencias, 99), 2),
+            'consultas_por_peticion': round(por_peticion, 2) if por_peticion is not None else None,
+        }
+        print(f"  • {nombre}: p95 {resultados[nombre]['p95_ms']} ms, "
+              f"{resultados[nombre]['consultas_por_peticion']} consultas", file=sys.stderr)
+    return resultados
+
+
+def comparar(actual, base, tolerancia, margen_ms):
+    """Lista de regresiones de `actual` respecto de `base`"""
+    regresiones = []
+    for nombre, anterior in base.items():
+        ahora = actual.get(nombre)
+        if ahora is None:
+            continue
+        limite = max(anterior['p95_ms'] * (1 + tolerancia), anterior['p95_ms'] + margen_ms)
+        if ahora['p95_ms'] > limite:
+            regresiones.append({'endpoint': nombre, 'metrica': 'p95_ms', 'base': anterior['p95_ms'], 'actual': ahora['p95_ms']})
+        if (ahora['consultas_por_peticion'] or 0) > (anterior['consultas_por_peticion'] or 0) + 0.5:
+            regresiones.append({
+                'endpoint': nombre, 'metrica': 'consultas_por_peticion',
+                'base': anterior['consultas_por_peticion'], 'actual': ahora['consultas_por_peticion'],
+            })
+        if ahora['errores'] and not anterior['errores']:
+            regresiones.append({'endpoint': nombre, 'metrica': 'errores', 'base': 0, 'actual': ahora['errores']})
+    return regresiones
+
+
+def _cliente_local(args):
+    if not args.database_url:
+        carpeta = tempfile.mkdtemp(prefix='dalu-bench-')
+        args.database_url = f"sqlite:///{os.path.join(carpeta, 'bench.db')}"
+        generar = True
+    else:
+        generar = False
+
+    os.environ['DATABASE_URL'] = args.database_url
+    os.environ.setdefault('FLASK_ENV', 'production')
+    os.environ.setdefault('CREAR_TABLAS', '1')
+    os.environ.setdefault('ESTATICOS_CONSTRUIDOS', '0')
+    if not args.con_cache:
+        os.environ['RESPUESTAS_CACHE_BACKEND'] = 'off'
+
+    from app import create_app
+
+    app = create_app()
+    if generar:
+        from benchmarks.datos import generar as generar_datos
+
+        print('📦 Generando datos en SQLite temporal...', file=sys.stderr)
+        with app.app_context():
+            generar_datos(productos=500, ventas=5000, gastos=1000, deudas=1000, password=args.password,
+                          avisar=lambda texto: print(texto, file=sys.stderr))
+    return ClienteLocal(app)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help='Instancia en marcha (modo HTTP)')
+    parser.add_argument('--database-url', default=os.getenv('DATABASE_URL'), help='BD para el modo en proceso')
+    parser.add_argument('--usuario', default='bench1')
+    parser.add_argument('--password', default='bench123')
+    parser.add_argument('--peticiones', type=int, default=100, help='Peticiones medidas por endpoint')
+    parser.add_argument('--calentamiento', type=int, default=5)
+    parser.add_argument('--concurrencia', type=int, default=1, help='Hilos en modo HTTP')
+    parser.add_argument('--solo', nargs='*', help='Endpoints cuyo nombre contenga alguno de estos textos')
+    parser.add_argument('--con-cache', action='store_true', help='No desactivar la caché de respuestas (en proceso)')
+    parser.add_argument('--base', help='JSON de una corrida anterior para comparar')
+    parser.add_argument('--guardar-base', help='Guardar esta corrida como línea base')
+    parser.add_argument('--tolerancia', type=float, default=0.2, help='Aumento de p95 permitido (0.2 = 20 %%)')
+    parser.add_argument('--margen-ms', type=float, default=2.0, help='Aumento de p95 ignorado en ms absolutos')
+    args = parser.parse_args()
+
+    cliente = ClienteHTTP(args.url) if args.url else _cliente_local(args)
+    contexto = _preparar_contexto(cliente, args.usuario, args.password)
+    resultados = medir(cliente, contexto, args.peticiones, args.concurrencia, args.calentamiento, args.solo)
+
+    salida = {
+        'modo': 'http' if args.url else 'en_proceso',
+        'fecha': datetime.utcnow().isoformat(timespec='seconds'),
+        'peticiones': args.peticiones,
+        'concurrencia': args.concurrencia if args.url else 1,
+        'endpoints': resultados,
+    }
+
+    regresiones = []
+    if args.base:
+        with open(args.base) as archivo:
+            base = json.load(archivo)
+        regresiones = comparar(resultados, base['endpoints'], args.tolerancia, args.margen_ms)
+        salida['regresiones'] = regresiones
+
+    if args.guardar_base:
+        with open(args.guardar_base, 'w') as archivo:
+            json.dump({k: v for k, v in salida.items() if k != 'regresiones'}, archivo, indent=2)
+
+    print(json.dumps(salida, indent=2, ensure_ascii=False))
+    if regresiones:
+        print(f'❌ {len(regresiones)} regresiones respecto de {args.base}', file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
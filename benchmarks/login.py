@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+"""
+Rendimiento de /api/auth/login bajo una ráfaga de inicios de sesión
+
+Simula el cambio de turno: --concurrencia clientes inician sesión a la
+vez (--logins en total) mientras otro hilo consulta /api/health sin
+parar. Reporta logins por segundo, latencia p50/p95 del login con
+usuario existente y con usuario inexistente (deberían ser parecidas: si
+no, el tiempo revela qué usuarios existen), 503 por cola llena y la
+latencia de /api/health durante la ráfaga (el hash no debe dejar sin
+CPU al resto de las peticiones).
+
+En proceso usa el Flask test client con hilos (como un worker gthread)
+y una BD SQLite temporal; con --url corre contra una instancia en
+marcha que tenga el usuario --usuario/--password.
+
+Uso:
+    python -m benchmarks.login --metodo scrypt:32768:8:1 --hilos-hash 2 --concurrencia 32
+    python -m benchmarks.login --metodo pbkdf2:sha256:600000 --logins 400
+    python -m benchmarks.login --url http://localhost:5000 --usuario bench1 --password bench123
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _percentil(valores, p):
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))
+    return ordenados[indice]
+
+
+def _resumen(latencias):
+    return {
+        'cantidad': len(latencias),
+        'p50_ms': round(_percentil(latencias, 50), 1),
+        'p95_ms': round(_percentil(latencias, 95), 1),
+    }
+
+
+def _pedidor_local(args):
+    carpeta = tempfile.mkdtemp(prefix='dalu-bench-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(carpeta, 'bench.db')}"
+    os.environ.setdefault('FLASK_ENV', 'production')
+    os.environ.setdefault('CREAR_TABLAS', '1')
+    os.environ.setdefault('ESTATICOS_CONSTRUIDOS', '0')
+    if args.metodo:
+        os.environ['PASSWORD_HASH_METODO'] = args.metodo
+    if args.hilos_hash:
+        os.environ['PASSWORD_HASH_HILOS'] = str(args.hilos_hash)
+    if args.cola is not None:
+        os.environ['PASSWORD_HASH_COLA'] = str(args.cola)
+
+    from app import create_app
+
+    app = create_app()
+    app.test_client().post('/api/auth/registro', json={
+        'username': args.usuario, 'email': f'{args.usuario}@dalu.local', 'password': args.password,
+        'empresa_nombre': f'Bench login {args.usuario}',
+    })
+    local = threading.local()
+
+    def pedir(metodo, ruta, cuerpo=None):
+        if not hasattr(local, 'cliente'):
+            local.cliente = app.test_client()
+        return local.cliente.open(ruta, method=metodo, json=cuerpo).status_code
+
+    return pedir, app.config['PASSWORD_HASH_METODO']
+
+
+def _pedidor_http(args):
+    import requests
+
+    local = threading.local()
+
+    def pedir(metodo, ruta, cuerpo=None):
+        if not hasattr(local, 'sesion'):
+            local.sesion = requests.Session()
+        return local.sesion.request(metodo, args.url.rstrip('/') + ruta, json=cuerpo).status_code
+
+    return pedir, 'remoto'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help='Instancia en marcha (por defecto, en proceso)')
+    parser.add_argument('--usuario', default='cajero')
+    parser.add_argument('--password', default='cajero123')
+    parser.add_argument('--metodo', help='PASSWORD_HASH_METODO (en proceso)')
+    parser.add_argument('--hilos-hash', type=int, help='PASSWORD_HASH_HILOS (en proceso)')
+    parser.add_argument('--cola', type=int, help='PASSWORD_HASH_COLA (en proceso)')
+    parser.add_argument('--concurrencia', type=int, default=16)
+    parser.add_argument('--logins', type=int, default=200)
+    args = parser.parse_args()
+
+    pedir, metodo = _pedidor_http(args) if args.url else _pedidor_local(args)
+
+    # Calentamiento: calcula el hash ficticio y abre conexiones
+    pedir('POST', '/api/auth/login', {'username': args.usuario, 'password': args.password})
+    pedir('POST', '/api/auth/login', {'username': 'no-existe', 'password': 'x'})
+
+    latencias = {'existente': [], 'inexistente': []}
+    estados = {}
+    salud = []
+    terminado = threading.Event()
+
+    def sondear():
+        while not terminado.is_set():
+            inicio = time.perf_counter()
+            pedir('GET', '/api/health')
+            salud.append((time.perf_counter() - inicio) * 1000)
+            time.sleep(0.005)
+
+    def login(numero):
+        # Uno de cada cuatro con un usuario que no existe
+        tipo = 'inexistente' if numero % 4 == 3 else 'existente'
+        usuario = args.usuario if tipo == 'existente' else f'no-existe-{numero}'
+        inicio = time.perf_counter()
+        estado = pedir('POST', '/api/auth/login', {'username': usuario, 'password': args.password})
+        return tipo, estado, (time.perf_counter() - inicio) * 1000
+
+    sonda = threading.Thread(target=sondear, daemon=True)
+    sonda.start()
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(args.concurrencia) as ejecutor:
+        resultados = list(ejecutor.map(login, range(args.logins)))
+    segundos = time.perf_counter() - inicio
+    terminado.set()
+    sonda.join()
+
+    for tipo, estado, duracion in resultados:
+        estados[estado] = estados.get(estado, 0) + 1
+        if estado in (200, 401):
+            latencias[tipo].append(duracion)
+
+    existente = _resumen(latencias['existente'])
+    inexistente = _resumen(latencias['inexistente'])
+    print(json.dumps({
+        'metodo': metodo,
+        'concurrencia': args.concurrencia,
+        'logins': args.logins,
+        'segundos': round(segundos, 2),
+        'logins_por_segundo': round(args.logins / segundos, 1),
+        'estados': {str(estado): cantidad for estado, cantidad in sorted(estados.items())},
+        'usuario_existente': existente,
+        'usuario_inexistente': inexistente,
+        'diferencia_p50_ms': round(abs(existente['p50_ms'] - inexistente['p50_ms']), 1),
+        'health_durante_rafaga': {
+            **_resumen(salud),
+            'media_ms': round(statistics.mean(salud), 1) if salud else None,
+        },
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
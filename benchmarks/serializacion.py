@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+"""
+Micro-benchmark de serialización de listados
+
+Compara, para Inventario, Venta, Gasto y Deuda, el camino con objetos
+ORM + to_dict() + json de la librería estándar contra la proyección de
+columnas (app.serializacion) + el proveedor JSON de la app (orjson si
+está instalado). Usa una BD SQLite temporal con datos sintéticos.
+
+Uso:
+    python -m benchmarks.serializacion --filas 20000 --repeticiones 5
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+
+def _preparar_bd(filas):
+    from app import db
+    from app.models import Deuda, Empresa, Gasto, Inventario, Usuario, Venta, VentaItem
+    from sqlalchemy import insert
+
+    db.session.add(Empresa(id=1, nombre='Bench', nit='BENCH-1'))
+    db.session.add(Usuario(id=1, username='bench', email='bench@dalu.local', password_hash='x', empresa_id=1))
+    db.session.flush()
+
+    ahora = datetime.utcnow()
+    db.session.execute(insert(Inventario), [
+        {'id': i, 'empresa_id': 1, 'nombre': f'Producto {i}', 'descripcion': 'Descripción larga ' * 10,
+         'sku': f'SKU-{i}', 'categoria': f'cat-{i % 20}', 'costo_unitario': 10.0, 'precio_venta': 15.0,
+         'cantidad_disponible': 100, 'cantidad_minima': 5}
+        for i in range(1, filas + 1)
+    ])
+    db.session.execute(insert(Venta), [
+        {'id': i, 'empresa_id': 1, 'usuario_id': 1, 'cliente_nombre': f'Cliente {i}', 'subtotal': 30.0,
+         'impuesto': 0.0, 'total': 30.0, 'tipo_pago': 'contado', 'estado': 'completada',
+         'notas': 'Notas ' * 20, 'created_at': ahora - timedelta(minutes=i)}
+        for i in range(1, filas + 1)
+    ])
+    db.session.execute(insert(VentaItem), [
+        {'venta_id': i, 'inventario_id': i, 'cantidad': 2, 'precio_unitario': 15.0, 'subtotal': 30.0}
+        for i in range(1, filas + 1)
+    ])
+    db.session.execute(insert(Gasto), [
+        {'empresa_id': 1, 'usuario_id': 1, 'descripcion': f'Gasto {i}', 'categoria': 'servicios',
+         'monto': 12.5, 'fecha_gasto': ahora - timedelta(hours=i)}
+        for i in range(1, filas + 1)
+    ])
+    db.session.execute(insert(Deuda), [
+        {'empresa_id': 1, 'cliente_nombre': f'Cliente {i}', 'monto_total': 50.0, 'monto_pagado': 10.0,
+         'monto_pendiente': 40.0, 'estado': 'pendiente', 'descripcion': 'Detalle ' * 20,
+         'fecha_vencimiento': ahora + timedelta(days=i % 90)}
+        for i in range(1, filas + 1)
+    ])
+    db.session.commit()
+
+
+def _medir(funcion, repeticiones):
+    from app import db
+
+    tiempos = []
+    for _ in range(repeticiones):
+        db.session.expunge_all()
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos) * 1000
+
+
+def _casos(app):
+    from app import db, serializacion
+    from app.models import Deuda, Gasto, Inventario, Venta, VentaItem
+    from app.ventas.routes import _ventas_a_dicts
+
+    def venta_proyeccion():
+        # Mismo camino que GET /api/ventas/?todas=1
+        filas = db.session.execute(serializacion.VENTA.select().where(Venta.empresa_id == 1)).all()
+        items_query = db.session.query(VentaItem).join(Venta, Venta.id == VentaItem.venta_id) \
+            .filter(Venta.empresa_id == 1)
+        return app.json.dumps(_ventas_a_dicts(filas, None, items_query))
+
+    return {
+        'Inventario': (
+            lambda: json.dumps([p.to_dict() for p in Inventario.query.filter_by(empresa_id=1).all()]),
+            lambda: app.json.dumps(serializacion.PRODUCTO.dicts(
+                serializacion.PRODUCTO.select().where(Inventario.empresa_id == 1))),
+        ),
+        'Venta': (
+            lambda: json.dumps([v.to_dict() for v in Venta.query.filter_by(empresa_id=1).all()]),
+            venta_proyeccion,
+        ),
+        'Gasto': (
+            lambda: json.dumps([g.to_dict() for g in Gasto.query.filter_by(empresa_id=1).all()]),
+            lambda: app.json.dumps(serializacion.GASTO.dicts(
+                serializacion.GASTO.select().where(Gasto.empresa_id == 1))),
+        ),
+        'Deuda': (
+            lambda: json.dumps([d.to_dict() for d in Deuda.query.filter_by(empresa_id=1).all()]),
+            lambda: app.json.dumps(serializacion.DEUDA.dicts(
+                serializacion.DEUDA.select().where(Deuda.empresa_id == 1))),
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, default=20000, help='Filas por tabla')
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args()
+
+    carpeta = tempfile.mkdtemp(prefix='dalu-bench-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(carpeta, 'bench.db')}"
+    os.environ.setdefault('FLASK_ENV', 'production')
+    os.environ.setdefault('CREAR_TABLAS', '1')
+    os.environ.setdefault('RESPUESTAS_CACHE_BACKEND', 'off')
+
+    from app import create_app
+    from app import serializacion
+
+    app = create_app()
+    with app.app_context():
+        _preparar_bd(args.filas)
+        resultados = {}
+        for modelo, (to_dict, proyeccion) in _casos(app).items():
+            antes = _medir(to_dict, args.repeticiones)
+            despues = _medir(proyeccion, args.repeticiones)
+            resultados[modelo] = {
+                'to_dict_ms': round(antes, 1),
+                'proyeccion_ms': round(despues, 1),
+                'aceleracion': round(antes / despues, 2) if despues else None,
+            }
+
+    print(json.dumps({
+        'filas': args.filas,
+        'json': 'orjson' if serializacion.orjson is not None else 'json',
+        'resultados': resultados,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
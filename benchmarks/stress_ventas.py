@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+"""
+Prueba de estrés de ventas concurrentes sobre pocos SKUs "calientes"
+
+Lanza muchos procesos que venden a la vez los mismos productos contra
+una instancia en marcha y verifica que el stock final sea consistente:
+nunca negativo y exactamente stock_inicial - unidades vendidas.
+
+Uso:
+    gunicorn --workers 4 --threads 8 wsgi:app &
+    python -m benchmarks.stress_ventas --url http://localhost:5000 \\
+        --procesos 16 --ventas 4000 --skus 3 --stock 1000
+"""
+import argparse
+import json
+import multiprocessing
+import random
+import sys
+import time
+import uuid
+
+import requests
+
+
+def _percentil(valores, p):
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))
+    return ordenados[indice]
+
+
+def preparar(url, skus, stock):
+    """Registrar una empresa nueva y crear los productos calientes"""
+    sufijo = uuid.uuid4().hex[:8]
+    r = requests.post(f'{url}/api/auth/registro', json={
+        'username': f'stress-{sufijo}',
+        'email': f'stress-{sufijo}@dalu.local',
+        'password': 'stress123',
+        'empresa_nombre': f'Stress {sufijo}',
+    })
+    r.raise_for_status()
+    token = r.json()['access_token']
+    headers = {'Authorization': f'Bearer {token}'}
+
+    productos = []
+    for i in range(skus):
+        r = requests.post(f'{url}/api/inventario/', headers=headers, json={
+            'nombre': f'Producto caliente {i}',
+            'sku': f'HOT-{sufijo}-{i}',
+            'costo_unitario': 1,
+            'precio_venta': 2,
+            'cantidad_disponible': stock,
+        })
+        r.raise_for_status()
+        productos.append(r.json()['producto']['id'])
+
+    return token, productos
+
+
+def _trabajador(args):
+    """Vender `ventas` veces; devuelve (latencias, vendidas por producto, estados)"""
+    url, token, productos, ventas, semilla = args
+    rnd = random.Random(semilla)
+    sesion = requests.Session()
+    sesion.headers['Authorization'] = f'Bearer {token}'
+
+    latencias = []
+    vendidas = {p: 0 for p in productos}
+    estados = {}
+    for _ in range(ventas):
+        producto = rnd.choice(productos)
+        inicio = time.perf_counter()
+        r = sesion.post(f'{url}/api/ventas/', json={
+            'inventario_id': producto,
+            'cantidad': 1,
+            'cliente_nombre': 'Stress',
+        })
+        latencias.append(time.perf_counter() - inicio)
+        estados[r.status_code] = estados.get(r.status_code, 0) + 1
+        if r.status_code == 201:
+            vendidas[producto] += 1
+    return latencias, vendidas, estados
+
+
+def ejecutar(url, procesos, ventas, skus, stock):
+    token, productos = preparar(url, skus, stock)
+    por_proceso = max(1, ventas // procesos)
+    tareas = [(url, token, productos, por_proceso, i) for i in range(procesos)]
+
+    inicio = time.perf_counter()
+    with multiprocessing.Pool(procesos) as pool:
+        resultados = pool.map(_trabajador, tareas)
+    duracion = time.perf_counter() - inicio
+
+    latencias = []
+    vendidas = {p: 0 for p in productos}
+    estados = {}
+    for lat, vend, est in resultados:
+        latencias.extend(lat)
+        for p, n in vend.items():
+            vendidas[p] += n
+        for codigo, n in est.items():
+            estados[codigo] = estados.get(codigo, 0) + n
+
+    # Verificar consistencia del stock final
+    headers = {'Authorization': f'Bearer {token}'}
+    inconsistencias = []
+    stock_final = {}
+    for p in productos:
+        final = requests.get(f'{url}/api/inventario/{p}', headers=headers).json()['producto']['cantidad_disponible']
+        stock_final[p] = final
+        if final < 0 or final != stock - vendidas[p]:
+            inconsistencias.append({'inventario_id': p, 'esperado': stock - vendidas[p], 'final': final})
+
+    return {
+        'procesos': procesos,
+        'solicitudes': len(latencias),
+        'duracion_s': round(duracion, 3),
+        'throughput_rps': round(len(latencias) / duracion, 1) if duracion else 0,
+        'latencia_ms': {
+            'p50': round(_percentil(latencias, 50) * 1000, 2),
+            'p95': round(_percentil(latencias, 95) * 1000, 2),
+            'p99': round(_percentil(latencias, 99) * 1000, 2),
+        },
+        'estados': {str(k): v for k, v in sorted(estados.items())},
+        'vendidas': {str(p): n for p, n in vendidas.items()},
+        'stock_final': {str(p): n for p, n in stock_final.items()},
+        'consistente': not inconsistencias,
+        'inconsistencias': inconsistencias,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Estrés de ventas concurrentes sobre SKUs calientes')
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--procesos', type=int, default=16)
+    parser.add_argument('--ventas', type=int, default=4000, help='Total de ventas a intentar')
+    parser.add_argument('--skus', type=int, default=3, help='Cantidad de productos calientes')
+    parser.add_argument('--stock', type=int, default=1000, help='Stock inicial de cada producto')
+    args = parser.parse_args()
+
+    reporte = ejecutar(args.url.rstrip('/'), args.procesos, args.ventas, args.skus, args.stock)
+    print(json.dumps(reporte, indent=2))
+    sys.exit(0 if reporte['consistente'] else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -13,6 +13,7 @@ class Config:
     # SQLAlchemy
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SQLALCHEMY_ECHO = False
+    # El pool de conexiones se configura con variables DB_* (ver app/pool.py)
     
     # CORS
     JSON_SORT_KEYS = False
@@ -0,0 +1,11 @@
+#!/bin/bash
+set -e
+
+# Aplica las migraciones pendientes antes de arrancar (FLASK_ENV=production no ejecuta create_all).
+# MIGRAR_AL_INICIAR=0 lo omite cuando `flask db upgrade` corre como paso de release aparte.
+if [ "${MIGRAR_AL_INICIAR:-1}" = "1" ]; then
+  echo "🔄 Aplicando migraciones (flask db upgrade)..."
+  flask db upgrade
+fi
+
+exec "$@"
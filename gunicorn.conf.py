@@ -0,0 +1,62 @@
+"""Configuración de gunicorn para producción
+
+Variables de entorno:
+- GUNICORN_WORKERS / GUNICORN_THREADS: procesos e hilos por proceso.
+  Los streams del balance van al proceso de gunicorn_sse.conf.py; aquí
+  cada uno ocuparía un hilo y BALANCE_STREAMS_POR_WORKER (2) debe quedar
+  bien por debajo de GUNICORN_THREADS
+- GUNICORN_PRELOAD=1: crear la app una vez en el master y compartirla
+  por fork (arranque más rápido y menos memoria); cada worker descarta
+  las conexiones heredadas en post_fork
+- POOL_PRECALENTAR=N: abrir N conexiones del pool al iniciar cada worker
+- PRECOMPILAR_PLANTILLAS=1: compilar las plantillas al iniciar cada worker
+- PROMETHEUS_MULTIPROC_DIR: carpeta donde cada worker escribe sus
+  métricas para que /api/metrics las sume (se vacía al arrancar)
+"""
+import os
+import shutil
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.getenv('GUNICORN_WORKERS', 4))
+threads = int(os.getenv('GUNICORN_THREADS', 8))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 60))
+accesslog = '-'
+errorlog = '-'
+preload_app = os.getenv('GUNICORN_PRELOAD', '0') == '1'
+
+# Debe fijarse antes de importar prometheus_client (al cargar la app)
+metricas_dir = os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/dalu-metricas')
+
+
+def on_starting(server):
+    # Métricas de una ejecución anterior sumarían a las nuevas
+    shutil.rmtree(metricas_dir, ignore_errors=True)
+    os.makedirs(metricas_dir, exist_ok=True)
+
+
+def post_fork(server, worker):
+    if preload_app:
+        from app.arranque import reiniciar_conexiones_tras_fork
+        from wsgi import app
+
+        reiniciar_conexiones_tras_fork(app)
+
+
+def post_worker_init(worker):
+    from app.arranque import precalentar
+    from wsgi import app
+
+    resultado = precalentar(app)
+    if resultado['conexiones'] or resultado['plantillas']:
+        worker.log.info(
+            f"Worker {worker.pid} precalentado: {resultado['conexiones']} conexiones, "
+            f"{resultado['plantillas']} plantillas en {resultado['segundos']}s"
+        )
+
+
+def child_exit(server, worker):
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,59 @@
+"""Configuración de gunicorn para el proceso de streams SSE del balance
+
+Sirve /api/balance/stream con workers gevent: cada stream es una
+greenlet esperando eventos, no un hilo, así un worker mantiene cientos
+de dashboards abiertos sin quitarle hilos a la API. Se arranca aparte
+de gunicorn.conf.py y el proxy envía /api/balance/stream a este puerto
+(o BALANCE_STREAM_URL apunta aquí):
+
+    gunicorn -c gunicorn_sse.conf.py wsgi:app
+
+Necesita BALANCE_EVENTOS_BACKEND=redis (el valor por defecto en
+producción) para recibir los cambios confirmados en los workers de la API.
+
+Variables de entorno:
+- SSE_BIND (0.0.0.0:5001), SSE_WORKERS (1), SSE_CONEXIONES (1000)
+- BALANCE_STREAMS_POR_WORKER: aquí 500 por defecto
+- DB_POOL_SIZE / DB_MAX_OVERFLOW: este proceso solo lee de la BD la
+  primera vez que ve una empresa, con un pool chico alcanza
+"""
+import os
+import shutil
+
+os.environ.setdefault('BALANCE_STREAMS_POR_WORKER', '500')
+os.environ.setdefault('DB_POOL_SIZE', '2')
+os.environ.setdefault('DB_MAX_OVERFLOW', '2')
+
+bind = os.getenv('SSE_BIND', '0.0.0.0:5001')
+workers = int(os.getenv('SSE_WORKERS', 1))
+worker_class = 'gevent'
+worker_connections = int(os.getenv('SSE_CONEXIONES', 1000))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 60))
+accesslog = '-'
+errorlog = '-'
+
+# Métricas separadas de las de los workers de la API
+metricas_dir = os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/dalu-metricas-sse')
+
+
+def on_starting(server):
+    shutil.rmtree(metricas_dir, ignore_errors=True)
+    os.makedirs(metricas_dir, exist_ok=True)
+
+
+def post_fork(server, worker):
+    # psycopg2 es C: sin esto una consulta bloquea todas las greenlets del worker
+    try:
+        from psycogreen.gevent import patch_psycopg
+    except ImportError:
+        worker.log.warning('psycogreen no instalado: las consultas bloquean el worker gevent')
+        return
+    patch_psycopg()
+
+
+def child_exit(server, worker):
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    multiprocess.mark_process_dead(worker.pid)
@@ -161,7 +161,8 @@ def init_database():
             inventario_id=inventarios[0].id,
             cantidad=1,
             precio_unitario=1200.00,
-            subtotal=1200.00
+            subtotal=1200.00,
+            categoria=inventarios[0].categoria
         )
         db.session.add(venta1)
         db.session.add(venta1_item)
@@ -203,6 +204,15 @@ def init_database():
         
         db.session.commit()
         
+        # Inicializar totales del balance desde los datos creados
+        from app.balance.ledger import reconstruir
+        reconstruir()
+        print("\n📊 Balance de la empresa calculado ✅")
+        
+        from app.ventas import resumen
+        resumen.reconstruir()
+        print("📈 Series de ventas calculadas ✅")
+        
         # Resumen
         print("\n" + "="*70)
         print("✅ BASE DE DATOS INICIALIZADA EXITOSAMENTE")
@@ -0,0 +1,208 @@
+"""Esquema inicial con índices compuestos por empresa
+
+Crea todas las tablas de la app y los índices que usan los listados y
+agregados (siempre filtran por empresa_id). Las bases creadas antes
+con db.create_all() se adoptan: solo se crean las tablas e índices que
+falten, así `flask db upgrade` funciona tanto en una BD vacía como en
+una existente.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+INDICES = (
+    ('ix_inventario_empresa_id', 'inventario', ['empresa_id']),
+    ('ix_venta_empresa_id_created_at', 'venta', ['empresa_id', 'created_at']),
+    ('ix_venta_item_venta_id', 'venta_item', ['venta_id']),
+    ('ix_gasto_empresa_id_fecha_gasto', 'gasto', ['empresa_id', 'fecha_gasto']),
+    ('ix_deuda_empresa_id_estado', 'deuda', ['empresa_id', 'estado']),
+    ('ix_deuda_empresa_id_created_at', 'deuda', ['empresa_id', 'created_at']),
+    ('ix_deuda_venta_id', 'deuda', ['venta_id']),
+)
+
+
+def _tablas_existentes():
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+def _indices_existentes(tabla):
+    return {indice['name'] for indice in sa.inspect(op.get_bind()).get_indexes(tabla)}
+
+
+def upgrade():
+    existentes = _tablas_existentes()
+
+    if 'empresa' not in existentes:
+        op.create_table(
+            'empresa',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('nombre', sa.String(length=255), nullable=False),
+            sa.Column('nit', sa.String(length=20), nullable=False),
+            sa.Column('direccion', sa.String(length=255), nullable=True),
+            sa.Column('telefono', sa.String(length=20), nullable=True),
+            sa.Column('email', sa.String(length=120), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('nit'),
+            sa.UniqueConstraint('nombre'),
+        )
+
+    if 'usuario' not in existentes:
+        op.create_table(
+            'usuario',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('username', sa.String(length=80), nullable=False),
+            sa.Column('email', sa.String(length=120), nullable=False),
+            sa.Column('password_hash', sa.String(length=255), nullable=False),
+            sa.Column('empresa_id', sa.Integer(), nullable=False),
+            sa.Column('rol', sa.String(length=50), nullable=True),
+            sa.Column('activo', sa.Boolean(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['empresa_id'], ['empresa.id']),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('email'),
+            sa.UniqueConstraint('username'),
+        )
+
+    if 'inventario' not in existentes:
+        op.create_table(
+            'inventario',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('empresa_id', sa.Integer(), nullable=False),
+            sa.Column('nombre', sa.String(length=255), nullable=False),
+            sa.Column('descripcion', sa.Text(), nullable=True),
+            sa.Column('sku', sa.String(length=100), nullable=False),
+            sa.Column('categoria', sa.String(length=100), nullable=True),
+            sa.Column('costo_unitario', sa.Float(), nullable=False),
+            sa.Column('precio_venta', sa.Float(), nullable=False),
+            sa.Column('cantidad_disponible', sa.Integer(), nullable=True),
+            sa.Column('cantidad_minima', sa.Integer(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['empresa_id'], ['empresa.id']),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('sku'),
+        )
+
+    if 'venta' not in existentes:
+        op.create_table(
+            'venta',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('empresa_id', sa.Integer(), nullable=False),
+            sa.Column('usuario_id', sa.Integer(), nullable=False),
+            sa.Column('cliente_nombre', sa.String(length=255), nullable=True),
+            sa.Column('cliente_email', sa.String(length=120), nullable=True),
+            sa.Column('cliente_telefono', sa.String(length=20), nullable=True),
+            sa.Column('subtotal', sa.Float(), nullable=True),
+            sa.Column('impuesto', sa.Float(), nullable=True),
+            sa.Column('total', sa.Float(), nullable=False),
+            sa.Column('tipo_pago', sa.String(length=50), nullable=True),
+            sa.Column('estado', sa.String(length=50), nullable=True),
+            sa.Column('notas', sa.Text(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['empresa_id'], ['empresa.id']),
+            sa.ForeignKeyConstraint(['usuario_id'], ['usuario.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+
+    if 'venta_item' not in existentes:
+        op.create_table(
+            'venta_item',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('venta_id', sa.Integer(), nullable=False),
+            sa.Column('inventario_id', sa.Integer(), nullable=False),
+            sa.Column('cantidad', sa.Integer(), nullable=False),
+            sa.Column('precio_unitario', sa.Float(), nullable=False),
+            sa.Column('subtotal', sa.Float(), nullable=False),
+            sa.ForeignKeyConstraint(['inventario_id'], ['inventario.id']),
+            sa.ForeignKeyConstraint(['venta_id'], ['venta.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+
+    if 'gasto' not in existentes:
+        op.create_table(
+            'gasto',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('empresa_id', sa.Integer(), nullable=False),
+            sa.Column('usuario_id', sa.Integer(), nullable=False),
+            sa.Column('descripcion', sa.String(length=255), nullable=False),
+            sa.Column('categoria', sa.String(length=100), nullable=True),
+            sa.Column('monto', sa.Float(), nullable=False),
+            sa.Column('comprobante', sa.String(length=100), nullable=True),
+            sa.Column('fecha_gasto', sa.DateTime(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['empresa_id'], ['empresa.id']),
+            sa.ForeignKeyConstraint(['usuario_id'], ['usuario.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+
+    if 'deuda' not in existentes:
+        op.create_table(
+            'deuda',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('empresa_id', sa.Integer(), nullable=False),
+            sa.Column('venta_id', sa.Integer(), nullable=True),
+            sa.Column('cliente_nombre', sa.String(length=255), nullable=False),
+            sa.Column('cliente_email', sa.String(length=120), nullable=True),
+            sa.Column('monto_total', sa.Float(), nullable=False),
+            sa.Column('monto_pagado', sa.Float(), nullable=True),
+            sa.Column('monto_pendiente', sa.Float(), nullable=False),
+            sa.Column('estado', sa.String(length=50), nullable=True),
+            sa.Column('fecha_vencimiento', sa.DateTime(), nullable=True),
+            sa.Column('descripcion', sa.Text(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['empresa_id'], ['empresa.id']),
+            sa.ForeignKeyConstraint(['venta_id'], ['venta.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+
+    if 'balance_empresa' not in existentes:
+        op.create_table(
+            'balance_empresa',
+            sa.Column('empresa_id', sa.Integer(), nullable=False),
+            sa.Column('total_ingresos', sa.Float(), nullable=False),
+            sa.Column('total_egresos', sa.Float(), nullable=False),
+            sa.Column('deudas_pendientes', sa.Float(), nullable=False),
+            sa.Column('cantidad_ventas', sa.Integer(), nullable=False),
+            sa.Column('cantidad_gastos', sa.Integer(), nullable=False),
+            sa.Column('cantidad_deudas_pendientes', sa.Integer(), nullable=False),
+            sa.Column('version', sa.Integer(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['empresa_id'], ['empresa.id']),
+            sa.PrimaryKeyConstraint('empresa_id'),
+        )
+
+    for nombre, tabla, columnas in INDICES:
+        if nombre not in _indices_existentes(tabla):
+            op.create_index(nombre, tabla, columnas)
+
+
+def downgrade():
+    for nombre, tabla, _ in reversed(INDICES):
+        op.drop_index(nombre, table_name=tabla)
+
+    op.drop_table('balance_empresa')
+    op.drop_table('deuda')
+    op.drop_table('gasto')
+    op.drop_table('venta_item')
+    op.drop_table('venta')
+    op.drop_table('inventario')
+    op.drop_table('usuario')
+    op.drop_table('empresa')
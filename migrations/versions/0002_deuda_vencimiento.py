@@ -0,0 +1,29 @@
+"""Índice para el job que marca deudas vencidas
+
+`flask deudas marcar-vencidas` busca deudas pendientes con
+fecha_vencimiento pasada en todas las empresas.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    indices = {indice['name'] for indice in sa.inspect(op.get_bind()).get_indexes('deuda')}
+    if 'ix_deuda_estado_fecha_vencimiento' not in indices:
+        op.create_index('ix_deuda_estado_fecha_vencimiento', 'deuda', ['estado', 'fecha_vencimiento'])
+
+
+def downgrade():
+    op.drop_index('ix_deuda_estado_fecha_vencimiento', table_name='deuda')
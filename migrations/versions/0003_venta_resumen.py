@@ -0,0 +1,41 @@
+"""Tabla venta_resumen con series de ventas por día, semana y mes
+
+Después de aplicarla, `flask ventas reconstruir-resumen` carga las
+series de las ventas existentes.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if 'venta_resumen' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        'venta_resumen',
+        sa.Column('empresa_id', sa.Integer(), nullable=False),
+        sa.Column('periodo', sa.String(length=10), nullable=False),
+        sa.Column('dimension', sa.String(length=20), nullable=False),
+        sa.Column('inicio', sa.Date(), nullable=False),
+        sa.Column('valor', sa.String(length=100), nullable=False),
+        sa.Column('ingresos', sa.Float(), nullable=False),
+        sa.Column('unidades', sa.Integer(), nullable=False),
+        sa.Column('tickets', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['empresa_id'], ['empresa.id']),
+        sa.PrimaryKeyConstraint('empresa_id', 'periodo', 'dimension', 'inicio', 'valor'),
+    )
+
+
+def downgrade():
+    op.drop_table('venta_resumen')
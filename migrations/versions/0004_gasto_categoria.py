@@ -0,0 +1,29 @@
+"""Índice de gastos por categoría y fecha
+
+Lo usan el listado filtrado por ?categoria= con rango de fechas y los
+totales por categoría y mes.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    indices = {indice['name'] for indice in sa.inspect(op.get_bind()).get_indexes('gasto')}
+    if 'ix_gasto_empresa_id_categoria_fecha_gasto' not in indices:
+        op.create_index('ix_gasto_empresa_id_categoria_fecha_gasto', 'gasto', ['empresa_id', 'categoria', 'fecha_gasto'])
+
+
+def downgrade():
+    op.drop_index('ix_gasto_empresa_id_categoria_fecha_gasto', table_name='gasto')
@@ -0,0 +1,44 @@
+"""Tabla de tokens revocados
+
+Los workers la leen cada REVOCACION_SYNC_SEGUNDOS por created_at; la
+limpieza de vencidos usa expira.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if 'token_revocado' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        'token_revocado',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('jti', sa.String(length=64), nullable=True),
+        sa.Column('usuario_id', sa.Integer(), nullable=True),
+        sa.Column('expira', sa.DateTime(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('jti'),
+    )
+    op.create_index('ix_token_revocado_usuario_id', 'token_revocado', ['usuario_id'])
+    op.create_index('ix_token_revocado_expira', 'token_revocado', ['expira'])
+    op.create_index('ix_token_revocado_created_at', 'token_revocado', ['created_at'])
+
+
+def downgrade():
+    op.drop_index('ix_token_revocado_created_at', table_name='token_revocado')
+    op.drop_index('ix_token_revocado_expira', table_name='token_revocado')
+    op.drop_index('ix_token_revocado_usuario_id', table_name='token_revocado')
+    op.drop_table('token_revocado')
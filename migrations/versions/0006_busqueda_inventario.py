@@ -0,0 +1,61 @@
+"""Índices de búsqueda de productos
+
+PostgreSQL: extensión pg_trgm e índice GIN de trigramas sobre nombre,
+sku y categoría. SQLite: tabla FTS5 inventario_fts con triggers que la
+mantienen al día, cargada con los productos existentes.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+TEXTO = "lower(nombre || ' ' || sku || ' ' || coalesce(categoria, ''))"
+
+
+def upgrade():
+    motor = op.get_bind().dialect.name
+    if motor == 'postgresql':
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.execute(f"CREATE INDEX IF NOT EXISTS ix_inventario_busqueda_trgm ON inventario USING gin ({TEXTO} gin_trgm_ops)")
+    elif motor == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS inventario_fts USING fts5("
+            "nombre, sku, categoria, content='inventario', content_rowid='id', "
+            "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS inventario_fts_ai AFTER INSERT ON inventario BEGIN "
+            "INSERT INTO inventario_fts(rowid, nombre, sku, categoria) VALUES (new.id, new.nombre, new.sku, new.categoria); END"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS inventario_fts_ad AFTER DELETE ON inventario BEGIN "
+            "INSERT INTO inventario_fts(inventario_fts, rowid, nombre, sku, categoria) "
+            "VALUES ('delete', old.id, old.nombre, old.sku, old.categoria); END"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS inventario_fts_au AFTER UPDATE OF nombre, sku, categoria ON inventario BEGIN "
+            "INSERT INTO inventario_fts(inventario_fts, rowid, nombre, sku, categoria) "
+            "VALUES ('delete', old.id, old.nombre, old.sku, old.categoria); "
+            "INSERT INTO inventario_fts(rowid, nombre, sku, categoria) VALUES (new.id, new.nombre, new.sku, new.categoria); END"
+        )
+        op.execute("INSERT INTO inventario_fts(inventario_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    motor = op.get_bind().dialect.name
+    if motor == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_inventario_busqueda_trgm")
+    elif motor == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS inventario_fts_au")
+        op.execute("DROP TRIGGER IF EXISTS inventario_fts_ad")
+        op.execute("DROP TRIGGER IF EXISTS inventario_fts_ai")
+        op.execute("DROP TABLE IF EXISTS inventario_fts")
@@ -0,0 +1,53 @@
+"""Índice parcial de productos bajo su mínimo y tabla novedad_stock
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+BAJO_MINIMO = 'cantidad_disponible <= cantidad_minima'
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    indices = {indice['name'] for indice in inspector.get_indexes('inventario')}
+    if 'ix_inventario_empresa_id_bajo_minimo' not in indices:
+        op.create_index(
+            'ix_inventario_empresa_id_bajo_minimo', 'inventario', ['empresa_id'],
+            postgresql_where=sa.text(BAJO_MINIMO), sqlite_where=sa.text(BAJO_MINIMO),
+        )
+
+    if 'novedad_stock' in inspector.get_table_names():
+        return
+    op.create_table(
+        'novedad_stock',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('empresa_id', sa.Integer(), nullable=False),
+        sa.Column('inventario_id', sa.Integer(), nullable=False),
+        sa.Column('tipo', sa.String(length=10), nullable=False),
+        sa.Column('cantidad_disponible', sa.Integer(), nullable=False),
+        sa.Column('cantidad_minima', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['empresa_id'], ['empresa.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_novedad_stock_empresa_id_id', 'novedad_stock', ['empresa_id', 'id'])
+    op.create_index('ix_novedad_stock_created_at', 'novedad_stock', ['created_at'])
+
+
+def downgrade():
+    op.drop_index('ix_novedad_stock_created_at', table_name='novedad_stock')
+    op.drop_index('ix_novedad_stock_empresa_id_id', table_name='novedad_stock')
+    op.drop_table('novedad_stock')
+    op.drop_index('ix_inventario_empresa_id_bajo_minimo', table_name='inventario')
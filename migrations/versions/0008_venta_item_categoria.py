@@ -0,0 +1,37 @@
+"""Categoría del producto guardada en cada item de venta
+
+venta_resumen suma y resta por esta categoría: al eliminar una venta
+se resta del mismo grupo en que se sumó aunque el producto haya cambiado
+de categoría después. Los items existentes toman la categoría actual de
+su producto (la misma que usaba el resumen hasta ahora).
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    columnas = {columna['name'] for columna in sa.inspect(op.get_bind()).get_columns('venta_item')}
+    if 'categoria' not in columnas:
+        op.add_column('venta_item', sa.Column('categoria', sa.String(length=100), nullable=True))
+    op.execute(
+        "UPDATE venta_item SET categoria = "
+        "(SELECT inventario.categoria FROM inventario WHERE inventario.id = venta_item.inventario_id) "
+        "WHERE categoria IS NULL"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('venta_item') as batch_op:
+        batch_op.drop_column('categoria')
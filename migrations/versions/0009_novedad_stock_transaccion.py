@@ -0,0 +1,41 @@
+"""Cursor de novedades de reposición en orden de confirmación
+
+novedad_stock.transaccion guarda el id de la transacción que la creó
+(PostgreSQL); el cursor pasa a ser (transaccion, id). Las novedades
+existentes quedan con transaccion 0, antes que todas las nuevas.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    columnas = {columna['name'] for columna in inspector.get_columns('novedad_stock')}
+    if 'transaccion' not in columnas:
+        op.add_column('novedad_stock', sa.Column('transaccion', sa.BigInteger(), server_default='0', nullable=False))
+
+    indices = {indice['name'] for indice in inspector.get_indexes('novedad_stock')}
+    if 'ix_novedad_stock_empresa_id_transaccion_id' not in indices:
+        op.create_index('ix_novedad_stock_empresa_id_transaccion_id', 'novedad_stock',
+                        ['empresa_id', 'transaccion', 'id'])
+    if 'ix_novedad_stock_empresa_id_id' in indices:
+        op.drop_index('ix_novedad_stock_empresa_id_id', table_name='novedad_stock')
+
+
+def downgrade():
+    op.create_index('ix_novedad_stock_empresa_id_id', 'novedad_stock', ['empresa_id', 'id'])
+    op.drop_index('ix_novedad_stock_empresa_id_transaccion_id', table_name='novedad_stock')
+    with op.batch_alter_table('novedad_stock') as batch_op:
+        batch_op.drop_column('transaccion')
@@ -0,0 +1,46 @@
+"""Fila de balance_empresa para las empresas que no la tienen
+
+Las empresas creadas antes del libro de totales solo tenían fila si
+alguien la creaba en su primera escritura. Se cargan recalculadas desde
+venta, gasto y deuda (igual que `flask balance reconstruir`).
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0010'
+down_revision = '0009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""
+        INSERT INTO balance_empresa (
+            empresa_id, total_ingresos, total_egresos, deudas_pendientes,
+            cantidad_ventas, cantidad_gastos, cantidad_deudas_pendientes, version
+        )
+        SELECT
+            empresa.id,
+            (SELECT coalesce(sum(venta.total), 0) FROM venta WHERE venta.empresa_id = empresa.id),
+            (SELECT coalesce(sum(gasto.monto), 0) FROM gasto WHERE gasto.empresa_id = empresa.id),
+            (SELECT coalesce(sum(deuda.monto_pendiente), 0) FROM deuda
+             WHERE deuda.empresa_id = empresa.id AND deuda.estado IN ('pendiente', 'vencida')),
+            (SELECT count(*) FROM venta WHERE venta.empresa_id = empresa.id),
+            (SELECT count(*) FROM gasto WHERE gasto.empresa_id = empresa.id),
+            (SELECT count(*) FROM deuda
+             WHERE deuda.empresa_id = empresa.id AND deuda.estado IN ('pendiente', 'vencida')),
+            1
+        FROM empresa
+        WHERE NOT EXISTS (SELECT 1 FROM balance_empresa WHERE balance_empresa.empresa_id = empresa.id)
+    """)
+
+
+def downgrade():
+    # Las filas cargadas son válidas con o sin esta revisión
+    pass
@@ -97,13 +97,21 @@ function apiDelete(url) {
 }
 
 /**
- * Logout
+ * Logout: revoca el token en el servidor y limpia la sesión local
  */
 function logout() {
-    localStorage.removeItem('access_token');
-    localStorage.removeItem('usuario');
-    localStorage.removeItem('empresa_id');
-    window.location.href = '/login';
+    const token = localStorage.getItem('access_token');
+    const salir = () => {
+        localStorage.removeItem('access_token');
+        localStorage.removeItem('usuario');
+        localStorage.removeItem('empresa_id');
+        window.location.href = '/login';
+    };
+    if (!token) return salir();
+    fetch('/api/auth/logout', {
+        method: 'POST',
+        headers: { 'Authorization': `Bearer ${token}` }
+    }).catch(() => {}).finally(salir);
 }
 
 /**
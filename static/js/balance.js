@@ -7,13 +7,119 @@ console.log('✅ balance.js cargado');
 
 document.addEventListener('DOMContentLoaded', function() {
     console.log('✅ DOM ready - Cargando balance...');
-    loadBalance();
     
-    // 🔄 Recargar cada 30 segundos
-    setInterval(loadBalance, 30000);
+    // 📡 Recibir cambios por SSE (fetch con el token en el header, no en la URL).
+    // Con el stream abierto no se consulta la API: el primer mensaje ya trae el
+    // balance. Sin soporte de streams se recarga cada 30 segundos.
+    if (window.ReadableStream && window.TextDecoder) {
+        connectBalanceStream();
+    } else {
+        loadBalance();
+        setInterval(loadBalance, 30000);
+    }
 });
 
 
+let balanceLastEventId = null;
+let balanceRetryMs = 3000;
+
+// Proceso SSE aparte (BALANCE_STREAM_URL); vacío = mismo origen
+const balanceStreamBase = ((document.querySelector('meta[name="balance-stream-url"]') || {}).content || '').replace(/\/$/, '');
+
+
+/**
+ * 📡 Conectar al stream de balance (/api/balance/stream)
+ * Reconecta al terminar y envía Last-Event-ID para reanudar
+ */
+function connectBalanceStream() {
+    const token = localStorage.getItem('access_token');
+    
+    if (!token) {
+        loadBalance();
+        return;
+    }
+    
+    const headers = { 'Authorization': `Bearer ${token}` };
+    if (balanceLastEventId !== null) {
+        headers['Last-Event-ID'] = balanceLastEventId;
+    }
+    
+    fetch(`${balanceStreamBase}/api/balance/stream`, { headers })
+        .then(response => {
+            if (response.status === 401) {
+                window.location.href = '/login';
+                return null;
+            }
+            if (!response.ok || !response.body) {
+                // Sin cupo (503): una lectura por API y se reintenta el stream
+                const retryAfter = parseInt(response.headers.get('Retry-After'), 10);
+                loadBalance();
+                return (retryAfter || 60) * 1000;
+            }
+            return readBalanceStream(response.body.getReader()).then(() => balanceRetryMs);
+        })
+        .catch(error => {
+            console.warn('⚠️ Stream de balance interrumpido, reconectando...', error);
+            return balanceRetryMs;
+        })
+        .then(delay => {
+            if (delay !== null) {
+                setTimeout(connectBalanceStream, delay);
+            }
+        });
+}
+
+
+/**
+ * 📥 Leer mensajes SSE (id, event, data, retry) hasta que el servidor cierre
+ */
+function readBalanceStream(reader) {
+    const decoder = new TextDecoder();
+    let buffer = '';
+    
+    function read() {
+        return reader.read().then(({ done, value }) => {
+            if (done) {
+                return;
+            }
+            buffer += decoder.decode(value, { stream: true });
+            
+            let separator;
+            while ((separator = buffer.indexOf('\n\n')) !== -1) {
+                handleBalanceMessage(buffer.slice(0, separator));
+                buffer = buffer.slice(separator + 2);
+            }
+            return read();
+        });
+    }
+    
+    return read();
+}
+
+
+function handleBalanceMessage(message) {
+    let type = 'message';
+    let data = '';
+    
+    message.split('\n').forEach(line => {
+        const colon = line.indexOf(':');
+        if (colon <= 0) {
+            return;  // comentario (": ping") o línea vacía
+        }
+        const field = line.slice(0, colon);
+        const value = line.slice(colon + 1).trimStart();
+        if (field === 'id') balanceLastEventId = value;
+        else if (field === 'event') type = value;
+        else if (field === 'data') data += value;
+        else if (field === 'retry') balanceRetryMs = parseInt(value, 10) || balanceRetryMs;
+    });
+    
+    if (type === 'balance' && data) {
+        renderBalance(JSON.parse(data));
+    }
+}
+
+
 /**
  * 📊 Cargar balance desde API
  */
@@ -49,29 +155,7 @@ function loadBalance() {
             return;
         }
         
-        // ✅ Parsear valores
-        const balanceNeto = parseFloat(data.balance_neto);
-        const totalIngresos = parseFloat(data.total_ingresos);
-        const totalEgresos = parseFloat(data.total_egresos);
-        const deudasPendientes = parseFloat(data.deudas_pendientes);
-        const flujoDisponible = parseFloat(data.flujo_disponible);
-        
-        // 💵 Actualizar valores formateados
-        document.getElementById('balanceNeto').textContent = formatMoney(balanceNeto);
-        document.getElementById('totalIngresos').textContent = formatMoney(totalIngresos);
-        document.getElementById('totalEgresos').textContent = formatMoney(totalEgresos);
-        document.getElementById('deudasPendientes').textContent = formatMoney(deudasPendientes);
-        document.getElementById('flujoDisponible').textContent = formatMoney(flujoDisponible);
-        
-        // 📝 Actualizar subtextos (cantidad de registros)
-        document.getElementById('cantVentas').textContent = `${data.cantidad_ventas} ventas`;
-        document.getElementById('cantGastos').textContent = `${data.cantidad_gastos} gastos`;
-        document.getElementById('cantDeudas').textContent = `${data.cantidad_deudas_pendientes} pendientes`;
-        
-        // 🎨 Actualizar estado y color del balance
-        updateBalanceCard(balanceNeto);
-        
-        console.log('✅ Balance actualizado correctamente');
+        renderBalance(data);
     })
     .catch(error => {
         console.error('❌ Error en fetch:', error);
@@ -80,6 +164,36 @@ function loadBalance() {
 }
 
 
+/**
+ * 🖥️ Pintar los valores del balance en el dashboard
+ */
+function renderBalance(data) {
+    // ✅ Parsear valores
+    const balanceNeto = parseFloat(data.balance_neto);
+    const totalIngresos = parseFloat(data.total_ingresos);
+    const totalEgresos = parseFloat(data.total_egresos);
+    const deudasPendientes = parseFloat(data.deudas_pendientes);
+    const flujoDisponible = parseFloat(data.flujo_disponible);
+    
+    // 💵 Actualizar valores formateados
+    document.getElementById('balanceNeto').textContent = formatMoney(balanceNeto);
+    document.getElementById('totalIngresos').textContent = formatMoney(totalIngresos);
+    document.getElementById('totalEgresos').textContent = formatMoney(totalEgresos);
+    document.getElementById('deudasPendientes').textContent = formatMoney(deudasPendientes);
+    document.getElementById('flujoDisponible').textContent = formatMoney(flujoDisponible);
+    
+    // 📝 Actualizar subtextos (cantidad de registros)
+    document.getElementById('cantVentas').textContent = `${data.cantidad_ventas} ventas`;
+    document.getElementById('cantGastos').textContent = `${data.cantidad_gastos} gastos`;
+    document.getElementById('cantDeudas').textContent = `${data.cantidad_deudas_pendientes} pendientes`;
+    
+    // 🎨 Actualizar estado y color del balance
+    updateBalanceCard(balanceNeto);
+    
+    console.log('✅ Balance actualizado correctamente');
+}
+
+
 /**
  * 🎨 Actualizar tarjeta de balance con color según estado
  */
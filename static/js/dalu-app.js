@@ -243,10 +243,18 @@ const DALU = {
     },
 
     logout() {
-        localStorage.removeItem('access_token');
-        localStorage.removeItem('usuario');
-        localStorage.removeItem('empresa_id');
-        window.location.href = '/';
+        const token = localStorage.getItem('access_token');
+        const salir = () => {
+            localStorage.removeItem('access_token');
+            localStorage.removeItem('usuario');
+            localStorage.removeItem('empresa_id');
+            window.location.href = '/';
+        };
+        if (!token) return salir();
+        fetch('/api/auth/logout', {
+            method: 'POST',
+            headers: { 'Authorization': `Bearer ${token}` }
+        }).catch(() => {}).finally(salir);
     }
 };
 
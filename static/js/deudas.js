@@ -77,7 +77,7 @@ function loadDeudas() {
         </tr>
     `;
     
-    fetch('/api/deudas/', {
+    fetch('/api/deudas/?fields=id,cliente_nombre,cliente_email,monto_total,monto_pagado,monto_pendiente,estado,descripcion,created_at', {
         method: 'GET',
         headers: { 'Authorization': `Bearer ${token}` }
     })
@@ -79,7 +79,7 @@ function loadGastos() {
         </tr>
     `;
     
-    fetch('/api/gastos/', {
+    fetch('/api/gastos/?fields=id,descripcion,monto,fecha_gasto', {
         method: 'GET',
         headers: { 'Authorization': `Bearer ${token}` }
     })
@@ -9,8 +9,21 @@ document.addEventListener('DOMContentLoaded', function() {
         form.addEventListener('submit', handleFormSubmit);
         console.log('✅ Formulario listo');
     }
+    
+    // Filtro en el servidor: la tabla se carga por páginas
+    const filtro = document.getElementById('filtroInventario');
+    let espera = null;
+    if (filtro) {
+        filtro.addEventListener('input', () => {
+            clearTimeout(espera);
+            espera = setTimeout(() => loadInventory(), 250);
+        });
+    }
 });
 
+const POR_PAGINA = 100;
+let inventarioCargado = 0;
+
 function handleFormSubmit(event) {
     event.preventDefault();
     
@@ -66,20 +79,32 @@ function handleFormSubmit(event) {
     });
 }
 
-function loadInventory() {
+function loadInventory(agregar = false) {
     const token = localStorage.getItem('access_token');
     const tbody = document.getElementById('inventoryTableBody');
+    const filtro = document.getElementById('filtroInventario');
+    const cargarMas = document.getElementById('cargarMas');
+    
+    if (!agregar) {
+        inventarioCargado = 0;
+        tbody.innerHTML = `
+            <tr>
+                <td colspan="7" style="text-align: center; padding: 2rem;">
+                    <div style="font-size: 1.5rem;">⏳ Cargando...</div>
+                </td>
+            </tr>
+        `;
+    }
     
-    tbody.innerHTML = `
-        <tr>
-            <td colspan="7" style="text-align: center; padding: 2rem;">
-                <div style="font-size: 1.5rem;">⏳ Cargando...</div>
-            </td>
-        </tr>
-    `;
+    const params = new URLSearchParams({
+        q: filtro ? filtro.value.trim() : '',
+        limite: POR_PAGINA,
+        desplazamiento: inventarioCargado,
+        fields: 'id,nombre,costo_unitario,precio_venta,cantidad_disponible'
+    });
     
-    // RUTA CORRECTA: /api/inventario/
-    fetch('/api/inventario/', {
+    // RUTA CORRECTA: /api/inventario/buscar (paginado)
+    fetch(`/api/inventario/buscar?${params}`, {
         method: 'GET',
         headers: { 'Authorization': `Bearer ${token}` }
     })
@@ -88,8 +113,11 @@ function loadInventory() {
         console.log('✅ Datos recibidos:', data);
         
         let productos = data.productos || [];
+        if (cargarMas) {
+            cargarMas.style.display = data.hay_mas ? 'inline-block' : 'none';
+        }
         
-        if (!productos || productos.length === 0) {
+        if (!agregar && (!productos || productos.length === 0)) {
             tbody.innerHTML = `
                 <tr>
                     <td colspan="7" class="empty-state">
@@ -101,7 +129,7 @@ function loadInventory() {
             return;
         }
         
-        tbody.innerHTML = productos.map(p => `
+        const filas = productos.map(p => `
             <tr>
                 <td><span class="badge">${p.id}</span></td>
                 <td><strong>${p.nombre}</strong></td>
@@ -115,6 +143,13 @@ function loadInventory() {
                 </td>
             </tr>
         `).join('');
+        
+        if (agregar) {
+            tbody.insertAdjacentHTML('beforeend', filas);
+        } else {
+            tbody.innerHTML = filas;
+        }
+        inventarioCargado += productos.length;
     })
     .catch(error => {
         console.error('Error:', error);
@@ -9,6 +9,26 @@ document.addEventListener('DOMContentLoaded', function() {
     if (form) {
         form.addEventListener('submit', handleFormSubmit);
     }
+    
+    // Búsqueda en el servidor mientras se escribe (sin descargar todo el inventario)
+    const buscador = document.getElementById('buscar_producto');
+    let espera = null;
+    if (buscador) {
+        buscador.addEventListener('input', () => {
+            clearTimeout(espera);
+            espera = setTimeout(() => loadProductos(buscador.value.trim()), 250);
+        });
+    }
+    
+    // Lector de código de barras: escribe el SKU y envía Enter
+    const codigo = document.getElementById('codigo_sku');
+    if (codigo) {
+        codigo.addEventListener('keydown', event => {
+            if (event.key !== 'Enter') return;
+            event.preventDefault();
+            buscarPorSku(codigo.value.trim());
+        });
+    }
 });
 
 function handlePaymentType() {
@@ -22,42 +42,78 @@ function handlePaymentType() {
     }
 }
 
-function loadProductos() {
+function llenarProductos(productos, hayMas) {
+    const select = document.getElementById('inventario_id');
+    
+    select.innerHTML = '<option value="">Selecciona un producto</option>';
+    
+    if (productos.length === 0) {
+        select.innerHTML += '<option disabled>No hay productos disponibles</option>';
+        return;
+    }
+    
+    productos.forEach(p => {
+        const stock = p.cantidad_disponible || 0;
+        const stockText = stock === 0 ? ' (⛔ SIN STOCK)' : ` (Stock: ${stock})`;
+        
+        const option = document.createElement('option');
+        option.value = p.id;
+        option.textContent = `${p.nombre} - $${parseFloat(p.precio_venta).toFixed(2)}${stockText}`;
+        option.dataset.stock = stock;
+        option.dataset.nombre = p.nombre;
+        option.disabled = stock === 0;
+        
+        select.appendChild(option);
+    });
+    
+    if (hayMas) {
+        select.innerHTML += '<option disabled>… escribe en Buscar producto para ver más</option>';
+    }
+}
+
+function loadProductos(q = '') {
     const token = localStorage.getItem('access_token');
     const select = document.getElementById('inventario_id');
+    const params = new URLSearchParams({
+        q,
+        limite: 50,
+        fields: 'id,nombre,precio_venta,cantidad_disponible'
+    });
+    
+    fetch(`/api/inventario/buscar?${params}`, {
+        method: 'GET',
+        headers: { 'Authorization': `Bearer ${token}` }
+    })
+    .then(response => response.json())
+    .then(data => llenarProductos(data.productos || [], data.hay_mas))
+    .catch(error => {
+        console.error('Error cargando productos:', error);
+        select.innerHTML = '<option value="">Error cargando productos</option>';
+    });
+}
+
+function buscarPorSku(sku) {
+    if (!sku) return;
+    const token = localStorage.getItem('access_token');
     
-    fetch('/api/inventario/', {
+    fetch(`/api/inventario/sku/${encodeURIComponent(sku)}`, {
         method: 'GET',
         headers: { 'Authorization': `Bearer ${token}` }
     })
     .then(response => response.json())
     .then(data => {
-        const productos = data.productos || [];
-        
-        select.innerHTML = '<option value="">Selecciona un producto</option>';
-        
-        if (productos.length === 0) {
-            select.innerHTML += '<option disabled>No hay productos disponibles</option>';
+        if (!data.producto) {
+            showAlert(`❌ SKU no encontrado: ${sku}`, 'error');
             return;
         }
-        
-        productos.forEach(p => {
-            const stock = p.cantidad_disponible || 0;
-            const stockText = stock === 0 ? ' (⛔ SIN STOCK)' : ` (Stock: ${stock})`;
-            
-            const option = document.createElement('option');
-            option.value = p.id;
-            option.textContent = `${p.nombre} - $${parseFloat(p.precio_venta).toFixed(2)}${stockText}`;
-            option.dataset.stock = stock;
-            option.dataset.nombre = p.nombre;
-            option.disabled = stock === 0;
-            
-            select.appendChild(option);
-        });
+        llenarProductos([data.producto], false);
+        document.getElementById('inventario_id').value = data.producto.id;
+        document.getElementById('codigo_sku').value = '';
+        document.getElementById('cantidad').focus();
     })
     .catch(error => {
-        console.error('Error cargando productos:', error);
-        select.innerHTML = '<option value="">Error cargando productos</option>';
+        console.error('Error buscando SKU:', error);
+        showAlert('❌ Error: ' + error.message, 'error');
     });
 }
 
@@ -139,7 +195,7 @@ function loadVentas() {
         </tr>
     `;
     
-    fetch('/api/ventas/', {
+    fetch('/api/ventas/?todas=1&fields=id,total,cliente_nombre,cliente_email,tipo_pago,created_at,items', {
         method: 'GET',
         headers: { 'Authorization': `Bearer ${token}` }
     })
@@ -0,0 +1,94 @@
+"""Fixtures de pruebas: app sobre SQLite temporal, cliente y token
+
+Una empresa con productos y ventas creados por la API. La caché de
+respuestas va desactivada para que las pruebas midan las consultas
+reales de cada endpoint.
+"""
+import itertools
+import pytest
+
+pytest_plugins = ['app.pytest_consultas']
+
+USUARIO = 'prueba'
+PASSWORD = 'prueba123'
+
+
+@pytest.fixture(scope='session')
+def app(tmp_path_factory):
+    with pytest.MonkeyPatch.context() as entorno:
+        entorno.setenv('FLASK_ENV', 'testing')
+        entorno.setenv('DATABASE_URL', f"sqlite:///{tmp_path_factory.mktemp('bd') / 'dalu.db'}")
+        entorno.setenv('CREAR_TABLAS', '1')
+        entorno.setenv('RESPUESTAS_CACHE_BACKEND', 'off')
+        entorno.setenv('BALANCE_EVENTOS_BACKEND', 'local')
+
+        from app import create_app
+
+        app = create_app()
+        app.config['TESTING'] = True
+        yield app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture(scope='session')
+def token(app):
+    """Headers con el JWT de un usuario admin de una empresa con datos"""
+    cliente = app.test_client()
+    respuesta = cliente.post('/api/auth/registro', json={
+        'username': USUARIO, 'email': 'prueba@dalu.local', 'password': PASSWORD, 'empresa_nombre': 'Empresa Prueba'
+    })
+    assert respuesta.status_code == 201, respuesta.get_json()
+    encabezados = {'Authorization': f"Bearer {respuesta.get_json()['access_token']}"}
+
+    productos = []
+    for numero in range(1, 4):
+        respuesta = cliente.post('/api/inventario/', headers=encabezados, json={
+            'nombre': f'Producto {numero}', 'sku': f'PRUEBA-{numero}', 'categoria': 'general',
+            'precio_venta': 1000 * numero, 'costo_unitario': 500 * numero, 'cantidad_disponible': 500,
+        })
+        assert respuesta.status_code == 201, respuesta.get_json()
+        productos.append(respuesta.get_json()['producto']['id'])
+
+    for numero in range(5):
+        respuesta = cliente.post('/api/ventas/', headers=encabezados, json={
+            'cliente_nombre': f'Cliente {numero}',
+            'tipo_pago': 'credito' if numero % 2 else 'contado',
+            'items': [{'inventario_id': producto, 'cantidad': 1} for producto in productos],
+        })
+        assert respuesta.status_code == 201, respuesta.get_json()
+
+    return encabezados
+
+
+@pytest.fixture
+def producto_id(client, token):
+    return client.get('/api/inventario/?fields=id', headers=token).get_json()['productos'][0]['id']
+
+
+_skus = itertools.count(1)
+
+
+@pytest.fixture
+def crear_producto(client, token):
+    """Crear un producto nuevo por la API y devolver su dict"""
+
+    def _crear(**campos):
+        datos = {
+            'nombre': 'Producto de prueba', 'sku': f'PRUEBA-N{next(_skus)}', 'categoria': 'general',
+            'precio_venta': 100, 'costo_unitario': 50, 'cantidad_disponible': 10, 'cantidad_minima': 5,
+            **campos,
+        }
+        respuesta = client.post('/api/inventario/', headers=token, json=datos)
+        assert respuesta.status_code == 201, respuesta.get_json()
+        return respuesta.get_json()['producto']
+
+    return _crear
+
+
+@pytest.fixture
+def empresa_id(client, token):
+    return client.get('/api/auth/verify', headers=token).get_json()['empresa_id']
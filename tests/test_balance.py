@@ -0,0 +1,76 @@
+"""Libro de totales (balance_empresa): deltas por escritura y reconstrucción"""
+from app import db
+from app.balance import ledger
+from app.models import BalanceEmpresa
+
+
+def _balance(client, token):
+    respuesta = client.get('/api/balance/', headers=token)
+    assert respuesta.status_code == 200
+    return respuesta.get_json()
+
+
+def _verificar(app):
+    return app.test_cli_runner().invoke(args=['balance', 'reconstruir', '--solo-verificar'])
+
+
+def test_venta_y_anulacion_dejan_el_libro_igual(app, client, token, crear_producto):
+    producto = crear_producto(precio_venta=250, cantidad_disponible=20)
+    antes = _balance(client, token)
+
+    respuesta = client.post('/api/ventas/', headers=token, json={
+        'cliente_nombre': 'Cliente libro', 'tipo_pago': 'credito',
+        'items': [{'inventario_id': producto['id'], 'cantidad': 2}],
+    })
+    assert respuesta.status_code == 201, respuesta.get_json()
+    venta_id = respuesta.get_json()['venta']['id']
+
+    despues = _balance(client, token)
+    assert despues['total_ingresos'] == antes['total_ingresos'] + 500
+    assert despues['cantidad_ventas'] == antes['cantidad_ventas'] + 1
+    assert despues['deudas_pendientes'] == antes['deudas_pendientes'] + 500
+    assert despues['cantidad_deudas_pendientes'] == antes['cantidad_deudas_pendientes'] + 1
+
+    assert client.delete(f'/api/ventas/{venta_id}', headers=token).status_code == 200
+    assert _balance(client, token) == antes
+
+    resultado = _verificar(app)
+    assert resultado.exit_code == 0, resultado.output
+    assert 'sin diferencias' in resultado.output
+
+
+def test_reconstruir_reporta_y_corrige_diferencias(app, empresa_id, token):
+    with app.app_context():
+        db.session.get(BalanceEmpresa, empresa_id).total_ingresos += 123
+        db.session.commit()
+
+    resultado = _verificar(app)
+    assert resultado.exit_code == 1
+    assert 'total_ingresos' in resultado.output
+
+    with app.app_context():
+        diferencias = ledger.reconstruir(empresa_id)
+        assert [d['campo'] for d in diferencias] == ['total_ingresos']
+        assert ledger.reconstruir(empresa_id, corregir=False) == []
+
+
+def _abrir_stream(client, token, ultimo_id=None):
+    headers = dict(token)
+    if ultimo_id is not None:
+        headers['Last-Event-ID'] = str(ultimo_id)
+    return client.get('/api/balance/stream', headers=headers, buffered=False)
+
+
+def test_reconexion_al_dia_no_consulta_la_bd(client, token, presupuesto_consultas):
+    respuesta = _abrir_stream(client, token)
+    mensajes = iter(respuesta.response)
+    assert next(mensajes).startswith(b'retry:')
+    evento = next(mensajes).decode()
+    respuesta.close()
+    assert 'event: balance' in evento
+    ultimo_id = int(evento.split('\n')[0][len('id: '):])
+
+    with presupuesto_consultas(0):
+        respuesta = _abrir_stream(client, token, ultimo_id)
+        assert respuesta.status_code == 200
+        respuesta.close()
@@ -0,0 +1,40 @@
+"""Caché de respuestas: las escrituras confirmadas invalidan, los rollback no"""
+from app import cache, db
+from app.models import Gasto, Usuario
+import pytest
+
+
+@pytest.fixture
+def backend_local(monkeypatch):
+    backend = cache.BackendLocal()
+    monkeypatch.setattr(cache, '_backend', backend)
+    return backend
+
+
+def test_get_despues_de_una_escritura_devuelve_datos_nuevos(client, token, backend_local, presupuesto_consultas):
+    primera = client.get('/api/gastos/', headers=token).get_json()
+    with presupuesto_consultas(0):
+        assert client.get('/api/gastos/', headers=token).get_json() == primera
+
+    respuesta = client.post('/api/gastos/', headers=token, json={'descripcion': 'Gasto caché', 'monto': 75})
+    assert respuesta.status_code == 201, respuesta.get_json()
+
+    segunda = client.get('/api/gastos/', headers=token).get_json()
+    assert segunda != primera
+    assert 'Gasto caché' in str(segunda)
+
+
+def test_commit_invalida_y_rollback_no(app, empresa_id, token, backend_local):
+    nombre = cache.etiqueta(empresa_id, 'gastos')
+
+    with app.app_context():
+        usuario_id = Usuario.query.filter_by(empresa_id=empresa_id).first().id
+        db.session.add(Gasto(empresa_id=empresa_id, usuario_id=usuario_id, descripcion='Descartado', monto=1))
+        db.session.flush()
+        db.session.rollback()
+    assert backend_local.version(nombre) == 0
+
+    with app.app_context():
+        db.session.add(Gasto(empresa_id=empresa_id, usuario_id=usuario_id, descripcion='Confirmado', monto=1))
+        db.session.commit()
+    assert backend_local.version(nombre) == 1
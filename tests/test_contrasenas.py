@@ -0,0 +1,26 @@
+"""Rehash de contraseñas: solo hacia un método más fuerte que el guardado"""
+from app.auth import contrasenas
+from werkzeug.security import generate_password_hash
+import pytest
+
+
+@pytest.mark.parametrize('guardado, configurado, esperado', [
+    ('scrypt:32768:8:1', 'pbkdf2:sha256:50000', False),
+    ('pbkdf2:sha256:600000', 'pbkdf2:sha256:50000', False),
+    ('scrypt:65536:8:1', 'scrypt:32768:8:1', False),
+    ('pbkdf2:sha512:50000', 'pbkdf2:sha256:50000', False),
+    ('pbkdf2:sha256:50000', 'pbkdf2:sha256:50000', False),
+    ('pbkdf2:sha256:50000', 'pbkdf2:sha256:600000', True),
+    ('pbkdf2:sha256:600000', 'scrypt:32768:8:1', True),
+    ('scrypt:16384:8:1', 'scrypt:32768:8:1', True),
+    ('pbkdf2:sha1:600000', 'pbkdf2:sha256:600000', True),
+])
+def test_necesita_rehash(app, guardado, configurado, esperado):
+    hash_guardado = generate_password_hash('secreto', guardado)
+    with app.app_context():
+        anterior = app.config['PASSWORD_HASH_METODO']
+        app.config['PASSWORD_HASH_METODO'] = configurado
+        try:
+            assert contrasenas.necesita_rehash(hash_guardado) is esperado
+        finally:
+            app.config['PASSWORD_HASH_METODO'] = anterior
@@ -0,0 +1,61 @@
+"""Importación masiva: validación por fila y errores aislados por lote"""
+from app import db
+from app.inventario import importacion
+from app.models import Inventario
+import io
+import json
+import pytest
+
+
+def _ndjson(*filas):
+    return io.StringIO('\n'.join(json.dumps(fila) for fila in filas))
+
+
+@pytest.mark.parametrize('fila, mensaje', [
+    ({'nombre': 'X', 'sku': 'S' * 101}, 'SKU no puede superar 100'),
+    ({'nombre': ['X'], 'sku': 'LISTA-1'}, 'Nombre debe ser texto'),
+    ({'nombre': 'X', 'sku': 'CANT-1', 'cantidad_disponible': 1.5}, 'cantidades enteras'),
+    ({'nombre': 'X', 'sku': 'CANT-2', 'cantidad_minima': True}, 'cantidades enteras'),
+    ({'nombre': 'X', 'sku': 'PREC-1', 'precio_venta': 'nan'}, 'numéricos'),
+])
+def test_validar_fila_rechaza_tipos_y_largos(fila, mensaje):
+    with pytest.raises(ValueError, match=mensaje):
+        importacion.validar_fila(fila)
+
+
+def test_sku_repetido_en_otro_lote(app, empresa_id):
+    stream = _ndjson(
+        {'nombre': 'Uno', 'sku': 'IMP-REP-1'},
+        {'nombre': 'Dos', 'sku': 'IMP-REP-2'},
+        {'nombre': 'Uno otra vez', 'sku': 'IMP-REP-1'},
+    )
+    with app.app_context():
+        reporte = importacion.importar(stream, 'ndjson', empresa_id, tamano_lote=2)
+        nombre = Inventario.query.filter_by(sku='IMP-REP-1').one().nombre
+
+    assert reporte['creados'] == 2
+    assert reporte['errores'] == [{'fila': 3, 'sku': 'IMP-REP-1', 'error': 'SKU repetido en el archivo'}]
+    assert nombre == 'Uno'
+
+
+def test_lote_rechazado_por_la_bd_no_corta_la_importacion(app, empresa_id, monkeypatch):
+    original = importacion._insertar
+
+    def fallar_en_el_primero(filas):
+        if any(fila['sku'] == 'IMP-FALLA-1' for fila in filas):
+            raise RuntimeError('violación simulada')
+        original(filas)
+
+    monkeypatch.setattr(importacion, '_insertar', fallar_en_el_primero)
+    stream = _ndjson(
+        {'nombre': 'Falla', 'sku': 'IMP-FALLA-1'},
+        {'nombre': 'Sigue', 'sku': 'IMP-SIGUE-1'},
+    )
+    with app.app_context():
+        reporte = importacion.importar(stream, 'ndjson', empresa_id, tamano_lote=1)
+        skus = {sku for (sku,) in db.session.query(Inventario.sku).filter(Inventario.sku.like('IMP-%-1'))}
+
+    assert reporte['creados'] == 1
+    assert reporte['con_error'] == 1
+    assert reporte['errores'][0]['sku'] == 'IMP-FALLA-1'
+    assert 'IMP-SIGUE-1' in skus and 'IMP-FALLA-1' not in skus
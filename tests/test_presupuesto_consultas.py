@@ -0,0 +1,21 @@
+"""Presupuesto de consultas SQL por endpoint (guarda contra N+1)
+
+Los máximos son las consultas actuales de cada endpoint (las mismas que
+reporta benchmarks.endpoints); si un cambio los supera la prueba falla
+con la lista de consultas y el sitio que las originó.
+"""
+
+
+def test_listar_ventas(client, token, presupuesto_consultas):
+    with presupuesto_consultas(2, repetidas=2):
+        respuesta = client.get('/api/ventas/?limite=50', headers=token)
+    assert respuesta.status_code == 200
+    assert len(respuesta.get_json()['ventas']) == 5
+
+
+def test_crear_venta(client, token, producto_id, presupuesto_consultas):
+    with presupuesto_consultas(8):
+        respuesta = client.post('/api/ventas/', headers=token, json={
+            'cliente_nombre': 'Cliente presupuesto', 'inventario_id': producto_id, 'cantidad': 1,
+        })
+    assert respuesta.status_code == 201, respuesta.get_json()
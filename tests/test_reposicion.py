@@ -0,0 +1,56 @@
+"""Lista de reposición y novedades con cursor"""
+from app.inventario import reposicion
+import pytest
+
+
+def _novedades(client, token, desde, limite=100):
+    respuesta = client.get(f'/api/inventario/reposicion/novedades?desde={desde}&limite={limite}', headers=token)
+    assert respuesta.status_code == 200, respuesta.get_json()
+    return respuesta.get_json()
+
+
+def test_cruces_del_minimo_se_leen_una_vez_desde_el_cursor(client, token, crear_producto):
+    producto = crear_producto(cantidad_disponible=8, cantidad_minima=5)
+    cursor = client.get('/api/inventario/reposicion', headers=token).get_json()['cursor']
+
+    respuesta = client.post('/api/ventas/', headers=token, json={
+        'cliente_nombre': 'Cliente reposición', 'inventario_id': producto['id'], 'cantidad': 4,
+    })
+    assert respuesta.status_code == 201
+    venta_id = respuesta.get_json()['venta']['id']
+
+    lista = client.get('/api/inventario/reposicion', headers=token).get_json()
+    assert producto['id'] in [p['id'] for p in lista['productos']]
+
+    leidas = _novedades(client, token, cursor)
+    assert [(n['inventario_id'], n['tipo'], n['cantidad_disponible']) for n in leidas['novedades']] == [
+        (producto['id'], 'bajo', 4)
+    ]
+    assert _novedades(client, token, leidas['cursor'])['novedades'] == []
+
+    assert client.delete(f'/api/ventas/{venta_id}', headers=token).status_code == 200
+    repuesto = _novedades(client, token, leidas['cursor'])
+    assert [(n['inventario_id'], n['tipo']) for n in repuesto['novedades']] == [(producto['id'], 'repuesto')]
+
+
+def test_paginacion_con_cursor(client, token, crear_producto):
+    cursor = client.get('/api/inventario/reposicion', headers=token).get_json()['cursor']
+    creados = [crear_producto(cantidad_disponible=1, cantidad_minima=5)['id'] for _ in range(3)]
+
+    vistos = []
+    while True:
+        pagina = _novedades(client, token, cursor, limite=2)
+        vistos += [n['inventario_id'] for n in pagina['novedades']]
+        cursor = pagina['cursor']
+        if not pagina['hay_mas']:
+            break
+    assert vistos == creados
+
+
+def test_leer_cursor():
+    assert reposicion.leer_cursor('0') == (0, 0)
+    assert reposicion.leer_cursor('17') == (0, 17)
+    assert reposicion.leer_cursor('42-17') == (42, 17)
+    for invalido in ('x', '-1', '1-2-3', '1-x'):
+        with pytest.raises(ValueError):
+            reposicion.leer_cursor(invalido)
@@ -0,0 +1,44 @@
+"""Descuento de stock condicional: nunca se vende más de lo disponible"""
+from app import db
+from app.inventario import stock
+from app.models import Inventario, Venta
+
+
+def _stock(app, producto_id):
+    with app.app_context():
+        return db.session.get(Inventario, producto_id).cantidad_disponible
+
+
+def test_venta_mayor_al_stock_responde_400_sin_tocar_nada(app, client, token, crear_producto):
+    producto = crear_producto(cantidad_disponible=3)
+    otro = crear_producto(cantidad_disponible=10)
+    with app.app_context():
+        ventas_antes = Venta.query.count()
+    balance_antes = client.get('/api/balance/', headers=token).get_json()
+
+    respuesta = client.post('/api/ventas/', headers=token, json={
+        'cliente_nombre': 'Cliente sobreventa',
+        'items': [{'inventario_id': otro['id'], 'cantidad': 1}, {'inventario_id': producto['id'], 'cantidad': 4}],
+    })
+
+    assert respuesta.status_code == 400
+    assert 'Stock insuficiente' in respuesta.get_json()['error']
+    assert _stock(app, producto['id']) == 3
+    assert _stock(app, otro['id']) == 10
+    with app.app_context():
+        assert Venta.query.count() == ventas_antes
+    assert client.get('/api/balance/', headers=token).get_json() == balance_antes
+
+
+def test_descontar_rechaza_la_linea_sin_stock(app, empresa_id, crear_producto):
+    producto = crear_producto(cantidad_disponible=5)
+
+    with app.app_context():
+        assert stock.descontar(empresa_id, {producto['id']: 6}) == [producto['id']]
+        db.session.rollback()
+    assert _stock(app, producto['id']) == 5
+
+    with app.app_context():
+        assert stock.descontar(empresa_id, {producto['id']: 5}) == []
+        db.session.commit()
+    assert _stock(app, producto['id']) == 0
@@ -1,7 +1,7 @@
 import os
 from app import create_app
 
-app = create_app()
+app = create_app(os.environ.get('FLASK_ENV', 'development'))
 
 if __name__ == '__main__':
     app.run(debug=False, host='0.0.0.0', port=5000)